@@ -1,282 +1,193 @@
 """
 数据统计分析模块
-提供考试结果的统计分析功能
+提供考试结果的统计分析功能（报表格式）。
+统计全部来自 analytics_queries 共享查询层（exam_attempts / student_answers 及增量统计表），
+与 analytics_api 的仪表盘接口共用同一份缓存结果。
 """
 
 from flask import Blueprint, jsonify, request
-from models import db, Exam, Question, User
-from sqlalchemy import func, text
-import json
+
+from models import db, Exam
+from auth import get_identity, can_view_student
+import analytics_queries as aq
 
 analytics_bp = Blueprint('analytics', __name__)
 
-@analytics_bp.route('/api/analytics/exam/<int:exam_id>/stats', methods=['GET'])
+# 分数段 -> 报表等级名（与 exam_stats.SCORE_RANGES 一一对应，高分在前输出）
+GRADE_LABELS = {
+    '0-59': '不及格(0-59)',
+    '60-69': '及格(60-69)',
+    '70-79': '中等(70-79)',
+    '80-89': '良好(80-89)',
+    '90-100': '优秀(90-100)',
+}
+
+MISTAKES_PAGE_SIZE = 20
+MISTAKES_MAX_PAGE_SIZE = 100
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100
+
+def _page_args(default_size, max_size):
+    """?limit=&offset= -> (limit, offset)，limit 限制在 [1, max_size]；参数不是整数时抛 ValueError"""
+    limit = min(max(int(request.args.get('limit') or default_size), 1), max_size)
+    offset = max(int(request.args.get('offset') or 0), 0)
+    return limit, offset
+
+def _truncate(text, n):
+    text = text or ''
+    return text[:n] + '...' if len(text) > n else text
+
+def _check_student_access(student_id):
+    """学生个人数据含题目正确答案：未登录 401，学生查看他人 403，教师不限"""
+    me = get_identity(request)
+    if not me:
+        return jsonify({'success': False, 'message': '请先登录'}), 401
+    if not can_view_student(me, student_id):
+        return jsonify({'success': False, 'message': '无权查看该学生的数据'}), 403
+    return None
+
+# 与 analytics_api 的 /analytics/exam/<id>/stats、/analytics/teacher/overview 同源，报表格式挂在 /report 下
+@analytics_bp.route('/analytics/report/exam/<int:exam_id>/stats', methods=['GET'])
 def get_exam_statistics(exam_id):
     """获取考试统计数据"""
     try:
-        exam = Exam.query.get_or_404(exam_id)
-        
-        # 基础统计
-        total_participants = db.session.execute(
-            text("SELECT COUNT(DISTINCT user_id) FROM exam_results WHERE exam_id = :exam_id"),
-            {"exam_id": exam_id}
-        ).scalar() or 0
-        
-        # 分数统计
-        score_stats = db.session.execute(
-            text("""
-                SELECT 
-                    AVG(score) as avg_score,
-                    MIN(score) as min_score,
-                    MAX(score) as max_score,
-                    COUNT(*) as total_submissions
-                FROM exam_results 
-                WHERE exam_id = :exam_id
-            """),
-            {"exam_id": exam_id}
-        ).fetchone()
-        
-        # 分数分布
-        score_distribution = db.session.execute(
-            text("""
-                SELECT 
-                    CASE 
-                        WHEN score >= 90 THEN '优秀(90-100)'
-                        WHEN score >= 80 THEN '良好(80-89)'
-                        WHEN score >= 70 THEN '中等(70-79)'
-                        WHEN score >= 60 THEN '及格(60-69)'
-                        ELSE '不及格(0-59)'
-                    END as grade_range,
-                    COUNT(*) as count
-                FROM exam_results 
-                WHERE exam_id = :exam_id
-                GROUP BY 
-                    CASE 
-                        WHEN score >= 90 THEN '优秀(90-100)'
-                        WHEN score >= 80 THEN '良好(80-89)'
-                        WHEN score >= 70 THEN '中等(70-79)'
-                        WHEN score >= 60 THEN '及格(60-69)'
-                        ELSE '不及格(0-59)'
-                    END
-                ORDER BY MIN(score) DESC
-            """),
-            {"exam_id": exam_id}
-        ).fetchall()
-        
-        # 题目正确率统计
-        question_stats = db.session.execute(
-            text("""
-                SELECT 
-                    q.id,
-                    q.question_text,
-                    q.question_type,
-                    COUNT(CASE WHEN era.is_correct = 1 THEN 1 END) as correct_count,
-                    COUNT(*) as total_count,
-                    ROUND(COUNT(CASE WHEN era.is_correct = 1 THEN 1 END) * 100.0 / COUNT(*), 2) as accuracy_rate
-                FROM questions q
-                JOIN exam_questions eq ON q.id = eq.question_id
-                LEFT JOIN exam_result_answers era ON q.id = era.question_id
-                LEFT JOIN exam_results er ON era.exam_result_id = er.id
-                WHERE eq.exam_id = :exam_id AND (er.exam_id = :exam_id OR er.exam_id IS NULL)
-                GROUP BY q.id, q.question_text, q.question_type
-                ORDER BY accuracy_rate ASC
-            """),
-            {"exam_id": exam_id}
-        ).fetchall()
-        
+        exam = db.session.get(Exam, exam_id)
+        if not exam:
+            return jsonify({'success': False, 'message': '考试不存在'}), 404
+
+        summary = aq.exam_summary(exam_id)
+        questions = aq.question_accuracy(exam_id)
+
         return jsonify({
             'success': True,
             'statistics': {
                 'exam_info': {
                     'title': exam.title,
-                    'total_questions': len(exam.questions),
+                    'total_questions': aq.paper_sizes([exam_id]).get(exam_id, 0),
                     'duration_minutes': exam.duration_minutes
                 },
                 'participation': {
-                    'total_participants': total_participants,
-                    'total_submissions': score_stats.total_submissions if score_stats else 0
+                    # 每个学生每场考试只能提交一次，人数即提交数
+                    'total_participants': summary['attempts'],
+                    'total_submissions': summary['attempts']
                 },
                 'score_summary': {
-                    'average_score': round(score_stats.avg_score, 2) if score_stats and score_stats.avg_score else 0,
-                    'min_score': score_stats.min_score if score_stats else 0,
-                    'max_score': score_stats.max_score if score_stats else 0
+                    'average_score': round(summary['avg_score'], 2),
+                    'min_score': summary['min_score'],
+                    'max_score': summary['max_score']
                 },
                 'score_distribution': [
-                    {'grade_range': row.grade_range, 'count': row.count}
-                    for row in score_distribution
+                    {'grade_range': GRADE_LABELS.get(b['range'], b['range']), 'count': b['count']}
+                    for b in reversed(summary['score_buckets']) if b['count']
                 ],
                 'question_analysis': [
-                    {
-                        'question_id': row.id,
-                        'question_text': row.question_text[:50] + '...' if len(row.question_text) > 50 else row.question_text,
-                        'question_type': row.question_type,
-                        'correct_count': row.correct_count,
-                        'total_count': row.total_count,
-                        'accuracy_rate': row.accuracy_rate
-                    }
-                    for row in question_stats
+                    {**q, 'question_text': _truncate(q['question_text'], 50)}
+                    for q in questions
                 ]
             }
         })
-        
+
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
-@analytics_bp.route('/api/analytics/teacher/overview', methods=['GET'])
+@analytics_bp.route('/analytics/report/teacher/overview', methods=['GET'])
 def get_teacher_overview():
     """获取教师总览统计"""
     try:
-        # 这里应该根据当前登录的教师ID来筛选
-        # 为了演示，我们使用所有数据
-        
-        # 考试统计
-        total_exams = Exam.query.count()
-        active_exams = Exam.query.filter_by(status='active').count()
-        
-        # 题目统计
-        total_questions = Question.query.count()
-        question_types = db.session.execute(
-            text("""
-                SELECT question_type, COUNT(*) as count
-                FROM questions
-                GROUP BY question_type
-            """)
-        ).fetchall()
-        
-        # 学生参与统计
-        total_students = User.query.filter_by(role='STUDENT').count()
-        
-        # 最近考试活动
-        recent_results = db.session.execute(
-            text("""
-                SELECT 
-                    e.title as exam_title,
-                    u.full_name as student_name,
-                    er.score,
-                    er.submitted_at
-                FROM exam_results er
-                JOIN exams e ON er.exam_id = e.id
-                JOIN users u ON er.user_id = u.id
-                ORDER BY er.submitted_at DESC
-                LIMIT 10
-            """)
-        ).fetchall()
-        
+        overview = aq.teacher_overview()
+        by_type = aq.question_type_counts()
+
         return jsonify({
             'success': True,
             'overview': {
                 'exam_stats': {
-                    'total_exams': total_exams,
-                    'active_exams': active_exams,
-                    'inactive_exams': total_exams - active_exams
+                    'total_exams': overview['total_exams'],
+                    'active_exams': overview['active_exams'],
+                    'inactive_exams': overview['total_exams'] - overview['active_exams']
                 },
                 'question_stats': {
-                    'total_questions': total_questions,
-                    'by_type': [
-                        {'type': row.question_type, 'count': row.count}
-                        for row in question_types
-                    ]
+                    'total_questions': sum(row['count'] for row in by_type),
+                    'by_type': by_type
                 },
                 'student_stats': {
-                    'total_students': total_students
+                    'total_students': overview['total_participants']
                 },
                 'recent_activity': [
                     {
-                        'exam_title': row.exam_title,
-                        'student_name': row.student_name,
-                        'score': row.score,
-                        'submitted_at': row.submitted_at.strftime('%Y-%m-%d %H:%M:%S') if row.submitted_at else None
+                        'exam_title': row['exam_title'],
+                        # 学生以工号登录，提交记录中只有工号
+                        'student_name': row['student_id'],
+                        'score': row['score'],
+                        'submitted_at': row['submitted_at']
                     }
-                    for row in recent_results
+                    for row in aq.recent_activity()
                 ]
             }
         })
-        
+
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
-@analytics_bp.route('/api/analytics/student/<int:student_id>/performance', methods=['GET'])
+@analytics_bp.route('/analytics/student/<student_id>/performance', methods=['GET'])
 def get_student_performance(student_id):
-    """获取学生个人成绩分析"""
+    """
+    获取学生个人成绩分析（student_id 为学生登录用的工号）；学生只能查看自己，教师可查看任意学生。
+    考试记录按 ?limit=&offset= 分页（总数为 summary.total_exams），概况与趋势来自学生汇总行
+    """
+    denied = _check_student_access(student_id)
+    if denied:
+        return denied
+    try:
+        limit, offset = _page_args(HISTORY_PAGE_SIZE, HISTORY_MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'success': False, 'message': '无效的分页参数'}), 400
+
     try:
-        student = User.query.get_or_404(student_id)
-        
-        # 学生考试历史
-        exam_history = db.session.execute(
-            text("""
-                SELECT 
-                    e.title as exam_title,
-                    er.score,
-                    er.submitted_at,
-                    e.duration_minutes,
-                    (SELECT COUNT(*) FROM exam_questions WHERE exam_id = e.id) as total_questions
-                FROM exam_results er
-                JOIN exams e ON er.exam_id = e.id
-                WHERE er.user_id = :student_id
-                ORDER BY er.submitted_at DESC
-            """),
-            {"student_id": student_id}
-        ).fetchall()
-        
-        # 成绩趋势
-        scores = [row.score for row in exam_history]
-        avg_score = sum(scores) / len(scores) if scores else 0
-        
-        # 错题分析
-        wrong_questions = db.session.execute(
-            text("""
-                SELECT 
-                    q.question_text,
-                    q.question_type,
-                    q.correct_answer,
-                    era.student_answer,
-                    e.title as exam_title
-                FROM exam_result_answers era
-                JOIN exam_results er ON era.exam_result_id = er.id
-                JOIN questions q ON era.question_id = q.id
-                JOIN exams e ON er.exam_id = e.id
-                WHERE er.user_id = :student_id AND era.is_correct = 0
-                ORDER BY er.submitted_at DESC
-                LIMIT 20
-            """),
-            {"student_id": student_id}
-        ).fetchall()
-        
+        perf = aq.student_history(student_id, limit=limit, offset=offset)
+        if not perf['summary']['total_exams']:
+            return jsonify({'success': False, 'message': '该学生暂无提交记录'}), 404
+
         return jsonify({
             'success': True,
             'performance': {
                 'student_info': {
-                    'name': student.full_name,
-                    'username': student.username
-                },
-                'summary': {
-                    'total_exams': len(exam_history),
-                    'average_score': round(avg_score, 2),
-                    'highest_score': max(scores) if scores else 0,
-                    'lowest_score': min(scores) if scores else 0
+                    'name': None,
+                    'username': student_id
                 },
+                'summary': perf['summary'],
+                # 最近若干次成绩（旧到新），来自交卷时维护的学生汇总
+                'trend': perf['trend'],
                 'exam_history': [
-                    {
-                        'exam_title': row.exam_title,
-                        'score': row.score,
-                        'submitted_at': row.submitted_at.strftime('%Y-%m-%d %H:%M:%S') if row.submitted_at else None,
-                        'duration_minutes': row.duration_minutes,
-                        'total_questions': row.total_questions
-                    }
-                    for row in exam_history
+                    {k: row[k] for k in ('exam_title', 'score', 'submitted_at', 'duration_minutes', 'total_questions')}
+                    for row in perf['history']
                 ],
                 'wrong_questions': [
-                    {
-                        'question_text': row.question_text[:100] + '...' if len(row.question_text) > 100 else row.question_text,
-                        'question_type': row.question_type,
-                        'correct_answer': row.correct_answer,
-                        'student_answer': row.student_answer,
-                        'exam_title': row.exam_title
-                    }
-                    for row in wrong_questions
+                    {**row, 'question_text': _truncate(row['question_text'], 100)}
+                    for row in aq.student_wrong_questions(student_id)
                 ]
             }
         })
-        
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@analytics_bp.route('/analytics/student/<student_id>/mistakes', methods=['GET'])
+def get_student_mistakes(student_id):
+    """错题本：每道答错过的题一行（含答错次数），最近答错的在前；?limit=&offset= 分页"""
+    denied = _check_student_access(student_id)
+    if denied:
+        return denied
+    try:
+        limit, offset = _page_args(MISTAKES_PAGE_SIZE, MISTAKES_MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'success': False, 'message': '无效的分页参数'}), 400
+
+    try:
+        return jsonify({
+            'success': True,
+            'total': aq.student_wrong_count(student_id),
+            'mistakes': aq.student_wrong_questions(student_id, limit=limit, offset=offset)
+        })
+
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
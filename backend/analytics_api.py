@@ -1,110 +1,262 @@
-# backend/analytics_api.py
-from flask import Blueprint, jsonify
-from sqlalchemy import func
-from datetime import datetime
-from models import db, Exam, ExamAttempt, StudentAnswer, Question
-
-analytics_bp = Blueprint("analytics_api", __name__)
-
-@analytics_bp.get("/analytics/teacher/overview")
-def teacher_overview():
-    total_exams = db.session.query(func.count(Exam.id)).scalar() or 0
-    total_participants = db.session.query(func.count(func.distinct(ExamAttempt.student_id))).scalar() or 0
-    avg_score = float(db.session.query(func.coalesce(func.avg(ExamAttempt.final_score), 0)).scalar() or 0)
-    max_score = float(db.session.query(func.coalesce(func.max(ExamAttempt.final_score), 0)).scalar() or 0)
-
-    ranges = [(0,59), (60,69), (70,79), (80,89), (90,100)]
-    buckets = []
-    for lo, hi in ranges:
-        cnt = db.session.query(func.count(ExamAttempt.id))\
-            .filter(ExamAttempt.final_score >= lo, ExamAttempt.final_score <= hi).scalar() or 0
-        buckets.append({"range": f"{lo}-{hi}", "count": int(cnt)})
-
-    exams = db.session.query(Exam).order_by(Exam.id.desc()).all()
-    exam_rows = []
-    for e in exams:
-        q = db.session.query(
-            func.count(ExamAttempt.id),
-            func.coalesce(func.avg(ExamAttempt.final_score), 0),
-            func.coalesce(func.max(ExamAttempt.final_score), 0),
-        ).filter(ExamAttempt.exam_id == e.id).one()
-        exam_rows.append({
-            "id": e.id,
-            "title": e.title,
-            "attempts": int(q[0] or 0),
-            "avg_score": float(q[1] or 0),
-            "max_score": float(q[2] or 0),
-        })
-
-    return jsonify({
-        "success": True,
-        "data": {
-            "total_exams": int(total_exams),
-            "total_participants": int(total_participants),
-            "avg_score": round(avg_score, 1),
-            "max_score": int(max_score),
-            "score_buckets": buckets,
-            "exams": exam_rows
-        }
-    })
-
-# 提交明细：学生姓名 + 工号（从 ExamAttempt.student_name / employee_no 字段读取，若不存在安全回退）
-@analytics_bp.get("/analytics/exam/<int:exam_id>/submissions")
-def exam_submissions(exam_id: int):
-    exam = Exam.query.get(exam_id)
-    if not exam:
-        return jsonify({"success": False, "message": "考试不存在"}), 404
-
-    attempts = ExamAttempt.query.filter_by(exam_id=exam_id)\
-        .order_by(ExamAttempt.submit_time.desc().nullslast()).all()
-
-    out = []
-    for a in attempts:
-        out.append({
-            "attempt_id": a.id,
-            "student_id": a.student_id,  # 兼容旧字段
-            "student_name": getattr(a, "student_name", None) or "",   # 新增显示：学生姓名
-            "employee_no": getattr(a, "employee_no", None) or "",     # 新增显示：工号
-            "final_score": float(a.final_score or 0),
-            "submit_time": (a.submit_time.isoformat(timespec="seconds") if isinstance(a.submit_time, datetime) else None),
-            "switch_count": int(a.switch_count or 0),
-        })
-
-    return jsonify({"success": True, "exam": {"id": exam.id, "title": exam.title}, "submissions": out})
-
-# 单份提交的“答题明细”
-@analytics_bp.get("/analytics/attempt/<int:attempt_id>/answers")
-def attempt_answers(attempt_id: int):
-    attempt = ExamAttempt.query.get(attempt_id)
-    if not attempt:
-        return jsonify({"success": False, "message": "提交不存在"}), 404
-
-    q_map = {q.id: q for q in Question.query.all()}
-    rows = StudentAnswer.query.filter_by(attempt_id=attempt_id).all()
-    items = []
-    for ans in rows:
-        q = q_map.get(ans.question_id)
-        items.append({
-            "question_id": ans.question_id,
-            "question_text": (q.question_text if q else ""),
-            "question_type": (q.question_type if q else ""),
-            "options": (q.options if q else None),
-            "correct_answer": (q.correct_answer if q else None),
-            "student_answer": ans.student_answer,
-            "is_correct": bool(ans.is_correct),
-            "score": getattr(ans, "score", None),
-        })
-
-    return jsonify({
-        "success": True,
-        "attempt": {
-            "id": attempt.id,
-            "exam_id": attempt.exam_id,
-            "student_id": attempt.student_id,
-            "student_name": getattr(attempt, "student_name", None) or "",
-            "employee_no": getattr(attempt, "employee_no", None) or "",
-            "final_score": float(attempt.final_score or 0),
-            "submit_time": (attempt.submit_time.isoformat(timespec="seconds") if isinstance(attempt.submit_time, datetime) else None),
-        },
-        "answers": items
-    })
+# backend/analytics_api.py
+from flask import Blueprint, jsonify, request, Response, stream_with_context
+from sqlalchemy import func, tuple_, type_coerce, literal_column, String
+from datetime import datetime
+from collections import OrderedDict
+import base64, json, threading
+from models import db, Exam, ExamAttempt, StudentAnswer, Question, ExamStats
+import analytics_queries as aq
+from item_analysis import analyze_exam_items
+from result_export import (
+    EXPORT_FORMATS, SUBMISSION_HEADER, iter_submission_rows, exam_question_ids,
+    iter_answer_matrix_rows, answer_matrix_header, stream_csv, stream_xlsx,
+)
+
+analytics_bp = Blueprint("analytics_api", __name__)
+
+@analytics_bp.get("/analytics/teacher/overview")
+def teacher_overview():
+    return jsonify({"success": True, "data": aq.teacher_overview()})
+
+# 单场考试统计：读取增量统计表
+@analytics_bp.get("/analytics/exam/<int:exam_id>/stats")
+def exam_stats(exam_id: int):
+    exam = Exam.query.get(exam_id)
+    if not exam:
+        return jsonify({"success": False, "message": "考试不存在"}), 404
+    return jsonify({
+        "success": True,
+        "exam": {"id": exam.id, "title": exam.title},
+        "stats": {**aq.exam_summary(exam_id), "questions": aq.question_accuracy(exam_id)},
+    })
+
+# 题目分析：难度 / 区分度 / 干扰项，按考试版本缓存（计算结果不含题干，题干每次按 id 取当前值）
+@analytics_bp.get("/analytics/exam/<int:exam_id>/items")
+def exam_item_analysis(exam_id: int):
+    exam = Exam.query.get(exam_id)
+    if not exam:
+        return jsonify({"success": False, "message": "考试不存在"}), 404
+    result = analyze_exam_items(exam_id)
+    texts = dict(db.session.query(Question.id, Question.question_text)
+                 .filter(Question.id.in_([it["question_id"] for it in result["items"]])))
+    return jsonify({
+        "success": True,
+        "exam": {"id": exam.id, "title": exam.title},
+        "attempts": result["attempts"],
+        "kr20": result["kr20"],
+        "items": [{**it, "question_text": texts.get(it["question_id"], "")} for it in result["items"]],
+    })
+
+# 提交明细：按 (排序键, id) 做 keyset 分页，翻页代价与页码无关。
+# 可空列包一层 coalesce（常量须内联，才能命中 models.ExamAttempt 上的表达式索引）：
+# 否则 NULL 行的 (列, id) 与游标比较结果为 NULL，这些行永远翻不到；提交时间按库中原样字符串比较
+SUBMISSION_SORTS = {
+    "submit_time": func.coalesce(type_coerce(ExamAttempt.submit_time, String), literal_column("''")),
+    "score": ExamAttempt.final_score,   # 非空
+    "switch_count": func.coalesce(ExamAttempt.switch_count, literal_column("0")),
+}
+SUBMISSIONS_PAGE_SIZE = 50
+SUBMISSIONS_MAX_PAGE_SIZE = 500
+
+def _encode_cursor(value, attempt_id):
+    raw = json.dumps([value, attempt_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor, sort):
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    value, attempt_id = json.loads(raw)
+    if not isinstance(value, (str, int, float)) or isinstance(value, bool) or \
+            isinstance(value, str) != (sort == "submit_time"):
+        raise ValueError("cursor")
+    return value, int(attempt_id)
+
+def _float_arg(name):
+    v = request.args.get(name)
+    return float(v) if v not in (None, "") else None
+
+@analytics_bp.get("/analytics/exam/<int:exam_id>/submissions")
+def exam_submissions(exam_id: int):
+    """
+    查询参数：limit（默认 50，最多 500）、cursor（上一页返回的 next_cursor）、
+    sort=submit_time|score|switch_count、order=desc|asc、min_score / max_score、over_limit=1（切屏超过考试限制）
+    """
+    exam = Exam.query.get(exam_id)
+    if not exam:
+        return jsonify({"success": False, "message": "考试不存在"}), 404
+
+    sort = request.args.get("sort") or "submit_time"
+    order = (request.args.get("order") or "desc").lower()
+    if sort not in SUBMISSION_SORTS or order not in ("asc", "desc"):
+        return jsonify({"success": False, "message": "无效的排序参数"}), 400
+    try:
+        limit = min(max(int(request.args.get("limit") or SUBMISSIONS_PAGE_SIZE), 1), SUBMISSIONS_MAX_PAGE_SIZE)
+        min_score, max_score = _float_arg("min_score"), _float_arg("max_score")
+        cursor = _decode_cursor(request.args["cursor"], sort) if request.args.get("cursor") else None
+    except (ValueError, TypeError):
+        return jsonify({"success": False, "message": "无效的分页或筛选参数"}), 400
+    over_limit = request.args.get("over_limit") in ("1", "true")
+
+    col = SUBMISSION_SORTS[sort]
+    q = db.session.query(ExamAttempt.id, ExamAttempt.student_id, ExamAttempt.final_score,
+                         ExamAttempt.submit_time, ExamAttempt.switch_count, col.label("sort_key"))\
+        .filter(ExamAttempt.exam_id == exam_id)
+    if min_score is not None:
+        q = q.filter(ExamAttempt.final_score >= min_score)
+    if max_score is not None:
+        q = q.filter(ExamAttempt.final_score <= max_score)
+    if over_limit:
+        q = q.filter(ExamAttempt.switch_count > (exam.switch_limit or 0))
+
+    # 总数：无筛选时直接读增量统计表，有筛选时走 (exam_id, 列) 索引做 COUNT
+    if min_score is None and max_score is None and not over_limit:
+        st = db.session.get(ExamStats, exam_id)
+        total = int(st.attempt_count) if st else 0
+    else:
+        total = q.with_entities(func.count(ExamAttempt.id)).scalar() or 0
+
+    key = tuple_(col, ExamAttempt.id)
+    if cursor is not None:
+        q = q.filter(key < tuple_(*cursor) if order == "desc" else key > tuple_(*cursor))
+    if order == "desc":
+        q = q.order_by(col.desc(), ExamAttempt.id.desc())
+    else:
+        q = q.order_by(col.asc(), ExamAttempt.id.asc())
+    rows = q.limit(limit + 1).all()
+
+    out = []
+    for aid, sid, score, submit_time, switch_count, _ in rows[:limit]:
+        out.append({
+            "attempt_id": aid,
+            "student_id": sid,  # 兼容旧字段
+            "student_name": "",   # 提交记录不含姓名/工号列，前端回退显示 student_id
+            "employee_no": "",
+            "final_score": float(score or 0),
+            "submit_time": (submit_time.isoformat(timespec="seconds") if isinstance(submit_time, datetime) else None),
+            "switch_count": int(switch_count or 0),
+        })
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = _encode_cursor(last.sort_key, last.id)
+
+    return jsonify({
+        "success": True,
+        "exam": {"id": exam.id, "title": exam.title, "switch_limit": int(exam.switch_limit or 0)},
+        "submissions": out,
+        "total": int(total),
+        "next_cursor": next_cursor,
+    })
+
+# ---------- 导出：流式输出，内存占用与提交数无关 ----------
+_EXPORT_MIMETYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+def _export_response(exam_id, kind, header, rows):
+    fmt = (request.args.get("format") or "csv").lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"success": False, "message": f"不支持的导出格式：{fmt}（可选：{', '.join(EXPORT_FORMATS)}）"}), 400
+    body = stream_csv(header, rows) if fmt == "csv" else stream_xlsx(header, rows, sheet_title=kind)
+    return Response(
+        stream_with_context(body),
+        mimetype=_EXPORT_MIMETYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="exam_{exam_id}_{kind}.{fmt}"'},
+    )
+
+# 提交明细导出：?format=csv|xlsx
+@analytics_bp.get("/analytics/exam/<int:exam_id>/export/submissions")
+def export_submissions(exam_id: int):
+    if not db.session.get(Exam, exam_id):
+        return jsonify({"success": False, "message": "考试不存在"}), 404
+    return _export_response(exam_id, "submissions", SUBMISSION_HEADER, iter_submission_rows(exam_id))
+
+# 答题矩阵导出（学生 × 题目，1 对 0 错，空为未作答）：?format=csv|xlsx
+@analytics_bp.get("/analytics/exam/<int:exam_id>/export/answers")
+def export_answer_matrix(exam_id: int):
+    if not db.session.get(Exam, exam_id):
+        return jsonify({"success": False, "message": "考试不存在"}), 404
+    qids = exam_question_ids(exam_id)
+    return _export_response(exam_id, "answers", answer_matrix_header(qids), iter_answer_matrix_rows(exam_id, qids))
+
+# 按考试缓存的题目投影：exam_id -> {qid: (题干, 题型, 选项, 正确答案)}，
+# 教师逐份翻看同一场考试的答卷时不再重复读取题目
+# 多线程下的写入与淘汰都在锁内进行；缓存的投影不再原地修改，补取题目时换成新字典
+PROJECTION_CACHE_SIZE = 128
+_question_projection = OrderedDict()
+_projection_lock = threading.Lock()
+
+def _cache_projection(exam_id, proj):
+    with _projection_lock:
+        _question_projection[exam_id] = proj
+        _question_projection.move_to_end(exam_id)
+        while len(_question_projection) > PROJECTION_CACHE_SIZE:
+            _question_projection.popitem(last=False)
+
+def invalidate_question_projection(question_id=None):
+    """题目修改/删除后调用；question_id 为空时清空全部"""
+    with _projection_lock:
+        if question_id is None:
+            _question_projection.clear()
+            return
+        for exam_id in [eid for eid, proj in _question_projection.items() if question_id in proj]:
+            _question_projection.pop(exam_id, None)
+
+# 单份提交的“答题明细”
+@analytics_bp.get("/analytics/attempt/<int:attempt_id>/answers")
+def attempt_answers(attempt_id: int):
+    attempt = ExamAttempt.query.get(attempt_id)
+    if not attempt:
+        return jsonify({"success": False, "message": "提交不存在"}), 404
+
+    proj = _question_projection.get(attempt.exam_id)
+    if proj is None:
+        # 首次查看该场考试：答题记录与所涉题目一次 JOIN 取回，并缓存题目投影
+        rows = db.session.query(
+            StudentAnswer.question_id, StudentAnswer.student_answer, StudentAnswer.is_correct,
+            Question.question_text, Question.question_type, Question.options, Question.correct_answer,
+        ).outerjoin(Question, Question.id == StudentAnswer.question_id)\
+            .filter(StudentAnswer.attempt_id == attempt_id).order_by(StudentAnswer.id).all()
+        proj = {r.question_id: (r.question_text, r.question_type, r.options, r.correct_answer)
+                for r in rows if r.question_text is not None}
+        _cache_projection(attempt.exam_id, proj)
+        answers = [(r.question_id, r.student_answer, r.is_correct) for r in rows]
+    else:
+        answers = db.session.query(StudentAnswer.question_id, StudentAnswer.student_answer, StudentAnswer.is_correct)\
+            .filter(StudentAnswer.attempt_id == attempt_id).order_by(StudentAnswer.id).all()
+        missing = {qid for qid, _, _ in answers if qid not in proj}
+        if missing:
+            # 试卷编辑过：补取缺失的题目
+            proj = {**proj, **{r.id: (r.question_text, r.question_type, r.options, r.correct_answer)
+                               for r in db.session.query(Question.id, Question.question_text, Question.question_type,
+                                                         Question.options, Question.correct_answer)
+                               .filter(Question.id.in_(missing))}}
+            _cache_projection(attempt.exam_id, proj)
+
+    items = []
+    for qid, stu_ans, is_correct in answers:
+        text, q_type, options, correct = proj.get(qid, ("", "", None, None))
+        items.append({
+            "question_id": qid,
+            "question_text": text,
+            "question_type": q_type,
+            "options": options,
+            "correct_answer": correct,
+            "student_answer": stu_ans,
+            "is_correct": bool(is_correct),
+            "score": None,
+        })
+
+    return jsonify({
+        "success": True,
+        "attempt": {
+            "id": attempt.id,
+            "exam_id": attempt.exam_id,
+            "student_id": attempt.student_id,
+            "student_name": getattr(attempt, "student_name", None) or "",
+            "employee_no": getattr(attempt, "employee_no", None) or "",
+            "final_score": float(attempt.final_score or 0),
+            "submit_time": (attempt.submit_time.isoformat(timespec="seconds") if isinstance(attempt.submit_time, datetime) else None),
+        },
+        "answers": items
+    })
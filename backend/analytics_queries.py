@@ -0,0 +1,262 @@
+# backend/analytics_queries.py
+# 统计查询层：analytics_api（前端仪表盘）与 analytics（报表接口）共用，只读 exam_attempts / student_answers
+# 及交卷时增量维护的 exam_stats / question_stats / student_stats / student_wrong_questions。
+# 语句在模块加载时构造一次、以 bindparam 传参，SQLAlchemy 按语句缓存编译结果；
+# 每类统计一条分组查询，结果按 ANALYTICS_TTL_SECONDS 短时缓存，多个接口命中同一份结果。
+import threading
+import time
+
+from sqlalchemy import select, func, bindparam
+
+from models import (
+    db, Exam, ExamStatus, ExamQuestion, ExamAttempt, Question, ExamStats, QuestionStats,
+    StudentStats, StudentWrongQuestion,
+)
+from exam_stats import SCORE_RANGES, BUCKET_COLUMNS, exam_stats_row
+
+ANALYTICS_TTL_SECONDS = 5
+RECENT_ACTIVITY_LIMIT = 10
+WRONG_QUESTIONS_LIMIT = 20
+HISTORY_LIMIT = 20
+
+# ---------- 共享短时缓存 ----------
+
+_cache = {}   # key -> (过期时间, 结果)
+_cache_lock = threading.Lock()
+
+def cached(key, fn, ttl=ANALYTICS_TTL_SECONDS):
+    now = time.monotonic()
+    hit = _cache.get(key)
+    if hit and hit[0] > now:
+        return hit[1]
+    data = fn()
+    with _cache_lock:
+        _cache[key] = (now + ttl, data)
+        # 顺带清理过期项，避免按学生/考试的键无限增长
+        if len(_cache) > 1024:
+            for k in [k for k, (exp, _) in _cache.items() if exp <= now]:
+                _cache.pop(k, None)
+    return data
+
+def invalidate_analytics_cache():
+    with _cache_lock:
+        _cache.clear()
+
+# ---------- 预编译语句 ----------
+
+_EXAM_STATS = select(ExamStats).where(ExamStats.exam_id == bindparam("exam_id"))
+
+_QUESTION_ACCURACY = (
+    select(QuestionStats.question_id, Question.question_text, Question.question_type,
+           QuestionStats.correct_count, QuestionStats.total_count)
+    .join(Question, Question.id == QuestionStats.question_id)
+    .where(QuestionStats.exam_id == bindparam("exam_id"))
+)
+
+# 每份试卷的题数：共有题（variant_no = 0）+ 第 1 份的独有题（同一 random_config 生成的各份题数相同）
+_PAPER_SIZES = (
+    select(ExamQuestion.exam_id, func.count(ExamQuestion.id).label("n"))
+    .where(ExamQuestion.exam_id.in_(bindparam("exam_ids", expanding=True)), ExamQuestion.variant_no <= 1)
+    .group_by(ExamQuestion.exam_id)
+)
+
+_OVERVIEW_EXAMS = (
+    select(Exam.id, Exam.title, Exam.status, ExamStats)
+    .outerjoin(ExamStats, ExamStats.exam_id == Exam.id)
+    .order_by(Exam.id.desc())
+)
+
+_PARTICIPANT_COUNT = select(func.count()).select_from(StudentStats)
+
+_QUESTION_TYPES = select(Question.question_type, func.count(Question.id)).group_by(Question.question_type)
+
+# 提交 id 随时间递增，按主键倒序即最近的提交
+_RECENT_ATTEMPTS = (
+    select(ExamAttempt.id, ExamAttempt.student_id, ExamAttempt.final_score, ExamAttempt.submit_time, Exam.title)
+    .join(Exam, Exam.id == ExamAttempt.exam_id)
+    .order_by(ExamAttempt.id.desc())
+    .limit(bindparam("limit"))
+)
+
+# 走 ix_exam_attempts_student_time (student_id, submit_time, id) 倒序扫描，读取量与 limit + offset 相当
+_STUDENT_ATTEMPTS = (
+    select(ExamAttempt.id, ExamAttempt.exam_id, ExamAttempt.final_score, ExamAttempt.submit_time,
+           Exam.title, Exam.duration_minutes)
+    .join(Exam, Exam.id == ExamAttempt.exam_id)
+    .where(ExamAttempt.student_id == bindparam("student_id"))
+    .order_by(ExamAttempt.submit_time.desc(), ExamAttempt.id.desc())
+    .limit(bindparam("limit"))
+    .offset(bindparam("offset"))
+)
+
+_STUDENT_STATS = select(StudentStats).where(StudentStats.student_id == bindparam("student_id"))
+
+_EXAM_TITLES = select(Exam.id, Exam.title).where(Exam.id.in_(bindparam("exam_ids", expanding=True)))
+
+# 走 ix_student_wrong_questions_student_time，读取量与 limit 相当
+_STUDENT_WRONG = (
+    select(StudentWrongQuestion.question_id, Question.question_text, Question.question_type, Question.correct_answer,
+           StudentWrongQuestion.last_answer, StudentWrongQuestion.wrong_count, StudentWrongQuestion.last_wrong_time,
+           Exam.title)
+    .join(Question, Question.id == StudentWrongQuestion.question_id)
+    .outerjoin(Exam, Exam.id == StudentWrongQuestion.last_exam_id)
+    .where(StudentWrongQuestion.student_id == bindparam("student_id"))
+    .order_by(StudentWrongQuestion.last_wrong_time.desc(), StudentWrongQuestion.question_id.desc())
+    .limit(bindparam("limit"))
+    .offset(bindparam("offset"))
+)
+
+_STUDENT_WRONG_COUNT = (
+    select(func.count()).select_from(StudentWrongQuestion)
+    .where(StudentWrongQuestion.student_id == bindparam("student_id"))
+)
+
+def _iso(t):
+    return t.isoformat(timespec="seconds") if t else None
+
+# ---------- 单场考试 ----------
+
+def exam_summary(exam_id):
+    """成绩概况 + 分数段分布：读增量统计表一行"""
+    def build():
+        st = db.session.execute(_EXAM_STATS, {"exam_id": exam_id}).scalar()
+        return {
+            **exam_stats_row(st),
+            "score_buckets": [{"range": f"{lo}-{hi}", "count": int(getattr(st, col) or 0) if st else 0}
+                              for (lo, hi), col in zip(SCORE_RANGES, BUCKET_COLUMNS)],
+        }
+    return cached(("exam_summary", exam_id), build)
+
+def question_accuracy(exam_id):
+    """各题正确率，按正确率升序（最难的在前）"""
+    def build():
+        rows = [{
+            "question_id": qid,
+            "question_text": text,
+            "question_type": q_type,
+            "correct_count": int(correct),
+            "total_count": int(total),
+            "accuracy_rate": round(correct * 100.0 / total, 2) if total else 0.0,
+        } for qid, text, q_type, correct, total in db.session.execute(_QUESTION_ACCURACY, {"exam_id": exam_id})]
+        rows.sort(key=lambda r: r["accuracy_rate"])
+        return rows
+    return cached(("question_accuracy", exam_id), build)
+
+def paper_sizes(exam_ids):
+    """{exam_id: 每份试卷题数}，一条分组查询"""
+    if not exam_ids:
+        return {}
+    return dict(db.session.execute(_PAPER_SIZES, {"exam_ids": list(exam_ids)}).all())
+
+# ---------- 教师总览 ----------
+
+def teacher_overview():
+    """每场考试一行的增量统计表汇总，读取量与提交数无关；两个总览接口共用"""
+    def build():
+        exam_rows = []
+        bucket_counts = [0] * len(SCORE_RANGES)
+        attempts, score_sum, max_score, active = 0, 0.0, 0.0, 0
+        for eid, title, status, st in db.session.execute(_OVERVIEW_EXAMS):
+            stat = exam_stats_row(st)
+            exam_rows.append({
+                "id": eid,
+                "title": title,
+                "attempts": stat["attempts"],
+                "avg_score": stat["avg_score"],
+                "max_score": stat["max_score"],
+            })
+            active += status == ExamStatus.ACTIVE
+            if st and st.attempt_count:
+                attempts += st.attempt_count
+                score_sum += st.score_sum
+                max_score = max(max_score, float(st.max_score or 0))
+                for i, col in enumerate(BUCKET_COLUMNS):
+                    bucket_counts[i] += getattr(st, col) or 0
+
+        # 跨考试去重的人数无法由单场统计相加得到：学生汇总表每个交过卷的学生一行，计行数即可
+        total_participants = db.session.execute(_PARTICIPANT_COUNT).scalar() or 0
+
+        return {
+            "total_exams": len(exam_rows),
+            "active_exams": int(active),
+            "total_participants": int(total_participants),
+            "total_attempts": int(attempts),
+            "avg_score": round(score_sum / attempts if attempts else 0.0, 1),
+            "max_score": int(max_score),
+            "score_buckets": [{"range": f"{lo}-{hi}", "count": int(c)} for (lo, hi), c in zip(SCORE_RANGES, bucket_counts)],
+            "exams": exam_rows,
+        }
+    return cached("teacher_overview", build)
+
+def question_type_counts():
+    return cached("question_types", lambda: [
+        {"type": t, "count": int(n)} for t, n in db.session.execute(_QUESTION_TYPES)
+    ])
+
+def recent_activity(limit=RECENT_ACTIVITY_LIMIT):
+    return cached(("recent_activity", limit), lambda: [{
+        "attempt_id": aid,
+        "exam_title": title,
+        "student_id": str(sid),
+        "score": float(score or 0),
+        "submitted_at": _iso(submit_time),
+    } for aid, sid, score, submit_time, title in db.session.execute(_RECENT_ATTEMPTS, {"limit": limit})])
+
+# ---------- 学生个人 ----------
+# 均为按学生的主键/索引查找，读取量只与结果大小有关；不走短时缓存，交卷后立即可见
+
+def student_summary(student_id):
+    """成绩概况 + 最近成绩趋势：读 student_stats 一行"""
+    st = db.session.execute(_STUDENT_STATS, {"student_id": str(student_id)}).scalar()
+    if not st or not st.exam_count:
+        return {"total_exams": 0, "average_score": 0, "highest_score": 0, "lowest_score": 0}, []
+    recent = st.recent_scores or []
+    titles = dict(db.session.execute(_EXAM_TITLES, {"exam_ids": list({e[0] for e in recent})}).all()) if recent else {}
+    summary = {
+        "total_exams": int(st.exam_count),
+        "average_score": round(st.score_sum / st.exam_count, 2),
+        "highest_score": float(st.best_score or 0),
+        "lowest_score": float(st.worst_score or 0),
+    }
+    trend = [{"exam_id": eid, "exam_title": titles.get(eid), "score": float(score or 0), "submitted_at": at}
+             for eid, score, at in recent]
+    return summary, trend
+
+def student_history(student_id, limit=HISTORY_LIMIT, offset=0):
+    """
+    某学生的概况与趋势（只读 student_stats）+ 一页提交记录（新到旧，总数即 summary.total_exams）；
+    本页各考试的题数由一条分组查询批量取回
+    """
+    summary, trend = student_summary(student_id)
+    rows = db.session.execute(_STUDENT_ATTEMPTS, {"student_id": student_id, "limit": limit, "offset": offset}).all()
+    sizes = paper_sizes({r.exam_id for r in rows})
+    return {
+        "summary": summary,
+        "trend": trend,
+        "history": [{
+            "attempt_id": r.id,
+            "exam_id": r.exam_id,
+            "exam_title": r.title,
+            "score": float(r.final_score or 0),
+            "submitted_at": _iso(r.submit_time),
+            "duration_minutes": r.duration_minutes,
+            "total_questions": int(sizes.get(r.exam_id, 0)),
+        } for r in rows],
+    }
+
+def student_wrong_questions(student_id, limit=WRONG_QUESTIONS_LIMIT, offset=0):
+    """错题本：每道答错过的题一行，最近答错的在前"""
+    return [{
+        "question_id": qid,
+        "question_text": text,
+        "question_type": q_type,
+        "correct_answer": correct,
+        "student_answer": answer,
+        "wrong_count": int(count),
+        "last_wrong_at": _iso(wrong_time),
+        "exam_title": title,
+    } for qid, text, q_type, correct, answer, count, wrong_time, title in db.session.execute(
+        _STUDENT_WRONG, {"student_id": str(student_id), "limit": limit, "offset": offset})]
+
+def student_wrong_count(student_id):
+    return int(db.session.execute(_STUDENT_WRONG_COUNT, {"student_id": str(student_id)}).scalar() or 0)
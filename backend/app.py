@@ -3,11 +3,20 @@ import os
 from flask import Flask
 from flask_cors import CORS
 
-from models import db
+from models import db, Exam, Question, ExamQuestion, ExamAttempt, ImportJob
 from auth import auth_bp
 from analytics_api import analytics_bp
+from analytics import analytics_bp as report_bp   # 报表格式的统计接口（与 analytics_api 共用查询层）
 from exam_api import exam_bp
 from question_api import qbank_bp   # 新增：题库与分类 API
+from submit_queue import start_submit_workers
+from import_worker import start_import_workers
+from db_profile import configure_db_profile, install_sqlite_pragmas, add_missing_columns, create_missing_indexes
+from exam_stats import ensure_exam_stats
+from question_search import ensure_search_index
+from question_dedup import ensure_content_hashes
+from item_analysis import ensure_attempt_responses
+from exam_manager import ensure_variant_counts
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -25,15 +34,62 @@ CORS(
 app.config.setdefault("SQLALCHEMY_DATABASE_URI", f"sqlite:///{os.path.join(BASE_DIR, 'exam_system.db')}")
 app.config.setdefault("SQLALCHEMY_TRACK_MODIFICATIONS", False)
 app.config.setdefault("JSON_AS_ASCII", False)
+# 数据库配置：production 启用 WAL / PRAGMA / 连接池；default 为 SQLAlchemy 默认行为
+app.config.setdefault("DB_PROFILE", os.environ.get("EXAM_DB_PROFILE", "production"))
+# 交卷模式：sync 同步判分；queue 入队后由后台线程批量判分（考试截止时削峰）
+app.config.setdefault("SUBMIT_MODE", os.environ.get("EXAM_SUBMIT_MODE", "sync"))
+app.config.setdefault("SUBMIT_WORKERS", int(os.environ.get("EXAM_SUBMIT_WORKERS", "1")))
+# 会话存储：memory 单进程；sqlite 多个 gunicorn worker 共享登录态
+app.config.setdefault("SESSION_BACKEND", os.environ.get("EXAM_SESSION_BACKEND", "memory"))
+# 登录 token：opaque 随机串 + 会话存储；signed 为 HMAC 签名的自包含 token（校验无需查会话，可多进程/多节点）
+# signed 模式必须配置 EXAM_SECRET_KEY（各进程/节点相同）；登出吊销记录存放在 SESSION_BACKEND 中，
+# 多 worker 部署需使用 sqlite 等共享存储（各进程每 auth.REVOKED_REFRESH_SECONDS 秒同步一次吊销列表，
+# 其它 worker 上的登出最多延迟这么久生效）
+app.config.setdefault("TOKEN_MODE", os.environ.get("EXAM_TOKEN_MODE", "opaque"))
+# Flask 默认配置里已有 SECRET_KEY=None，不能用 setdefault
+if not app.config.get("SECRET_KEY"):
+    app.config["SECRET_KEY"] = os.environ.get("EXAM_SECRET_KEY")
+if app.config["TOKEN_MODE"] == "signed" and not app.config["SECRET_KEY"]:
+    raise RuntimeError("EXAM_TOKEN_MODE=signed 需要配置 EXAM_SECRET_KEY（所有进程/节点使用同一密钥）")
+# 题库导入：background 登记任务后由后台线程流式分块导入（可续传）；batch 在请求内整表导入（CSV 总是走 background）
+app.config.setdefault("IMPORT_MODE", os.environ.get("EXAM_IMPORT_MODE", "background"))
+app.config.setdefault("IMPORT_WORKERS", int(os.environ.get("EXAM_IMPORT_WORKERS", "1")))
+app.config.setdefault("IMPORT_CHUNK_SIZE", int(os.environ.get("EXAM_IMPORT_CHUNK_SIZE", "1000")))
+app.config.setdefault("IMPORT_DIR", os.path.join(BASE_DIR, "uploads", "imports"))
+# 后台线程（交卷队列、导入任务）只在服务进程中启动，运维脚本 from app import app 时不启动：
+# 直接运行 app.py / main.py 时自动启动；gunicorn 等 WSGI 服务器需设置 EXAM_START_WORKERS=1
+app.config.setdefault("START_WORKERS", os.environ.get("EXAM_START_WORKERS", "0") == "1")
 
+configure_db_profile(app)
 db.init_app(app)
 with app.app_context():
+    install_sqlite_pragmas(app)
     db.create_all()
+    add_missing_columns(Exam, Question, ExamQuestion, ImportJob)
+    create_missing_indexes(Question, ExamAttempt)
+    ensure_variant_counts()
+    ensure_exam_stats()
+    ensure_search_index()
+    ensure_content_hashes()
+    ensure_attempt_responses()
 
 app.register_blueprint(auth_bp, url_prefix="/api")
 app.register_blueprint(exam_bp, url_prefix="/api")
 app.register_blueprint(analytics_bp, url_prefix="/api")
+app.register_blueprint(report_bp, url_prefix="/api")
 app.register_blueprint(qbank_bp, url_prefix="/api")   # 新增注册
 
+
+def start_background_workers(app):
+    """启动交卷队列（queue 模式）与导入任务的后台线程；重复调用不会重复启动"""
+    if app.config["SUBMIT_MODE"] == "queue":
+        start_submit_workers(app, app.config["SUBMIT_WORKERS"])
+    start_import_workers(app, app.config["IMPORT_WORKERS"])
+
+
+if app.config["START_WORKERS"]:
+    start_background_workers(app)
+
 if __name__ == "__main__":
+    start_background_workers(app)
     app.run(host="0.0.0.0", port=5000)
@@ -1,13 +1,23 @@
 # backend/auth.py
 # 教师账户账号密码登录；学生填写姓名+工号登录
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from datetime import datetime, timedelta
-import secrets
+import secrets, hmac, hashlib, base64, json, time, threading
+
+from session_store import create_session_store
 
 auth_bp = Blueprint("auth", __name__)
 
-# 简易内存会话（开发环境）
-SESSIONS = {}  # token -> {'role','id','name','expire'}
+# 会话存储：app.config["SESSION_BACKEND"] = memory（默认，单进程）/ sqlite（多 worker 共享）
+# token -> {'role','id','name','expire'}
+_stores = {}
+
+def _sessions():
+    name = current_app.config.get("SESSION_BACKEND", "memory")
+    store = _stores.get(name)
+    if store is None:
+        store = _stores.setdefault(name, create_session_store(name))
+    return store
 
 # —— 教师账号（示例：可换成数据库查询）——
 # 你也可以把下面列表换成从数据库读取的教师表
@@ -19,31 +29,111 @@ TEACHERS = {
 
 SESSION_TTL_MIN = 8 * 60  # 8 小时
 
+# —— 自包含签名 token（app.config["TOKEN_MODE"] = "signed"）——
+# 格式：base64url(JSON 载荷).base64url(HMAC-SHA256)，校验只需一次签名比对；
+# 登出的 token 按 jti 记入会话存储（与 opaque 会话同一后端，多 worker 共享，到期随会话清理一并清除）
+REVOKED_PREFIX = "revoked:"
+# 共享存储（sqlite）不在每个请求上查吊销记录：每 REVOKED_REFRESH_SECONDS 秒整批读取一次未过期的吊销 jti
+# （数量只与 8 小时内的登出次数有关）。代价是在其它 worker 上登出的 token，最多还能在本进程继续使用
+# REVOKED_REFRESH_SECONDS 秒；在本进程登出立即生效。进程内存储（memory）直接查字典，没有延迟
+REVOKED_REFRESH_SECONDS = 10
+_revoked = {}   # 存储名 -> (下次刷新时间, 吊销的 jti 集合)
+_revoked_lock = threading.Lock()
+
+def _b64e(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+def _b64d(s):
+    return base64.urlsafe_b64decode(s + "=" * (-len(s) % 4))
+
+def _sign(body):
+    key = current_app.config.get("SECRET_KEY")
+    if not key:
+        raise RuntimeError("签名 token 需要配置 SECRET_KEY")
+    key = key if isinstance(key, bytes) else key.encode()
+    return _b64e(hmac.new(key, body.encode(), hashlib.sha256).digest())
+
+def _new_signed_token(payload):
+    claims = {**payload, "exp": int(time.time()) + SESSION_TTL_MIN * 60, "jti": secrets.token_hex(8)}
+    body = _b64e(json.dumps(claims, ensure_ascii=False, separators=(",", ":")).encode())
+    return f"{body}.{_sign(body)}"
+
+def _verify_signed_token(token):
+    body, _, sig = token.partition(".")
+    # 按字节比较：compare_digest 遇到含非 ASCII 字符的 str 会抛 TypeError
+    if not sig or not hmac.compare_digest(sig.encode(), _sign(body).encode()):
+        return None
+    try:
+        claims = json.loads(_b64d(body))
+    except Exception:
+        return None
+    if claims.get("exp", 0) < time.time():
+        return None
+    _cleanup_sessions()
+    if _is_revoked(claims.get("jti")):
+        return None
+    return {"role": claims.get("role"), "id": claims.get("id"), "name": claims.get("name"),
+            "jti": claims.get("jti"), "expire": datetime.utcfromtimestamp(claims["exp"])}
+
+def _is_revoked(jti):
+    store = _sessions()
+    if not store.SHARED:
+        return store.get(REVOKED_PREFIX + str(jti)) is not None
+    name = current_app.config.get("SESSION_BACKEND", "memory")
+    now = time.monotonic()
+    hit = _revoked.get(name)
+    if hit is None or hit[0] <= now:
+        jtis = {t[len(REVOKED_PREFIX):] for t in store.tokens_with_prefix(REVOKED_PREFIX)}
+        with _revoked_lock:
+            hit = _revoked[name] = (now + REVOKED_REFRESH_SECONDS, jtis)
+    return str(jti) in hit[1]
+
+def _revoke(info):
+    _sessions().put(REVOKED_PREFIX + str(info["jti"]), {"revoked": True, "expire": info["expire"]})
+    # 本进程的吊销集合立即加入，不等下次刷新
+    hit = _revoked.get(current_app.config.get("SESSION_BACKEND", "memory"))
+    if hit:
+        with _revoked_lock:
+            hit[1].add(str(info["jti"]))
+
+def _signed_mode():
+    return current_app.config.get("TOKEN_MODE") == "signed"
+
 def _new_token(payload):
+    if _signed_mode():
+        return _new_signed_token(payload)
     token = secrets.token_hex(16)
     payload = {**payload, "expire": datetime.utcnow() + timedelta(minutes=SESSION_TTL_MIN)}
-    SESSIONS[token] = payload
+    _sessions().put(token, payload)
     return token
 
 def _cleanup_sessions():
-    now = datetime.utcnow()
-    for k, v in list(SESSIONS.items()):
-        if v.get("expire") and v["expire"] < now:
-            SESSIONS.pop(k, None)
+    # 只清理已到期的会话，不再遍历全部
+    _sessions().cleanup()
 
 def get_identity(req):
-    _cleanup_sessions()
     token = req.headers.get("X-Token") or req.cookies.get("token")
+    if token and _signed_mode():
+        info = _verify_signed_token(token)
+        return {"token": token, **info} if info else None
+    _cleanup_sessions()
     if not token: 
         return None
-    info = SESSIONS.get(token)
-    if not info: 
+    info = _sessions().get(token)
+    # 吊销记录与会话同存一处，不能当作登录会话
+    if not info or "role" not in info:
         return None
     if info["expire"] < datetime.utcnow():
-        SESSIONS.pop(token, None)
+        _sessions().delete(token)
         return None
     return {"token": token, **info}
 
+def can_view_student(me, student_id):
+    """学生只能查看自己的数据（身份 id 即工号），教师可查看任意学生"""
+    if not me:
+        return False
+    return me.get("role") == "teacher" or str(me.get("id")) == str(student_id)
+
 @auth_bp.post("/auth/teacher/login")
 def teacher_login():
     data = request.get_json(silent=True) or {}
@@ -73,8 +163,12 @@ def student_login():
 @auth_bp.post("/auth/logout")
 def logout():
     token = request.headers.get("X-Token") or request.cookies.get("token")
-    if token in SESSIONS:
-        SESSIONS.pop(token, None)
+    if token and _signed_mode():
+        info = _verify_signed_token(token)
+        if info:
+            _revoke(info)
+    elif token:
+        _sessions().delete(token)
     return jsonify({"success": True})
 
 # 可选：用于前端检查登录态
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+成绩导出内存基准：一次 .all() 读入全部答题记录再拼表 vs 分批游标流式导出（CSV / XLSX）
+用法：python benchmarks/bench_export.py [提交数] [每份题目数]，默认 10000 50
+"""
+import os, sys, time, tempfile, tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from models import db, Exam, ExamStatus, ExamQuestion, ExamAttempt, StudentAnswer, Question
+from result_export import (
+    exam_question_ids, iter_answer_matrix_rows, answer_matrix_header, stream_csv, stream_xlsx,
+)
+
+def seed(attempts, n_questions):
+    db.session.execute(Question.__table__.insert(), [
+        {"creator_id": 1, "question_type": "single", "question_text": f"题目{i}", "options": None,
+         "correct_answer": ["A"]} for i in range(n_questions)])
+    db.session.add(Exam(id=1, creator_id=1, title="导出", duration_minutes=60, status=ExamStatus.ACTIVE))
+    db.session.flush()
+    db.session.execute(ExamQuestion.__table__.insert(),
+                       [{"exam_id": 1, "question_id": q, "score": 2} for q in range(1, n_questions + 1)])
+    db.session.execute(ExamAttempt.__table__.insert(), [
+        {"id": a, "exam_id": 1, "student_id": f"s{a}", "final_score": a % 100, "switch_count": 0}
+        for a in range(1, attempts + 1)])
+    for start in range(1, attempts + 1, 1000):
+        db.session.execute(StudentAnswer.__table__.insert(), [
+            {"attempt_id": a, "question_id": q, "student_answer": ["A"], "is_correct": (a + q) % 3 != 0}
+            for a in range(start, min(start + 1000, attempts + 1)) for q in range(1, n_questions + 1)])
+    db.session.commit()
+
+def legacy_export():
+    """旧做法：全部提交和答题记录读成 ORM 对象，在内存中拼好整张表"""
+    attempts = ExamAttempt.query.filter_by(exam_id=1).order_by(ExamAttempt.id).all()
+    qids = sorted({a.question_id for a in StudentAnswer.query.all()})
+    table = []
+    for a in attempts:
+        by_q = {sa.question_id: sa.is_correct for sa in a.answers}
+        table.append([a.id, a.student_id, a.final_score, *[int(by_q[q]) if q in by_q else "" for q in qids]])
+    return sum(len(str(r)) for r in table)
+
+def drain(gen):
+    return sum(len(chunk) for chunk in gen)
+
+def measure(fn):
+    db.session.expunge_all()
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024, size
+
+def main():
+    attempts = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    n_questions = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        seed(attempts, n_questions)
+        qids = exam_question_ids(1)
+        header = answer_matrix_header(qids)
+        cases = (
+            ("一次读入(旧)", legacy_export),
+            ("流式 CSV", lambda: drain(stream_csv(header, iter_answer_matrix_rows(1, qids)))),
+            ("流式 XLSX", lambda: drain(stream_xlsx(header, iter_answer_matrix_rows(1, qids)))),
+        )
+        print(f"{attempts} 份提交 × {n_questions} 题")
+        print(f"{'方式':<12} {'耗时(s)':>8} {'峰值内存(MB)':>13}")
+        for name, fn in cases:
+            elapsed, peak, _ = measure(fn)
+            print(f"{name:<12} {elapsed:>8.2f} {peak:>13.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Excel 导入耗时基准：旧的逐行 iloc + 逐条 ORM add vs 列式整理 + 批量插入，
+以及 openpyxl 只读模式的流式分块导入（含读文件时间，峰值内存只与块大小有关）
+用法：python benchmarks/bench_import.py [行数 ...]，默认 1000 10000 100000
+旧实现在 100k 档耗时过长，超过 LEGACY_MAX_ROWS 时跳过
+"""
+import os, sys, time, random, tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from flask import Flask
+from models import db, Question, Category
+from question_importer import _import_df, create_import_job, run_import_job
+from question_search import ensure_search_index
+
+SIZES = (1_000, 10_000, 100_000)
+LEGACY_MAX_ROWS = 10_000
+
+def make_frame(n):
+    rnd = random.Random(7)
+    rows = []
+    for i in range(n):
+        t = ("单选题", "多选题", "判断题")[i % 3]
+        opts = ["", "", "", ""] if t == "判断题" else [f"选项{i}-{x}" for x in "ABCD"]
+        ans = {"单选题": "B", "多选题": "A,C", "判断题": "对"}[t]
+        rows.append(["第%d题：示例题干" % i, t, f"分类{rnd.randint(1, 50)}", *opts, ans])
+    return pd.DataFrame(rows, columns=["题干", "题型", "分类", "选项A", "选项B", "选项C", "选项D", "正确答案"])
+
+def legacy_import(df, creator_id):
+    """旧实现：每行四次按列名取列 + iloc 标量访问，逐条创建分类与 Question"""
+    existing_cats = {c.name: c.id for c in Category.query.all()}
+    questions = []
+    for idx in range(len(df)):
+        qtext = str(df["题干"].iloc[idx]).strip()
+        qtype = {"单选题": "single", "多选题": "multiple", "判断题": "true_false"}[str(df["题型"].iloc[idx]).strip()]
+        raw_ans = str(df["正确答案"].iloc[idx]).strip()
+        cat_name = str(df["分类"].iloc[idx]).strip()
+        if cat_name not in existing_cats:
+            c = Category(name=cat_name)
+            db.session.add(c)
+            db.session.flush()
+            existing_cats[cat_name] = c.id
+        options = {}
+        for key in ["选项A", "选项B", "选项C", "选项D"]:
+            val = str(df[key].iloc[idx]).strip()
+            if val:
+                options[key[-1]] = val
+        if qtype == "multiple":
+            correct = [x.strip().upper() for x in raw_ans.split(",") if x.strip()]
+        elif qtype == "true_false":
+            correct = [raw_ans in {"对", "true"}]
+        else:
+            correct = [raw_ans.upper()]
+        questions.append(Question(creator_id=creator_id, category_id=existing_cats[cat_name], question_text=qtext,
+                                  question_type=qtype, options=options or None, correct_answer=correct))
+    db.session.add_all(questions)
+    db.session.commit()
+
+def reset():
+    db.session.query(Question).delete()
+    db.session.query(Category).delete()
+    db.session.commit()
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+def main():
+    sizes = [int(x) for x in sys.argv[1:]] or SIZES
+    tmp = tempfile.mkdtemp()
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        ensure_search_index()
+        print(f"{'行数':>8} {'读Excel(s)':>11} {'旧导入(s)':>10} {'新导入(s)':>10} {'流式(s)':>10}")
+        for n in sizes:
+            path = os.path.join(tmp, f"bank_{n}.xlsx")
+            make_frame(n).to_excel(path, index=False)
+            start = time.perf_counter()
+            df = pd.read_excel(path).fillna("")
+            read_s = time.perf_counter() - start
+
+            legacy = "-"
+            if n <= LEGACY_MAX_ROWS:
+                reset()
+                legacy = f"{timed(legacy_import, df, 1):.2f}"
+            reset()
+            new = timed(_import_df, df, 1)
+            assert db.session.query(Question).count() == n
+            reset()
+            job = create_import_job(path, 1)
+            stream = timed(run_import_job, job.id)
+            assert db.session.query(Question).count() == n
+            print(f"{n:>8} {read_s:>11.2f} {legacy:>10} {new:>10.2f} {stream:>10.2f}")
+
+if __name__ == "__main__":
+    main()
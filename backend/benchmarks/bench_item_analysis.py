@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+题目分析耗时基准：ORM 逐行读取 + Python 循环 vs 读取交卷时写入的作答压缩块 + NumPy 向量化（冷计算 / 缓存命中）
+种子数据直接写 student_answers，压缩块由历史数据补写路径（启动时 / rebuild_stats.py）一次性生成，单独计时
+用法：python benchmarks/bench_item_analysis.py [提交数] [题目数]，默认 10000 200
+"""
+import os, sys, time, random, tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from models import db, Exam, ExamStatus, ExamAttempt, StudentAnswer, Question
+from exam_stats import rebuild_exam_stats
+from item_analysis import analyze_exam_items, invalidate_item_analysis, backfill_responses
+
+CHOICES = [["A"], ["B"], ["C"], ["D"], []]
+
+def seed(attempts, n_items):
+    rnd = random.Random(7)
+    db.session.execute(Question.__table__.insert(), [
+        {"creator_id": 1, "question_type": "single", "question_text": f"题目{i}",
+         "options": {"A": "a", "B": "b", "C": "c", "D": "d"}, "correct_answer": ["A"]} for i in range(n_items)])
+    db.session.add(Exam(id=1, creator_id=1, title="分析", duration_minutes=60, status=ExamStatus.ACTIVE))
+    db.session.flush()
+    abilities = [rnd.random() for _ in range(attempts)]
+    difficulty = [rnd.uniform(-0.3, 0.3) for _ in range(n_items)]
+    db.session.execute(ExamAttempt.__table__.insert(), [
+        {"id": a + 1, "exam_id": 1, "student_id": f"s{a}", "final_score": 0} for a in range(attempts)])
+    for start in range(0, attempts, 500):
+        rows = []
+        for a in range(start, min(start + 500, attempts)):
+            for q in range(n_items):
+                ok = rnd.random() < abilities[a] + difficulty[q]
+                rows.append({"attempt_id": a + 1, "question_id": q + 1, "is_correct": ok,
+                             "student_answer": ["A"] if ok else rnd.choice(CHOICES[1:])})
+        db.session.execute(StudentAnswer.__table__.insert(), rows)
+    db.session.commit()
+    rebuild_exam_stats()
+
+def legacy_analysis():
+    """逐行 ORM 读取，按题目 Python 循环统计（只算 p 值与选项频次）"""
+    stats = {}
+    rows = db.session.query(StudentAnswer.question_id, StudentAnswer.is_correct, StudentAnswer.student_answer)\
+        .join(ExamAttempt, ExamAttempt.id == StudentAnswer.attempt_id).filter(ExamAttempt.exam_id == 1).all()
+    for qid, ok, ans in rows:
+        s = stats.setdefault(qid, {"n": 0, "right": 0, "options": {}})
+        s["n"] += 1
+        s["right"] += bool(ok)
+        for opt in ans or []:
+            s["options"][opt] = s["options"].get(opt, 0) + 1
+    return {qid: s["right"] / s["n"] for qid, s in stats.items()}
+
+def timed(fn, runs=3):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    attempts = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    n_items = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        seed(attempts, n_items)
+        legacy = timed(legacy_analysis, runs=1)
+        backfill = timed(lambda: backfill_responses(), runs=1)
+
+        def cold():
+            invalidate_item_analysis()
+            analyze_exam_items(1)
+        cold_ms = timed(cold)
+        warm_ms = timed(lambda: analyze_exam_items(1))
+        assert len(analyze_exam_items(1)["items"]) == n_items
+        print(f"{attempts} 份提交 × {n_items} 题")
+        print(f"{'旧实现(ms)':>11} {'补写压缩块(ms)':>14} {'冷计算(ms)':>11} {'缓存命中(ms)':>12}")
+        print(f"{legacy:>11.0f} {backfill:>14.0f} {cold_ms:>11.0f} {warm_ms:>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+随机组卷耗时基准：旧的逐分类 ORDER BY random() + NOT IN 补齐 vs 内存 id 索引抽样
+用法：python benchmarks/bench_random_paper.py [题目数量 ...]，默认 10000 100000
+"""
+import os, sys, time, random, tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import func
+from models import db, Question, Category
+from exam_manager import sample_questions, invalidate_question_id_index
+
+SIZES = (10_000, 100_000)
+CATEGORIES = 20
+RUNS = 10
+TYPES = ("single", "multiple", "true_false")
+# 每种题型从 10 个分类各抽 3 道，再补齐到 50 道
+CONFIG = {t: {"total": 50, "byCategory": {f"分类{i}": 3 for i in range(10)}} for t in TYPES}
+
+def seed(n):
+    db.session.execute(Category.__table__.insert(), [{"name": f"分类{i}"} for i in range(CATEGORIES)])
+    rnd = random.Random(1)
+    rows = [{"creator_id": 1, "question_type": TYPES[i % 3], "category_id": rnd.randint(1, CATEGORIES),
+             "question_text": f"题目{i}", "options": None, "correct_answer": ["A"]} for i in range(n)]
+    for i in range(0, n, 5000):
+        db.session.execute(Question.__table__.insert(), rows[i:i + 5000])
+    db.session.commit()
+
+def legacy_sample(creator_id, config):
+    """旧实现：每个 (题型, 分类) 一次 ORDER BY random()，补齐时再带 NOT IN 全量随机排序"""
+    out = {}
+    for q_type, conf in config.items():
+        picked = []
+        for cat_name, need in conf["byCategory"].items():
+            cat = Category.query.filter_by(name=cat_name).first()
+            picked.extend(Question.query.filter_by(question_type=q_type, category_id=cat.id, creator_id=creator_id)
+                          .order_by(func.random()).limit(need).all())
+        remain = conf["total"] - len(picked)
+        picked.extend(Question.query.filter_by(question_type=q_type, creator_id=creator_id)
+                      .filter(~Question.id.in_([q.id for q in picked]))
+                      .order_by(func.random()).limit(remain).all())
+        out[q_type] = [q.id for q in picked]
+    return out
+
+def timed(fn, runs=RUNS):
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs * 1000
+
+def main():
+    sizes = [int(x) for x in sys.argv[1:]] or SIZES
+    print(f"{'题目数':>8} {'旧实现(ms)':>11} {'冷启动(ms)':>11} {'缓存命中(ms)':>12}")
+    for n in sizes:
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            seed(n)
+            legacy = timed(lambda: legacy_sample(1, CONFIG))
+
+            def cold():
+                invalidate_question_id_index()
+                sample_questions(1, CONFIG)
+            cold_ms = timed(cold)
+            warm_ms = timed(lambda: sample_questions(1, CONFIG))
+            assert all(len(v) == 50 for v in sample_questions(1, CONFIG).values())
+            print(f"{n:>8} {legacy:>11.1f} {cold_ms:>11.1f} {warm_ms:>12.1f}")
+        invalidate_question_id_index()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+题干检索耗时基准：LIKE '%关键词%' 全表扫描 vs FTS5 二元组索引
+用法：python benchmarks/bench_search.py [题目数量]
+"""
+import os, sys, time, random, tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from models import db, Question
+from question_search import ensure_search_index, rebuild_search_index, search_questions
+
+WORDS = ["数据库", "事务", "索引", "网络", "协议", "操作系统", "进程", "线程", "内存", "安全",
+         "加密", "算法", "排序", "查找", "编译", "函数", "变量", "指针", "缓存", "并发"]
+QUERIES = ["数据库 索引", "线程", "加密算法", "操作系统 内存", "缓存"]
+RUNS = 20
+
+def seed(n):
+    rnd = random.Random(42)
+    rows = []
+    for i in range(n):
+        words = rnd.sample(WORDS, 4)
+        rows.append({
+            "creator_id": 1, "question_type": "single", "correct_answer": ["A"],
+            "question_text": f"第{i}题：关于{words[0]}与{words[1]}的说法，下列哪项正确？",
+            "options": {"A": f"{words[2]}相关", "B": f"{words[3]}相关", "C": "都对", "D": "都不对"},
+        })
+        if len(rows) == 5000:
+            db.session.execute(Question.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(Question.__table__.insert(), rows)
+    db.session.commit()
+
+def bench_like(query):
+    cond = [Question.question_text.like(f"%{w}%") for w in query.split()]
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        db.session.query(Question.id).filter(*cond).order_by(Question.id).limit(20).all()
+        db.session.query(Question.id).filter(*cond).count()
+    return (time.perf_counter() - start) / RUNS * 1000
+
+def bench_fts(query):
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        search_questions(query, 20, 0)
+    return (time.perf_counter() - start) / RUNS * 1000
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        seed(n)
+        ensure_search_index()
+        start = time.perf_counter()
+        rebuild_search_index()
+        print(f"题目 {n} 条，建索引 {time.perf_counter() - start:.2f}s")
+        print(f"{'查询':<14} {'LIKE(ms)':>10} {'FTS5(ms)':>10} {'命中':>8}")
+        for q in QUERIES:
+            total, _ = search_questions(q)
+            print(f"{q:<14} {bench_like(q):>10.2f} {bench_fts(q):>10.2f} {total:>8}")
+
+if __name__ == "__main__":
+    main()
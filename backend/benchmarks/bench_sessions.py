@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+会话校验耗时基准：旧的每请求全量遍历 vs memory / sqlite 会话存储
+用法：python benchmarks/bench_sessions.py
+"""
+import os, sys, time, tempfile, secrets
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from models import db, AuthSession
+from session_store import MemorySessionStore, SqliteSessionStore
+
+SIZES = (10_000, 100_000)
+LOOKUPS = 2_000
+
+def make_payloads(n):
+    now = datetime.utcnow()
+    # 约 1% 的会话已过期，模拟真实的到期分布
+    return [(secrets.token_hex(16), {"role": "student", "id": i, "name": f"s{i}",
+             "expire": now + timedelta(minutes=(-1 if i % 100 == 0 else 480))}) for i in range(n)]
+
+def bench_legacy(payloads, lookups=200):
+    sessions = dict(payloads)
+    tokens = [t for t, _ in payloads[:lookups]]
+    start = time.perf_counter()
+    for t in tokens:
+        now = datetime.utcnow()
+        for k, v in list(sessions.items()):
+            if v.get("expire") and v["expire"] < now:
+                sessions.pop(k, None)
+        sessions.get(t)
+    return (time.perf_counter() - start) / len(tokens) * 1e6
+
+def bench_store(store, payloads, lookups=LOOKUPS):
+    if isinstance(store, SqliteSessionStore):
+        # 批量预置，避免逐条事务拖慢准备阶段
+        db.session.execute(AuthSession.__table__.insert(), [
+            {"token": t, "payload": {k: v for k, v in p.items() if k != "expire"},
+             "expire_at": p["expire"].timestamp()} for t, p in payloads])
+        db.session.commit()
+    else:
+        for t, p in payloads:
+            store.put(t, p)
+    tokens = [t for t, _ in payloads[:lookups]]
+    start = time.perf_counter()
+    for t in tokens:
+        store.cleanup()
+        store.get(t)
+    return (time.perf_counter() - start) / len(tokens) * 1e6
+
+def main():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        print(f"{'会话数':>8} {'旧遍历(us)':>12} {'memory(us)':>12} {'sqlite(us)':>12}")
+        for n in SIZES:
+            payloads = make_payloads(n)
+            # 旧实现每次都全量遍历，抽样少量请求即可
+            legacy = bench_legacy(payloads)
+            mem = bench_store(MemorySessionStore(), payloads)
+            db.session.execute(db.text("DELETE FROM auth_sessions"))
+            db.session.commit()
+            sql = bench_store(SqliteSessionStore(), payloads)
+            print(f"{n:>8} {legacy:>12.1f} {mem:>12.2f} {sql:>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+学生个人成绩页耗时基准：逐行相关子查询 + Python 汇总 + 扫描全部作答取错题 vs 学生汇总行 + 错题索引
+用法：python benchmarks/bench_student_history.py [学生数] [每人考试数] [每场题目数]，默认 50 300 20
+"""
+import os, sys, time, random, tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import text
+from models import db, Exam, ExamStatus, ExamQuestion, ExamAttempt, StudentAnswer, Question
+from exam_stats import rebuild_student_stats
+import analytics_queries as aq
+
+# 旧实现：每行一个 COUNT 相关子查询，错题需连接并排序该学生的全部作答
+LEGACY_HISTORY = text("""
+    SELECT e.title, a.final_score, a.submit_time, e.duration_minutes,
+           (SELECT COUNT(*) FROM exam_questions WHERE exam_id = e.id) AS total_questions
+    FROM exam_attempts a JOIN exams e ON a.exam_id = e.id
+    WHERE a.student_id = :sid ORDER BY a.submit_time DESC
+""")
+LEGACY_WRONG = text("""
+    SELECT q.question_text, q.question_type, q.correct_answer, sa.student_answer, e.title
+    FROM student_answers sa
+    JOIN exam_attempts a ON sa.attempt_id = a.id
+    JOIN questions q ON sa.question_id = q.id
+    JOIN exams e ON a.exam_id = e.id
+    WHERE a.student_id = :sid AND sa.is_correct = 0
+    ORDER BY a.submit_time DESC LIMIT 20
+""")
+
+def seed(students, exams, per_exam):
+    rnd = random.Random(3)
+    n_questions = per_exam * 10
+    db.session.execute(Question.__table__.insert(), [
+        {"creator_id": 1, "question_type": "single", "question_text": f"题目{i}", "options": None,
+         "correct_answer": ["A"]} for i in range(n_questions)])
+    db.session.execute(Exam.__table__.insert(), [
+        {"id": e, "creator_id": 1, "title": f"培训{e}", "duration_minutes": 60, "status": ExamStatus.ACTIVE.name}
+        for e in range(1, exams + 1)])
+    exam_qs = {e: rnd.sample(range(1, n_questions + 1), per_exam) for e in range(1, exams + 1)}
+    db.session.execute(ExamQuestion.__table__.insert(), [
+        {"exam_id": e, "question_id": q, "score": 5} for e, qs in exam_qs.items() for q in qs])
+    start = datetime(2020, 1, 1)
+    aid = 0
+    for s in range(students):
+        attempts, answers = [], []
+        for e in range(1, exams + 1):
+            aid += 1
+            ok = [rnd.random() < 0.7 for _ in exam_qs[e]]
+            attempts.append({"id": aid, "exam_id": e, "student_id": f"emp{s}", "final_score": 5 * sum(ok),
+                             "submit_time": start + timedelta(days=e, minutes=s), "switch_count": 0})
+            answers += [{"attempt_id": aid, "question_id": q, "student_answer": ["A"] if c else ["B"], "is_correct": c}
+                        for q, c in zip(exam_qs[e], ok)]
+        db.session.execute(ExamAttempt.__table__.insert(), attempts)
+        db.session.execute(StudentAnswer.__table__.insert(), answers)
+    db.session.commit()
+    rebuild_student_stats()
+
+def legacy(sid):
+    rows = db.session.execute(LEGACY_HISTORY, {"sid": sid}).all()
+    scores = [r.final_score for r in rows]
+    summary = (len(scores), sum(scores) / len(scores), max(scores), min(scores))
+    return summary, db.session.execute(LEGACY_WRONG, {"sid": sid}).all()
+
+def indexed(sid):
+    return aq.student_summary(sid), aq.student_wrong_questions(sid)
+
+def timed(fn, sids):
+    start = time.perf_counter()
+    for sid in sids:
+        fn(sid)
+    return (time.perf_counter() - start) * 1000 / len(sids)
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    exams = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    per_exam = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        seed(students, exams, per_exam)
+        sids = [f"emp{s}" for s in range(0, students, max(1, students // 20))]
+        (count, avg, best, worst), _ = legacy(sids[0])
+        summary, trend = aq.student_summary(sids[0])
+        assert (summary["total_exams"], summary["highest_score"], summary["lowest_score"]) == (count, best, worst)
+        assert summary["average_score"] == round(avg, 2) and trend
+        old_ms, new_ms = timed(legacy, sids), timed(indexed, sids)
+        print(f"{students} 名学生 × {exams} 场考试 × {per_exam} 题")
+        print(f"{'旧实现(ms/次)':>13} {'汇总+错题索引(ms/次)':>20}")
+        print(f"{old_ms:>13.1f} {new_ms:>20.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+交卷判分耗时基准：对比旧的逐题 add + 懒加载路径与当前批量写入路径
+用法：python benchmarks/bench_submit.py [每档提交次数]
+"""
+import os, sys, time, tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from datetime import datetime
+from models import db, Question, Exam, ExamQuestion, ExamStatus, ExamAttempt, StudentAnswer
+from exam_manager import submit_and_grade_exam, build_answer_key, _normalize_answer
+
+SIZES = (20, 100, 500)
+
+def make_app():
+    app = Flask(__name__)
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    return app
+
+def seed_exam(n):
+    qs = []
+    for i in range(n):
+        t = ("single", "multiple", "true_false")[i % 3]
+        opts = None if t == "true_false" else {"A": "a", "B": "b", "C": "c", "D": "d"}
+        ans = {"single": ["B"], "multiple": "A,C", "true_false": [True]}[t]
+        qs.append(Question(creator_id=1, question_text=f"题目{i}", question_type=t, options=opts, correct_answer=ans))
+    db.session.add_all(qs)
+    exam = Exam(creator_id=1, title=f"bench-{n}", duration_minutes=60, status=ExamStatus.ACTIVE)
+    db.session.add(exam)
+    db.session.flush()
+    for q in qs:
+        db.session.add(ExamQuestion(exam_id=exam.id, question_id=q.id, score=1))
+    db.session.commit()
+    answers = {q.id: {"single": "B", "multiple": ["A", "C"], "true_false": True}[q.question_type] for q in qs}
+    return exam.id, answers
+
+def legacy_submit(exam_id, student_id, answers_data):
+    """旧实现：逐题懒加载 question、逐题解析答案、逐行 session.add"""
+    exam_questions = ExamQuestion.query.filter_by(exam_id=exam_id).all()
+    q_map = {eq.question_id: (eq.question, eq.score) for eq in exam_questions}
+    attempt = ExamAttempt(student_id=student_id, exam_id=exam_id, submit_time=datetime.utcnow(),
+                          switch_count=0, final_score=0)
+    db.session.add(attempt)
+    db.session.flush()
+    total = 0
+    answers = answers_data["answers"]
+    for qid, (question, score) in q_map.items():
+        stu_ans = answers.get(qid)
+        correct = _normalize_answer(question.correct_answer)
+        if question.question_type == "true_false":
+            is_correct = _normalize_answer(stu_ans) == correct
+        else:
+            stu_list = [str(x).strip().upper() for x in (stu_ans if isinstance(stu_ans, list) else [stu_ans])]
+            corr_list = correct if isinstance(correct, list) else [str(correct).strip().upper()]
+            is_correct = sorted(stu_list) == sorted(corr_list)
+        if is_correct:
+            total += score
+        db.session.add(StudentAnswer(attempt_id=attempt.id, question_id=qid,
+                                     student_answer=stu_ans if isinstance(stu_ans, list) else [stu_ans],
+                                     is_correct=bool(is_correct)))
+    attempt.final_score = total
+    db.session.commit()
+
+def run(fn, exam_id, answers, rounds, base):
+    start = time.perf_counter()
+    for i in range(rounds):
+        db.session.expunge_all()
+        fn(exam_id, base + i, {"answers": answers})
+    return (time.perf_counter() - start) / rounds * 1000
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        print(f"{'题量':>6} {'旧实现(ms)':>12} {'批量写入(ms)':>14} {'加速':>8}")
+        for n in SIZES:
+            exam_id, answers = seed_exam(n)
+            build_answer_key(exam_id)
+            before = run(legacy_submit, exam_id, answers, rounds, 100000)
+            after = run(submit_and_grade_exam, exam_id, answers, rounds, 200000)
+            print(f"{n:>6} {before:>12.2f} {after:>14.2f} {before / after:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
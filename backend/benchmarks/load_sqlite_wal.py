@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+交卷高峰期的读写并发压测：对比 default 与 production（WAL）两种数据库配置
+写线程集中交卷的同时，读线程持续查询成绩，统计读吞吐、读延迟和失败次数
+用法：python benchmarks/load_sqlite_wal.py [写线程数] [每线程交卷数]
+"""
+import os, sys, time, tempfile, threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from models import db, Question, Exam, ExamQuestion, ExamStatus, ExamAttempt
+from db_profile import configure_db_profile, install_sqlite_pragmas
+from exam_manager import submit_and_grade_exam
+
+READERS = 4
+QUESTIONS = 50
+
+def make_app(profile):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'load.db')}"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["DB_PROFILE"] = profile
+    configure_db_profile(app)
+    db.init_app(app)
+    with app.app_context():
+        install_sqlite_pragmas(app)
+        db.create_all()
+        qs = [Question(creator_id=1, question_text=f"题目{i}", question_type="single",
+                       options={"A": "a", "B": "b"}, correct_answer=["B"]) for i in range(QUESTIONS)]
+        db.session.add_all(qs)
+        exam = Exam(creator_id=1, title="load", duration_minutes=60, status=ExamStatus.ACTIVE)
+        db.session.add(exam)
+        db.session.flush()
+        db.session.add_all([ExamQuestion(exam_id=exam.id, question_id=q.id, score=2) for q in qs])
+        db.session.commit()
+        answers = {q.id: "B" for q in qs}
+    return app, answers
+
+def run(profile, writers, per_writer):
+    app, answers = make_app(profile)
+    stop = threading.Event()
+    read_lat, read_err, write_err = [], [0], [0]
+    lock = threading.Lock()
+
+    def reader():
+        with app.app_context():
+            while not stop.is_set():
+                t0 = time.perf_counter()
+                try:
+                    db.session.query(db.func.count(ExamAttempt.id), db.func.avg(ExamAttempt.final_score)) \
+                        .filter(ExamAttempt.exam_id == 1).one()
+                    db.session.rollback()
+                    with lock:
+                        read_lat.append(time.perf_counter() - t0)
+                except Exception:
+                    db.session.rollback()
+                    with lock:
+                        read_err[0] += 1
+            db.session.remove()
+
+    def writer(w):
+        with app.app_context():
+            for i in range(per_writer):
+                res = submit_and_grade_exam(1, w * 100000 + i, {"answers": answers})
+                if not res.get("success"):
+                    with lock:
+                        write_err[0] += 1
+            db.session.remove()
+
+    rs = [threading.Thread(target=reader) for _ in range(READERS)]
+    ws = [threading.Thread(target=writer, args=(w,)) for w in range(writers)]
+    for t in rs:
+        t.start()
+    start = time.perf_counter()
+    for t in ws:
+        t.start()
+    for t in ws:
+        t.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for t in rs:
+        t.join()
+
+    read_lat.sort()
+    p99 = read_lat[int(len(read_lat) * 0.99)] * 1000 if read_lat else float("nan")
+    worst = read_lat[-1] * 1000 if read_lat else float("nan")
+    print(f"{profile:>10} {writers * per_writer / elapsed:>10.0f} {len(read_lat) / elapsed:>10.0f} "
+          f"{p99:>10.1f} {worst:>10.1f} {read_err[0]:>8} {write_err[0]:>8}")
+
+def main():
+    writers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    per_writer = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    print(f"{'配置':>10} {'交卷/s':>10} {'读/s':>10} {'读p99ms':>10} {'读最大ms':>10} {'读失败':>8} {'写失败':>8}")
+    for profile in ("default", "production"):
+        run(profile, writers, per_writer)
+
+if __name__ == "__main__":
+    main()
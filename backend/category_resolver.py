@@ -0,0 +1,45 @@
+# backend/category_resolver.py
+# 分类名解析（大小写不敏感）：按 lower(name) 表达式索引查找，缺失的分类一次 INSERT OR IGNORE 批量创建。
+# 题库导入与 create_category 共用，保证两处对“同名分类”的判断一致。
+import string
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+
+from models import db, Category
+
+LOOKUP_CHUNK = 500
+# 与 SQLite 内置 lower() 一致：只折叠 ASCII 字母
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+def category_key(name):
+    return (name or "").strip().translate(_ASCII_LOWER)
+
+def lookup_categories(keys):
+    """按归一化名称批量查找：返回 {key: 分类 id}（大小写变体并存时取最早的一个）"""
+    keys = list(keys)
+    found = {}
+    for i in range(0, len(keys), LOOKUP_CHUNK):
+        rows = db.session.query(func.lower(Category.name), func.min(Category.id))\
+            .filter(func.lower(Category.name).in_(keys[i:i + LOOKUP_CHUNK]))\
+            .group_by(func.lower(Category.name)).all()
+        found.update(rows)
+    return found
+
+def find_category(name):
+    return lookup_categories([category_key(name)]).get(category_key(name))
+
+def resolve_categories(names):
+    """分类名 -> id；不存在的一次批量创建（不提交），再一次查询映射回 id"""
+    names = {n for n in names if n and n.strip()}
+    spelling = {}   # key -> 首次出现的写法，作为新建分类的名称
+    for n in sorted(names):
+        spelling.setdefault(category_key(n), n.strip())
+    if not spelling:
+        return {}
+    found = lookup_categories(spelling)
+    missing = [k for k in spelling if k not in found]
+    if missing:
+        db.session.execute(insert(Category).on_conflict_do_nothing(), [{"name": spelling[k]} for k in missing])
+        found.update(lookup_categories(missing))
+    return {n: found[category_key(n)] for n in names}
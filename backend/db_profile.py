@@ -0,0 +1,118 @@
+# backend/db_profile.py
+# SQLite 生产配置：WAL + PRAGMA + 连接池，以及写路径上 "database is locked" 的重试
+import time
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import CreateColumn
+
+from models import db
+
+# 每个新连接执行的 PRAGMA（journal_mode=WAL 会持久化到数据库文件）
+PRODUCTION_PRAGMAS = (
+    ("journal_mode", "WAL"),        # 读写互不阻塞
+    ("synchronous", "NORMAL"),      # WAL 下安全且大幅减少 fsync
+    ("cache_size", -64000),         # 负数单位为 KiB，约 64MB 页缓存
+    ("mmap_size", 268435456),       # 256MB 内存映射读
+    ("temp_store", "MEMORY"),
+)
+
+# 拿不到锁时最多等待的秒数；只经 sqlite3.connect(timeout=) 设置一处（它即是连接的 busy_timeout，不再另发 PRAGMA），
+# 等待超时后由 with_lock_retry 退避重试
+BUSY_TIMEOUT_SECONDS = 5
+
+PRODUCTION_ENGINE_OPTIONS = {
+    "pool_size": 10,
+    "max_overflow": 20,
+    "pool_timeout": 30,
+    "pool_recycle": 3600,
+    "connect_args": {"check_same_thread": False, "timeout": BUSY_TIMEOUT_SECONDS},
+}
+
+def configure_db_profile(app):
+    """在 db.init_app 之前调用：按 DB_PROFILE 设置引擎参数"""
+    if app.config.get("DB_PROFILE") != "production":
+        return
+    if not app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+        return
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", PRODUCTION_ENGINE_OPTIONS)
+
+def install_sqlite_pragmas(app):
+    """在 app context 内、首次建连之前调用：为每个新连接设置 PRAGMA"""
+    if app.config.get("DB_PROFILE") != "production":
+        return
+    engine = db.engine
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        for name, value in PRODUCTION_PRAGMAS:
+            cur.execute(f"PRAGMA {name}={value}")
+        cur.close()
+
+# ---------- 旧库升级 ----------
+
+def add_missing_columns(*models):
+    """
+    启动时在 create_all 之后调用：create_all 不会给已存在的表加列，
+    这里对模型中有、库中没有的列执行 ALTER TABLE ADD COLUMN，并补建涉及这些列的索引
+    （与 instance/migrate_*.py 等效，升级后无需先手工跑迁移脚本）。
+    """
+    engine = db.engine
+    insp = inspect(engine)
+    for model in models:
+        table = model.__table__
+        existing = {c["name"] for c in insp.get_columns(table.name)}
+        missing = [c for c in table.columns if c.name not in existing]
+        if not missing:
+            continue
+        for col in missing:
+            if not col.nullable and col.server_default is None:
+                raise RuntimeError(f"{table.name}.{col.name} 为非空且无默认值，无法自动添加，请先运行 instance/ 下对应的迁移脚本")
+        with engine.begin() as conn:
+            for col in missing:
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {CreateColumn(col).compile(dialect=engine.dialect)}"))
+            names = {c.name for c in missing}
+            for index in table.indexes:
+                if names & {c.name for c in index.columns}:
+                    index.create(conn, checkfirst=True)
+
+def create_missing_indexes(*models):
+    """
+    启动时在 create_all 之后调用：create_all 只在建表时建索引，
+    已存在的表补建模型中新声明的索引（改了定义的索引换了新名字，同样在这里补建）。
+    """
+    # 索引名直接查 sqlite_master：反射不支持表达式索引（会告警并漏掉）
+    with db.engine.begin() as conn:
+        for model in models:
+            table = model.__table__
+            existing = set(conn.scalars(
+                text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :t"), {"t": table.name}))
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(conn)
+
+# ---------- 锁冲突重试 ----------
+
+LOCK_RETRIES = 5
+LOCK_RETRY_BASE_DELAY = 0.05  # 秒，指数退避
+
+def _is_locked(exc):
+    msg = str(getattr(exc, "orig", exc)).lower()
+    return "database is locked" in msg or "database is busy" in msg
+
+def with_lock_retry(fn, *args, **kwargs):
+    """
+    执行一个完整的写事务函数（函数内部自行 add + commit）；
+    遇到 SQLite 锁冲突时回滚并按指数退避重试，其它异常原样抛出。
+    """
+    for attempt in range(LOCK_RETRIES + 1):
+        try:
+            return fn(*args, **kwargs)
+        except OperationalError as e:
+            db.session.rollback()
+            if not _is_locked(e) or attempt == LOCK_RETRIES:
+                raise
+            time.sleep(LOCK_RETRY_BASE_DELAY * (2 ** attempt))
@@ -0,0 +1,15 @@
+# backend/dedupe_questions.py
+# 合并同一出题人名下内容指纹相同的历史重复题目（试卷题目、作答记录、题目统计改指向保留的题目）
+# 用法：python dedupe_questions.py [--dry-run]；执行后请重启服务以清空各进程的试卷缓存
+import sys
+
+from app import app
+from question_dedup import merge_duplicate_questions
+
+with app.app_context():
+    dry_run = "--dry-run" in sys.argv
+    report = merge_duplicate_questions(dry_run=dry_run)
+    print(f"{'[DRY RUN] ' if dry_run else ''}duplicate groups: {report['groups']}, "
+          f"merged: {report['merged']}, skipped (same exam): {len(report['skipped'])}")
+    if report["skipped"]:
+        print("skipped question ids:", report["skipped"][:50])
@@ -1 +1,128 @@
-<UPDATED EXAM_API CONTENT PLACEHOLDER>
\ No newline at end of file
+# backend/exam_api.py
+# 考试相关 API：教师端考试管理 / 学生端试卷与交卷
+from flask import Blueprint, jsonify, request, current_app
+
+from models import db, Exam, ExamStatus, ExamAttempt
+from auth import get_identity, can_view_student
+from exam_manager import (
+    create_exam, update_exam_questions, get_exam_for_student, submit_and_grade_exam,
+    build_answer_key, invalidate_exam_cache, generate_exam_variants,
+)
+from submit_queue import enqueue_submission, has_pending_submission, get_submission_status
+
+exam_bp = Blueprint("exam_api", __name__)
+
+def _exam_row(e):
+    return {
+        "id": e.id,
+        "title": e.title,
+        "duration_minutes": e.duration_minutes,
+        "switch_limit": e.switch_limit,
+        "is_randomized": bool(e.is_randomized),
+        "is_open": e.status == ExamStatus.ACTIVE,
+        "created_at": e.created_at.isoformat() if e.created_at else None,
+    }
+
+# ---------- 教师端 ----------
+@exam_bp.get("/teacher/exams")
+def teacher_exams():
+    rows = Exam.query.order_by(Exam.id.desc()).all()
+    return jsonify({"success": True, "exams": [_exam_row(e) for e in rows]})
+
+@exam_bp.post("/exams")
+def create_exam_api():
+    data = request.get_json(silent=True) or {}
+    if not (data.get("title") or "").strip():
+        return jsonify({"success": False, "message": "考试名称不能为空"}), 400
+    me = get_identity(request)
+    creator_id = me["id"] if me and me.get("role") == "teacher" else 1
+    result = create_exam(data, creator_id)
+    return jsonify(result), (200 if result.get("success") else 400)
+
+@exam_bp.post("/exam/<int:exam_id>/questions")
+def edit_exam_questions(exam_id: int):
+    data = request.get_json(silent=True) or {}
+    result = update_exam_questions(exam_id, data.get("updates") or {}, data.get("defaultScore"))
+    return jsonify(result), (200 if result.get("success") else 400)
+
+@exam_bp.post("/exam/<int:exam_id>/variants")
+def exam_variants(exam_id: int):
+    """按 random_config 重新生成多份试卷：paperCount 份，或按 roster 名单一人一卷"""
+    data = request.get_json(silent=True) or {}
+    result = generate_exam_variants(exam_id, data)
+    return jsonify(result), (200 if result.get("success") else 400)
+
+@exam_bp.post("/exam/<int:exam_id>/toggle")
+def toggle_exam(exam_id: int):
+    exam = Exam.query.get(exam_id)
+    if not exam:
+        return jsonify({"success": False, "message": "考试不存在"}), 404
+    exam.status = ExamStatus.INACTIVE if exam.status == ExamStatus.ACTIVE else ExamStatus.ACTIVE
+    db.session.commit()
+    # 状态变化后丢弃试卷缓存；发布时预编译答案
+    invalidate_exam_cache(exam_id)
+    if exam.status == ExamStatus.ACTIVE:
+        build_answer_key(exam_id)
+    return jsonify({"success": True, "is_open": exam.status == ExamStatus.ACTIVE})
+
+# ---------- 学生端 ----------
+@exam_bp.get("/student/exams")
+def student_exams():
+    rows = Exam.query.filter_by(status=ExamStatus.ACTIVE).order_by(Exam.id.desc()).all()
+    return jsonify({"success": True, "exams": [_exam_row(e) for e in rows]})
+
+def _student_id():
+    """取卷与交卷使用同一身份（登录 token 中的工号），分卷与乱序都按它确定，未登录时为 None"""
+    me = get_identity(request)
+    return me["id"] if me else None
+
+@exam_bp.get("/exam/<int:exam_id>")
+def exam_paper(exam_id: int):
+    student_id = _student_id()
+    if student_id is None:
+        return jsonify({"success": False, "message": "请先登录"}), 401
+    result = get_exam_for_student(exam_id, student_id)
+    if not result.get("success"):
+        return jsonify(result), 404
+    # 前端读取顶层 questions
+    return jsonify({**result, "questions": result["exam"]["questions"]})
+
+@exam_bp.post("/exam/<int:exam_id>/submit")
+def submit_exam(exam_id: int):
+    data = request.get_json(silent=True) or {}
+    student_id = _student_id()
+    if student_id is None:
+        return jsonify({"success": False, "message": "请先登录"}), 401
+
+    # 前端提交 [{question_id, answer}]，统一成 {qid: answer}
+    raw = data.get("answers") or {}
+    if isinstance(raw, list):
+        raw = {item.get("question_id"): item.get("answer") for item in raw if isinstance(item, dict)}
+    answers_data = {
+        "answers": raw,
+        "switchCount": data.get("switch_count", data.get("switchCount", 0)) or 0,
+    }
+
+    # 异步模式：校验后入队，立即返回票据，由后台线程判分
+    if current_app.config.get("SUBMIT_MODE") == "queue":
+        exam = Exam.query.get(exam_id)
+        if not exam:
+            return jsonify({"success": False, "message": "考试不存在"}), 404
+        if exam.status != ExamStatus.ACTIVE:
+            return jsonify({"success": False, "message": "考试未开放"}), 400
+        if (db.session.query(ExamAttempt.id).filter_by(student_id=student_id, exam_id=exam_id).first()
+                or has_pending_submission(exam_id, student_id)):
+            return jsonify({"success": False, "message": "您已提交过"}), 400
+        ticket = enqueue_submission(exam_id, student_id, answers_data)
+        return jsonify({"success": True, "queued": True, "ticket": ticket, "message": "已提交，正在判分"}), 202
+
+    result = submit_and_grade_exam(exam_id, student_id, answers_data)
+    return jsonify(result), (200 if result.get("success") else 400)
+
+@exam_bp.get("/exam/submission/<int:ticket>")
+def submission_status(ticket: int):
+    info = get_submission_status(ticket)
+    # 票据号连续递增，只允许本人或教师查询；无权查看与不存在同样返回 404
+    if not info or not can_view_student(get_identity(request), info.pop("student_id")):
+        return jsonify({"success": False, "message": "提交记录不存在"}), 404
+    return jsonify({"success": True, **info})
@@ -1,7 +1,15 @@
-from models import db, Exam, Question, ExamQuestion, ExamStatus, ExamAttempt, StudentAnswer, Category
-from sqlalchemy.sql.expression import func
+from models import (
+    db, Exam, Question, ExamQuestion, ExamPaperAssignment, ExamStatus, ExamAttempt, StudentAnswer, AttemptResponse,
+)
+from sqlalchemy import bindparam, update
+from sqlalchemy.sql.expression import func, select
+from sqlalchemy.exc import IntegrityError
+from db_profile import with_lock_retry
+from exam_stats import record_attempt_stats, record_student_stats
+from item_analysis import pack_responses
+from category_resolver import category_key, lookup_categories
 from datetime import datetime
-import random, json
+import random, json, threading, time, zlib
 
 # ================== 工具函数 ==================
 
@@ -53,88 +61,479 @@ def _normalize_answer(ans):
         return [str(k).strip().upper() for k, v in data.items() if v]
     return data
 
+# ================== 答案缓存（按考试预编译） ==================
+
+# exam_id -> {"stamp": 建缓存时的 exams.updated_at, "variant_count": 试卷份数（exams.variant_count，0 为不分卷）,
+#             "assignments": {学号: 版本},
+#             "keys": {版本: {qid: {"type": 题型, "score": 分值, "correct": 归一化后的正确答案}}}}
+# keys 中每个版本已合并共有题目（variant_no = 0），判分时只需按学生取一个 dict
+_ANSWER_KEYS = {}
+_ANSWER_KEYS_LOCK = threading.Lock()
+
+def _compile_correct(q_type, raw):
+    """正确答案预处理：判断题为 bool，单/多选为排好序的大写列表"""
+    correct = _normalize_answer(raw)
+    if q_type == 'true_false':
+        return correct
+    corr_list = correct if isinstance(correct, list) else [str(correct).strip().upper()]
+    return sorted(corr_list)
+
+def _variant_of(exam_id, student_id, variant_count, assignments):
+    """
+    学生 -> 试卷版本：名单内按分配，名单外按 (考试, 学号) 散列；不分卷时为 0。
+    variant_count 为生成时记下的份数（不随改卷变化），同一学生取卷与交卷落在同一版本
+    """
+    if not variant_count:
+        return 0
+    sid = "" if student_id is None else str(student_id)
+    v = assignments.get(sid)
+    if v is not None:
+        return v
+    return 1 + zlib.crc32(f"{exam_id}:{sid}".encode("utf-8")) % variant_count
+
+def _load_assignments(exam_id, variant_count):
+    if not variant_count:
+        return {}
+    return dict(
+        db.session.query(ExamPaperAssignment.student_id, ExamPaperAssignment.variant_no)
+        .filter(ExamPaperAssignment.exam_id == exam_id)
+    )
+
+def ensure_variant_counts():
+    """启动时调用：旧库新增 variant_count 列后，按已生成的试卷补上份数（最大版本号）"""
+    if db.session.query(Exam.id).filter(Exam.variant_count.is_(None)).first() is None:
+        return
+    top = (select(func.coalesce(func.max(ExamQuestion.variant_no), 0))
+           .where(ExamQuestion.exam_id == Exam.id).scalar_subquery())
+    db.session.execute(update(Exam.__table__).where(Exam.variant_count.is_(None)).values(variant_count=top))
+    db.session.commit()
+
+# ================== 考试版本戳 ==================
+
+# 答案表与学生试卷缓存都记下建缓存时的 exams.updated_at，读取时与库中的值比较；
+# 不依赖进程内失效（多 worker 时改动可能发生在别的进程）
+_EXAM_STAMP = select(Exam.status, Exam.updated_at, Exam.variant_count).where(Exam.id == bindparam("exam_id"))
+
+def _exam_stamp(exam_id):
+    """(状态, updated_at, 试卷份数)，考试不存在时为 None；一次主键查询"""
+    return db.session.execute(_EXAM_STAMP, {"exam_id": exam_id}).first()
+
+def touch_exams(exam_ids=None, question_ids=None):
+    """
+    在当前事务中刷新考试的 updated_at（随改动一起提交）：exam_ids 为改卷的考试，
+    question_ids 为被修改/删除/合并的题目（刷新所有包含它们的考试）。考试行本身的 ORM 修改由 onupdate 自动刷新。
+    """
+    now = datetime.utcnow()
+    if exam_ids:
+        db.session.execute(update(Exam.__table__).where(Exam.id.in_(list(exam_ids))).values(updated_at=now))
+    if question_ids:
+        containing = select(ExamQuestion.exam_id).where(ExamQuestion.question_id.in_(list(question_ids)))
+        db.session.execute(update(Exam.__table__).where(Exam.id.in_(containing)).values(updated_at=now))
+
+def build_answer_key(exam_id):
+    """编译并缓存某场考试的答案表（发布考试时调用，也在缓存未命中或过期时调用）"""
+    exam = _exam_stamp(exam_id)
+    # 一次 JOIN 取回判分所需的列，不实例化 ORM 对象（与版本戳在同一读事务内，不会读到更新的试卷配旧版本戳）
+    rows = (
+        db.session.query(ExamQuestion.question_id, ExamQuestion.score, ExamQuestion.variant_no,
+                         Question.question_type, Question.correct_answer)
+        .join(Question, Question.id == ExamQuestion.question_id)
+        .filter(ExamQuestion.exam_id == exam_id)
+        .all()
+    )
+    by_variant = {0: {}}
+    for qid, score, variant_no, q_type, correct_answer in rows:
+        by_variant.setdefault(variant_no or 0, {})[qid] = {
+            "type": q_type,
+            "score": score,
+            "correct": _compile_correct(q_type, correct_answer),
+        }
+    common = by_variant.pop(0)
+    variant_count = (exam.variant_count or 0) if exam else 0
+    entry = {
+        "stamp": exam.updated_at if exam else None,
+        "variant_count": variant_count,
+        "assignments": _load_assignments(exam_id, variant_count),
+        # 0 为共有题，也是没有独有题的版本（改卷时被删空）的答案表，与 _render_paper 展示的题目一致
+        "keys": {0: common, **{v: {**common, **own} for v, own in by_variant.items()}},
+    }
+    with _ANSWER_KEYS_LOCK:
+        _ANSWER_KEYS[exam_id] = entry
+    return entry
+
+def get_answer_key(exam_id, student_id=None):
+    """返回该学生所答试卷版本的答案表；每次按主键核对考试的 updated_at，答案或试卷改过即重建"""
+    row = _exam_stamp(exam_id)
+    entry = _ANSWER_KEYS.get(exam_id)
+    if entry is None or entry["stamp"] != (row.updated_at if row else None):
+        entry = build_answer_key(exam_id)
+    v = _variant_of(exam_id, student_id, entry["variant_count"], entry["assignments"])
+    return entry["keys"].get(v, entry["keys"][0])
+
+def invalidate_answer_key(exam_id=None):
+    """试卷变更后失效；exam_id 为空时清空全部"""
+    with _ANSWER_KEYS_LOCK:
+        if exam_id is None:
+            _ANSWER_KEYS.clear()
+        else:
+            _ANSWER_KEYS.pop(exam_id, None)
+
+def invalidate_answer_keys_for_question(question_id):
+    """题目被修改/删除时，失效所有包含该题的考试答案表"""
+    with _ANSWER_KEYS_LOCK:
+        for exam_id in [eid for eid, entry in _ANSWER_KEYS.items()
+                        if any(question_id in key for key in entry["keys"].values())]:
+            _ANSWER_KEYS.pop(exam_id, None)
+
+# ================== 学生试卷缓存 ==================
+
+# exam_id -> {"stamp": 建缓存时的 exams.updated_at, "version": 内容版本, "exam": 考试信息,
+#             "questions": {qid: 归一化后的题目}, "variants": {版本: [qid, ...]},
+#             "variant_count": 试卷份数, "assignments": {学号: 版本}}
+# 内容版本由试卷组成（exam_questions 行）算出，各 worker、缓存重建前后都相同，只在改卷后变化。
+# 每次取卷先按主键读一次考试的状态与 updated_at（_exam_stamp）：其它进程关闭考试或改卷后，本进程的缓存随即作废
+_PAPERS = {}
+
+def _paper_content_version(rows):
+    return zlib.crc32(";".join(f"{row[0]}:{row[-1] or 0}" for row in rows).encode())
+
+def _build_paper(exam, stamp):
+    """一次查询取回题目并归一化选项，结果按考试缓存；stamp 为读取前的 exams.updated_at"""
+    rows = (
+        db.session.query(Question.id, Question.question_text, Question.question_type, Question.options,
+                         ExamQuestion.variant_no)
+        .join(ExamQuestion, ExamQuestion.question_id == Question.id)
+        .filter(ExamQuestion.exam_id == exam.id)
+        .order_by(ExamQuestion.id)
+        .all()
+    )
+    # 题目按 id 只归一化一次，各版本只记录 id 列表
+    questions, variants = {}, {0: []}
+    for qid, text, q_type, opts, variant_no in rows:
+        if qid not in questions:
+            questions[qid] = {"id": qid, "question_text": text, "question_type": q_type,
+                              "options": list(_normalize_options(opts).items())}
+        variants.setdefault(variant_no or 0, []).append(qid)
+    variant_count = exam.variant_count or 0
+    paper = {
+        "stamp": stamp,
+        "version": _paper_content_version(rows),
+        "exam": {
+            "id": exam.id,
+            "title": exam.title,
+            "duration_minutes": exam.duration_minutes,
+            "switch_limit": exam.switch_limit,
+            "is_randomized": bool(exam.is_randomized),
+        },
+        "questions": questions,
+        "variants": variants,
+        "variant_count": variant_count,
+        "assignments": _load_assignments(exam.id, variant_count),
+    }
+    with _ANSWER_KEYS_LOCK:
+        _PAPERS[exam.id] = paper
+    return paper
+
+def _render_paper(paper, student_id=None):
+    """取出学生对应版本的题目并做乱序：按学生 id 播种，刷新页面顺序不变"""
+    exam_id = paper["exam"]["id"]
+    ids = paper["variants"][0]
+    v = _variant_of(exam_id, student_id, paper["variant_count"], paper["assignments"])
+    if v:
+        ids = ids + paper["variants"].get(v, [])
+    questions = [paper["questions"][qid] for qid in ids]
+    if paper["exam"]["is_randomized"]:
+        rng = random.Random(f'{exam_id}:{paper["version"]}:{student_id}') if student_id is not None else random.Random()
+        rng.shuffle(questions)
+        q_list = []
+        for q in questions:
+            items = q["options"]
+            # 如需乱序，打乱键顺序后再重建 dict（保持是 dict）
+            if len(items) > 1:
+                items = items[:]
+                rng.shuffle(items)
+            q_list.append({**q, "options": dict(items)})
+    else:
+        q_list = [{**q, "options": dict(q["options"])} for q in questions]
+    return {**{k: v for k, v in paper["exam"].items() if k != "is_randomized"}, "questions": q_list}
+
+# ================== 随机组卷：题目 id 索引 ==================
+
+# creator_id -> {"sig": (题目数, 最大 id, 最后修改时间), "checked": 上次校验时间,
+#                "ids": {(题型, 分类 id): [id, ...]}, "by_type": {题型: [id, ...]}}
+_ID_INDEX = {}
+# 本进程内的题目增删改会立即失效索引；其它进程的写入靠签名校验发现，校验间隔为 ID_INDEX_TTL 秒。
+# 增删改变题目数或最大 id，改题型/分类（包括判重导入的 update 模式）刷新 updated_at
+ID_INDEX_TTL = 30
+
+def _id_index_signature(creator_id):
+    # 题目数与最大 id 走 ix_questions_creator_type_category 覆盖索引，最后修改时间走 ix_questions_creator_updated
+    last_update = select(func.max(Question.updated_at)).where(Question.creator_id == creator_id).scalar_subquery()
+    return tuple(
+        db.session.query(func.count(Question.id), func.max(Question.id), last_update)
+        .filter(Question.creator_id == creator_id).one()
+    )
+
+def get_question_id_index(creator_id, refresh=False):
+    """某教师题库按 (题型, 分类) 和按题型分组的题目 id"""
+    cached = _ID_INDEX.get(creator_id)
+    now = time.monotonic()
+    if cached and not refresh:
+        if now - cached["checked"] < ID_INDEX_TTL:
+            return cached
+        sig = _id_index_signature(creator_id)
+        if sig == cached["sig"]:
+            cached["checked"] = now
+            return cached
+    sig = _id_index_signature(creator_id)
+    ids, by_type = {}, {}
+    rows = db.session.query(Question.question_type, Question.category_id, Question.id)\
+        .filter(Question.creator_id == creator_id)
+    for q_type, cat_id, qid in rows:
+        ids.setdefault((q_type, cat_id), []).append(qid)
+        by_type.setdefault(q_type, []).append(qid)
+    entry = {"sig": sig, "checked": now, "ids": ids, "by_type": by_type}
+    with _ANSWER_KEYS_LOCK:
+        _ID_INDEX[creator_id] = entry
+    return entry
+
+def invalidate_question_id_index(creator_id=None):
+    with _ANSWER_KEYS_LOCK:
+        if creator_id is None:
+            _ID_INDEX.clear()
+        else:
+            _ID_INDEX.pop(creator_id, None)
+
+def _sample_from_index(index, config, cat_ids, rng):
+    errors = []
+    picked_by_type = {}
+    for q_type, conf in config.items():
+        total = int(conf.get("total", 0))
+        picked = []
+
+        # 先按分类抽
+        for cat_name, need in (conf.get("byCategory") or {}).items():
+            need = int(need)
+            cat_id = cat_ids.get(category_key(cat_name))
+            if cat_id is None:
+                continue
+            pool = index["ids"].get((q_type, cat_id), [])
+            if len(pool) < need:
+                errors.append(f"分类'{cat_name}'中'{q_type}'不足 {need} 道（现有 {len(pool)} 道）")
+                continue
+            picked.extend(rng.sample(pool, need))
+
+        # 再从该题型其余题目中补齐到 total
+        remain = max(0, total - len(picked))
+        if remain > 0:
+            pool = index["by_type"].get(q_type, [])
+            if len(pool) < total:
+                errors.append(f"题库中'{q_type}'题目不足 {total} 道（现有 {len(pool)} 道）")
+            else:
+                # 多抽 len(picked) 道再剔除已选的，保证剩余足够且无需复制整个题型列表
+                taken = set(picked)
+                extra = [qid for qid in rng.sample(pool, min(len(pool), remain + len(taken))) if qid not in taken]
+                picked.extend(extra[:remain])
+        picked_by_type[q_type] = picked
+    return picked_by_type, errors
+
+# 每份试卷与已生成的试卷题目完全相同时重抽的次数（题库太小时允许重复，不报错）
+DISTINCT_PAPER_ATTEMPTS = 5
+
+def _paper_signature(picked):
+    return frozenset(qid for ids in picked.values() for qid in ids)
+
+def sample_paper_variants(creator_id, random_config, count, rng=random):
+    """
+    按同一份 random_config 一次抽出 count 份试卷，返回 [{题型: [question_id, ...]}, ...]。
+    分类解析与题目 id 索引只做一次；各份之间尽量互不相同。
+    所有分类缺失/题量不足一次性汇总后抛出 ValueError。
+    """
+    config = random_config or {}
+    cat_names = {name for conf in config.values() for name in (conf.get("byCategory") or {})}
+    cat_ids = lookup_categories({category_key(n) for n in cat_names})
+    missing = [f"分类 '{n}' 不存在" for n in sorted(cat_names) if category_key(n) not in cat_ids]
+
+    for refresh in (False, True):
+        index = get_question_id_index(creator_id, refresh=refresh)
+        papers, seen, errors = [], set(), []
+        for _ in range(count):
+            for _attempt in range(DISTINCT_PAPER_ATTEMPTS):
+                picked, errors = _sample_from_index(index, config, cat_ids, rng)
+                if errors or _paper_signature(picked) not in seen:
+                    break
+            if errors:
+                break
+            seen.add(_paper_signature(picked))
+            papers.append(picked)
+        if errors and not refresh:
+            continue  # 题量不足可能是缓存落后于其它进程的新增，重建后再判断
+        if missing or errors:
+            raise ValueError("；".join(missing + errors))
+        # 抽中的题目需仍然存在（缓存可能落后于其它进程的删除），否则重建索引重抽一次
+        all_ids = list(set().union(*seen)) if seen else []
+        found = 0
+        for i in range(0, len(all_ids), 500):
+            found += db.session.query(func.count(Question.id)).filter(Question.id.in_(all_ids[i:i + 500])).scalar()
+        if found == len(all_ids):
+            break
+    return papers
+
+def sample_questions(creator_id, random_config, rng=random):
+    """按 random_config 在内存中无放回抽一份试卷，返回 {题型: [question_id, ...]}"""
+    return sample_paper_variants(creator_id, random_config, 1, rng)[0]
+
+# ================== 缓存失效 ==================
+
+def invalidate_exam_cache(exam_id=None):
+    """试卷题目/状态变化后调用：同时失效答案表与学生试卷"""
+    invalidate_answer_key(exam_id)
+    with _ANSWER_KEYS_LOCK:
+        if exam_id is None:
+            _PAPERS.clear()
+        else:
+            _PAPERS.pop(exam_id, None)
+
+def invalidate_exam_caches_for_question(question_id):
+    """题目被修改/删除时调用"""
+    invalidate_answer_keys_for_question(question_id)
+    invalidate_question_id_index()
+    with _ANSWER_KEYS_LOCK:
+        for exam_id in [eid for eid, p in _PAPERS.items() if question_id in p["questions"]]:
+            _PAPERS.pop(exam_id, None)
+
+def _grade_answer(entry, stu_ans):
+    """纯内存比对：entry 为答案表中的一项"""
+    if entry["type"] == 'true_false':
+        # 允许 True/False / "true"/"false" / ["True"] / [True]
+        if isinstance(stu_ans, list) and len(stu_ans) == 1:
+            stu = _normalize_answer(stu_ans[0])
+        else:
+            stu = _normalize_answer(stu_ans)
+        return stu == entry["correct"]
+    # 单/多选：统一成大写列表
+    if stu_ans is None or stu_ans == '':
+        stu_list = []
+    elif isinstance(stu_ans, list):
+        stu_list = [str(x).strip().upper() for x in stu_ans]
+    else:
+        stu_list = [str(stu_ans).strip().upper()]
+    return sorted(stu_list) == entry["correct"]
+
 # ================== 创建/编辑考试 ==================
 
+# 一次最多生成的试卷份数（一人一卷时即名单人数上限）
+MAX_PAPER_VARIANTS = 2000
+
+def _clean_roster(roster):
+    """名单去空、去重并保持顺序"""
+    return list(dict.fromkeys(str(s).strip() for s in (roster or []) if str(s).strip()))
+
+def _stage_paper_variants(exam_id, creator_id, random_config, score, count=None, roster=None):
+    """
+    在当前事务中为考试生成多份随机试卷：
+    有名单时一人一卷（名单第 i 人对应第 i 份），否则生成 count 份、学生按学号散列到各份。
+    """
+    roster = _clean_roster(roster)
+    count = len(roster) if roster else int(count or 0)
+    if count < 1:
+        raise ValueError("试卷份数必须大于 0")
+    if count > MAX_PAPER_VARIANTS:
+        raise ValueError(f"一次最多生成 {MAX_PAPER_VARIANTS} 份试卷")
+
+    papers = sample_paper_variants(creator_id, random_config, count)
+    rows = [{"exam_id": exam_id, "question_id": qid, "score": score, "variant_no": v}
+            for v, picked in enumerate(papers, 1) for ids in picked.values() for qid in ids]
+    if rows:
+        db.session.execute(ExamQuestion.__table__.insert(), rows)
+    if roster:
+        db.session.execute(ExamPaperAssignment.__table__.insert(),
+                           [{"exam_id": exam_id, "student_id": sid, "variant_no": v} for v, sid in enumerate(roster, 1)])
+    db.session.execute(update(Exam.__table__).where(Exam.id == exam_id).values(variant_count=count))
+    return count
+
+def _create_exam_tx(data, creator_id):
+    """创建考试的完整写事务（锁冲突时由 with_lock_retry 整体重试）"""
+    new_exam = Exam(
+        creator_id=creator_id,
+        title=data['title'],
+        start_time=datetime.utcnow() if not data.get('startTime') else datetime.fromisoformat(data['startTime']),
+        end_time=datetime.utcnow() if not data.get('endTime') else datetime.fromisoformat(data['endTime']),
+        duration_minutes=data['durationMinutes'],
+        status=ExamStatus.INACTIVE,
+        is_randomized=data.get('isRandomized', False),
+        switch_limit=data.get('switchLimit', 0)
+    )
+    db.session.add(new_exam)
+    db.session.flush()  # 拿到 exam.id
+
+    default_score = int(data.get('defaultScore', 5) or 5)
+
+    # 组卷
+    if 'random_config' in data:
+        # random_config 示例：
+        # {
+        #   "single": { "total": 5, "byCategory": {"基础":2, "语法":3} },
+        #   "multiple": { "total": 3 },
+        #   "true_false": { "total": 2, "byCategory": {"判断":2} }
+        # }
+        # 同时给出 paperCount（份数）或 roster（学号名单，一人一卷）时生成多份试卷
+        if data.get('roster') or data.get('paperCount'):
+            _stage_paper_variants(new_exam.id, creator_id, data['random_config'], default_score,
+                                  count=data.get('paperCount'), roster=data.get('roster'))
+        else:
+            picked = sample_questions(creator_id, data['random_config'])
+            rows = [{"exam_id": new_exam.id, "question_id": qid, "score": default_score}
+                    for ids in picked.values() for qid in ids]
+            if rows:
+                db.session.execute(ExamQuestion.__table__.insert(), rows)
+    elif 'question_ids' in data:
+        for q_id in data['question_ids']:
+            db.session.add(ExamQuestion(
+                exam_id=new_exam.id,
+                question_id=q_id,
+                score=default_score
+            ))
+
+    db.session.commit()
+    return {"success": True, "message": "考试创建成功", "exam_id": new_exam.id}
+
 def create_exam(data, creator_id):
     """创建一场新考试（支持按分类随机抽题）"""
     try:
-        new_exam = Exam(
-            creator_id=creator_id,
-            title=data['title'],
-            start_time=datetime.utcnow() if not data.get('startTime') else datetime.fromisoformat(data['startTime']),
-            end_time=datetime.utcnow() if not data.get('endTime') else datetime.fromisoformat(data['endTime']),
-            duration_minutes=data['durationMinutes'],
-            status=ExamStatus.INACTIVE,
-            is_randomized=data.get('isRandomized', False),
-            switch_limit=data.get('switchLimit', 0)
-        )
-        db.session.add(new_exam)
-        db.session.flush()  # 拿到 exam.id
-
-        default_score = int(data.get('defaultScore', 5) or 5)
-
-        # 组卷
-        if 'random_config' in data:
-            # random_config 示例：
-            # {
-            #   "single": { "total": 5, "byCategory": {"基础":2, "语法":3} },
-            #   "multiple": { "total": 3 },
-            #   "true_false": { "total": 2, "byCategory": {"判断":2} }
-            # }
-            config = data['random_config'] or {}
-            for q_type, conf in config.items():
-                total = int(conf.get("total", 0))
-                by_cat = conf.get("byCategory") or {}
-                picked = []
-
-                # 先按分类抽
-                for cat_name, need in by_cat.items():
-                    cat = Category.query.filter_by(name=cat_name).first()
-                    if not cat:
-                        raise ValueError(f"分类 '{cat_name}' 不存在")
-                    qs = (
-                        Question.query
-                        .filter_by(question_type=q_type, category_id=cat.id, creator_id=creator_id)
-                        .order_by(func.random())
-                        .limit(int(need))
-                        .all()
-                    )
-                    if len(qs) < int(need):
-                        raise ValueError(f"分类'{cat_name}'中'{q_type}'不足 {need} 道")
-                    picked.extend(qs)
-
-                # 再补齐到 total
-                remain = max(0, total - len(picked))
-                if remain > 0:
-                    extra = (
-                        Question.query
-                        .filter_by(question_type=q_type, creator_id=creator_id)
-                        .filter(~Question.id.in_([q.id for q in picked]))
-                        .order_by(func.random()).limit(remain).all()
-                    )
-                    if len(extra) < remain:
-                        raise ValueError(f"题库中'{q_type}'题目不足 {total} 道")
-                    picked.extend(extra)
-
-                for q in picked:
-                    db.session.add(ExamQuestion(
-                        exam_id=new_exam.id,
-                        question_id=q.id,
-                        score=default_score
-                    ))
-        elif 'question_ids' in data:
-            for q_id in data['question_ids']:
-                db.session.add(ExamQuestion(
-                    exam_id=new_exam.id,
-                    question_id=q_id,
-                    score=default_score
-                ))
+        return with_lock_retry(_create_exam_tx, data, creator_id)
+    except Exception as e:
+        db.session.rollback()
+        return {"success": False, "message": str(e)}
 
-        db.session.commit()
-        return {"success": True, "message": "考试创建成功", "exam_id": new_exam.id}
+def _regenerate_variants_tx(exam_id, data):
+    exam = db.session.get(Exam, exam_id)
+    if not exam:
+        return {"success": False, "message": "考试不存在"}
+    if db.session.query(ExamAttempt.id).filter_by(exam_id=exam_id).first():
+        return {"success": False, "message": "已有学生交卷，不能重新生成试卷"}
+    if not data.get('random_config'):
+        return {"success": False, "message": "缺少 random_config"}
+
+    ExamQuestion.query.filter_by(exam_id=exam_id).delete(synchronize_session=False)
+    ExamPaperAssignment.query.filter_by(exam_id=exam_id).delete(synchronize_session=False)
+    count = _stage_paper_variants(exam_id, exam.creator_id, data['random_config'],
+                                  int(data.get('defaultScore', 5) or 5),
+                                  count=data.get('paperCount'), roster=data.get('roster'))
+    touch_exams([exam_id])
+    db.session.commit()
+    return {"success": True, "message": f"已生成 {count} 份试卷", "paper_count": count}
+
+def generate_exam_variants(exam_id, data):
+    """为已创建的考试（重新）生成多份随机试卷；data 同创建考试的 random_config / paperCount / roster"""
+    try:
+        result = with_lock_retry(_regenerate_variants_tx, exam_id, data)
     except Exception as e:
         db.session.rollback()
         return {"success": False, "message": str(e)}
+    if result.get("success"):
+        invalidate_exam_cache(exam_id)
+    return result
 
 def update_exam_questions(exam_id, updates, defaultScore=None):
     """
@@ -166,7 +565,16 @@ def update_exam_questions(exam_id, updates, defaultScore=None):
             # 批量设置（存在的全部改为 defaultScore）
             db.session.query(ExamQuestion).filter_by(exam_id=exam_id).update({"score": int(defaultScore)}, synchronize_session=False)
 
+        # 改卷后不再分卷（如 replace 后全部为共有题）时，分卷名单与份数随改卷一并清除；
+        # 仍分卷时份数不变（学生不会换卷），独有题被删空的版本按共有题作答与判分
+        db.session.flush()
+        if not db.session.query(ExamQuestion.id).filter(ExamQuestion.exam_id == exam_id, ExamQuestion.variant_no > 0).first():
+            ExamPaperAssignment.query.filter_by(exam_id=exam_id).delete(synchronize_session=False)
+            exam.variant_count = 0
+        touch_exams([exam_id])
+
         db.session.commit()
+        invalidate_exam_cache(exam_id)
         return {"success": True, "message": "试卷题目已更新"}
     except Exception as e:
         db.session.rollback()
@@ -174,119 +582,124 @@ def update_exam_questions(exam_id, updates, defaultScore=None):
 
 # ================== 学生端试卷视图 ==================
 
-def get_exam_for_student(exam_id):
+def get_exam_for_student(exam_id, student_id=None):
     """返回给学生答题的试卷（保证 options 始终为 dict，避免前端判分错配）"""
-    exam = Exam.query.get(exam_id)
-    if not exam:
+    # 状态每次以库为准（多 worker 时关闭考试的请求可能落在别的进程）
+    row = _exam_stamp(exam_id)
+    if row is None:
         return {"success": False, "message": "考试不存在"}
-    if exam.status != ExamStatus.ACTIVE:
+    status, stamp = row.status, row.updated_at
+    if status != ExamStatus.ACTIVE:
         return {"success": False, "message": "考试未开放"}
+    paper = _PAPERS.get(exam_id)
+    if paper is None or paper["stamp"] != stamp:
+        # 只缓存已发布的考试；考试或试卷变化后 updated_at 变化，缓存按需重建
+        paper = _build_paper(db.session.get(Exam, exam_id), stamp)
 
-    exam_questions = ExamQuestion.query.filter_by(exam_id=exam_id).all()
-    questions = [eq.question for eq in exam_questions]
-
-    if exam.is_randomized:
-        random.shuffle(questions)
-
-    q_list = []
-    for q in questions:
-        opts = _normalize_options(q.options)
-        # 如需乱序，打乱键顺序后再重建 dict（保持是 dict）
-        if exam.is_randomized and len(opts) > 1:
-            items = list(opts.items())
-            random.shuffle(items)
-            opts = {k: v for k, v in items}
-
-        q_list.append({
-            "id": q.id,
-            "question_text": q.question_text,
-            "question_type": q.question_type,
-            "options": opts  # 始终返回 dict
-        })
-
-    return {
-        "success": True,
-        "exam": {
-            "id": exam.id,
-            "title": exam.title,
-            "duration_minutes": exam.duration_minutes,
-            "switch_limit": exam.switch_limit,
-            "questions": q_list
-        }
-    }
+    return {"success": True, "exam": _render_paper(paper, student_id)}
 
 # ================== 提交判分（更健壮） ==================
 
-def submit_and_grade_exam(exam_id, student_id, answers_data):
-    """接收答案并判分（修复各种格式导致的误判）"""
-    try:
-        # 防止重复提交
-        if ExamAttempt.query.filter_by(student_id=student_id, exam_id=exam_id).first():
-            return {"success": False, "message": "您已提交过"}
-
-        exam_questions = ExamQuestion.query.filter_by(exam_id=exam_id).all()
-        q_map = {eq.question_id: (eq.question, eq.score) for eq in exam_questions}
-        total = 0
-
-        attempt = ExamAttempt(
-            student_id=student_id,
-            exam_id=exam_id,
-            submit_time=datetime.utcnow(),
-            switch_count=answers_data.get('switchCount', 0),
-            final_score=0
-        )
-        db.session.add(attempt)
-        db.session.flush()
+def grade_answers(answer_key, answers):
+    """纯内存判分，返回 (总分, 答题记录列表)；记录不含 attempt_id"""
+    # 兼容：answers 的 key 可能是 int 或 str
+    normalized_answers = {}
+    for k, v in (answers or {}).items():
+        try:
+            normalized_answers[int(k)] = v
+        except Exception:
+            continue
+
+    total = 0
+    rows = []
+    for qid, entry in answer_key.items():
+        if qid not in normalized_answers:
+            stu_ans = [] if entry["type"] == 'multiple' else None
+        else:
+            stu_ans = normalized_answers[qid]
 
-        # 兼容：answers 的 key 可能是 int 或 str
-        answers = answers_data.get('answers', {}) or {}
-        normalized_answers = {}
-        for k, v in answers.items():
-            try:
-                normalized_answers[int(k)] = v
-            except Exception:
-                continue
+        is_correct = _grade_answer(entry, stu_ans)
+        if is_correct:
+            total += entry["score"]
 
-        for qid, (question, score) in q_map.items():
-            if qid not in normalized_answers:
-                stu_ans = [] if question.question_type == 'multiple' else None
-            else:
-                stu_ans = normalized_answers[qid]
-
-            correct = _normalize_answer(question.correct_answer)
-
-            # 统一学生答案格式
-            if question.question_type == 'true_false':
-                # 允许 True/False / "true"/"false" / ["True"] / [True]
-                if isinstance(stu_ans, list) and len(stu_ans) == 1:
-                    stu = _normalize_answer(stu_ans[0])
-                else:
-                    stu = _normalize_answer(stu_ans)
-                is_correct = (stu == correct)
-            else:
-                # 单/多选：统一成大写列表
-                if stu_ans is None or stu_ans == '':
-                    stu_list = []
-                elif isinstance(stu_ans, list):
-                    stu_list = [str(x).strip().upper() for x in stu_ans]
-                else:
-                    stu_list = [str(stu_ans).strip().upper()]
-                corr_list = correct if isinstance(correct, list) else [str(correct).strip().upper()]
-                is_correct = sorted(stu_list) == sorted(corr_list)
-
-            if is_correct:
-                total += score
-
-            db.session.add(StudentAnswer(
-                attempt_id=attempt.id,
-                question_id=qid,
-                student_answer=stu_ans if isinstance(stu_ans, list) else [stu_ans] if stu_ans not in (None, '') else [],
-                is_correct=bool(is_correct)
-            ))
+        rows.append({
+            "question_id": qid,
+            "student_answer": stu_ans if isinstance(stu_ans, list) else [stu_ans] if stu_ans not in (None, '') else [],
+            "is_correct": bool(is_correct),
+        })
+    return total, rows
+
+def _stage_submission(exam_id, student_id, answers_data):
+    """判分并写入当前事务（不提交）；重复提交返回失败结果"""
+    # 防止重复提交
+    if db.session.query(ExamAttempt.id).filter_by(student_id=student_id, exam_id=exam_id).first():
+        return {"success": False, "message": "您已提交过"}
+
+    answer_key = get_answer_key(exam_id, student_id)
+    total, rows = grade_answers(answer_key, answers_data.get('answers'))
+
+    # 先算好总分，提交记录只写一次；答题记录 executemany 批量写入
+    now = datetime.utcnow()
+    result = db.session.execute(ExamAttempt.__table__.insert().values(
+        student_id=student_id,
+        exam_id=exam_id,
+        submit_time=now,
+        switch_count=answers_data.get('switchCount', 0),
+        final_score=total
+    ))
+    attempt_id = result.inserted_primary_key[0]
+    if rows:
+        for row in rows:
+            row["attempt_id"] = attempt_id
+        db.session.execute(StudentAnswer.__table__.insert(), rows)
+    # 题目分析用的作答压缩块
+    db.session.execute(AttemptResponse.__table__.insert().values(
+        attempt_id=attempt_id, exam_id=exam_id, codes=pack_responses(answer_key, rows)))
+    # 同一事务内累加考试/题目统计与学生汇总/错题索引
+    record_attempt_stats(exam_id, total, rows)
+    record_student_stats(student_id, exam_id, attempt_id, total, rows, now)
+    return {"success": True, "message": "交卷成功", "score": total}
 
-        attempt.final_score = total
+def submit_and_grade_exam(exam_id, student_id, answers_data):
+    """接收答案并判分（修复各种格式导致的误判）"""
+    def _tx():
+        result = _stage_submission(exam_id, student_id, answers_data)
         db.session.commit()
-        return {"success": True, "message": "交卷成功", "score": total}
+        return result
+
+    try:
+        return with_lock_retry(_tx)
+    except IntegrityError:
+        # 并发重复提交被唯一索引拦截
+        db.session.rollback()
+        return {"success": False, "message": "您已提交过"}
     except Exception as e:
         db.session.rollback()
         return {"success": False, "message": f"提交失败: {str(e)}"}
+
+def submit_and_grade_batch(items, commit=True):
+    """
+    批量交卷：items = [(exam_id, student_id, answers_data), ...]
+    全部在同一事务内写入；单条出错只回滚到它自己的 SAVEPOINT，不影响其它。
+    commit=False 时由调用方负责提交（例如与队列状态一起提交）。
+    """
+    results = []
+    try:
+        for exam_id, student_id, answers_data in items:
+            savepoint = db.session.begin_nested()
+            try:
+                res = _stage_submission(exam_id, student_id, answers_data)
+                savepoint.commit()
+            except IntegrityError:
+                savepoint.rollback()
+                res = {"success": False, "message": "您已提交过"}
+            except Exception as e:
+                savepoint.rollback()
+                res = {"success": False, "message": f"提交失败: {str(e)}"}
+            results.append(res)
+        if commit:
+            db.session.commit()
+        return results
+    except Exception:
+        db.session.rollback()
+        raise
@@ -0,0 +1,226 @@
+# backend/exam_stats.py
+# 增量统计：交卷时在同一事务内累加 exam_stats / question_stats（按考试）
+# 以及 student_stats / student_wrong_questions（按学生），
+# 统计接口只读这些表，rebuild_exam_stats() / rebuild_student_stats() 可从原始表整体重算
+from sqlalchemy import func, case, select, text, delete
+from sqlalchemy.dialects.sqlite import insert
+
+from models import db, ExamAttempt, StudentAnswer, ExamStats, QuestionStats, StudentStats, StudentWrongQuestion
+
+SCORE_RANGES = [(0,59), (60,69), (70,79), (80,89), (90,100)]
+BUCKET_COLUMNS = [f"bucket_{i}" for i in range(len(SCORE_RANGES))]
+RECENT_SCORES_LIMIT = 20      # 成绩趋势保留最近多少次
+REBUILD_CHUNK = 500
+
+def record_attempt_stats(exam_id, score, answer_rows):
+    """在当前事务中累加一次提交；answer_rows 为 grade_answers 产出的答题记录"""
+    score = float(score or 0)
+    values = {
+        "exam_id": exam_id,
+        "attempt_count": 1,
+        "score_sum": score,
+        "score_sq_sum": score * score,
+        "min_score": score,
+        "max_score": score,
+    }
+    for col, (lo, hi) in zip(BUCKET_COLUMNS, SCORE_RANGES):
+        values[col] = 1 if lo <= score <= hi else 0
+
+    stmt = insert(ExamStats).values(**values)
+    ex = stmt.excluded
+    updates = {
+        "attempt_count": ExamStats.attempt_count + ex.attempt_count,
+        "score_sum": ExamStats.score_sum + ex.score_sum,
+        "score_sq_sum": ExamStats.score_sq_sum + ex.score_sq_sum,
+        # SQLite 的双参数 min()/max() 为标量函数
+        "min_score": func.min(func.coalesce(ExamStats.min_score, ex.min_score), ex.min_score),
+        "max_score": func.max(func.coalesce(ExamStats.max_score, ex.max_score), ex.max_score),
+    }
+    for col in BUCKET_COLUMNS:
+        updates[col] = getattr(ExamStats, col) + getattr(ex, col)
+    db.session.execute(stmt.on_conflict_do_update(index_elements=[ExamStats.exam_id], set_=updates))
+
+    if answer_rows:
+        q_stmt = insert(QuestionStats)
+        db.session.execute(
+            q_stmt.on_conflict_do_update(
+                index_elements=[QuestionStats.exam_id, QuestionStats.question_id],
+                set_={
+                    "correct_count": QuestionStats.correct_count + q_stmt.excluded.correct_count,
+                    "total_count": QuestionStats.total_count + q_stmt.excluded.total_count,
+                },
+            ),
+            [{"exam_id": exam_id, "question_id": r["question_id"],
+              "correct_count": 1 if r["is_correct"] else 0, "total_count": 1} for r in answer_rows],
+        )
+
+def _recent_entry(exam_id, score, submit_time):
+    return [exam_id, score, submit_time.isoformat(timespec="seconds") if submit_time else None]
+
+def record_student_stats(student_id, exam_id, attempt_id, score, answer_rows, submit_time):
+    """在当前事务中更新学生成绩汇总与错题索引"""
+    student_id = str(student_id)
+    score = float(score or 0)
+    stmt = insert(StudentStats).values(
+        student_id=student_id,
+        exam_count=1,
+        score_sum=score,
+        best_score=score,
+        worst_score=score,
+        recent_scores=[_recent_entry(exam_id, score, submit_time)],
+        last_submit_time=submit_time,
+    )
+    ex = stmt.excluded
+    # 最近成绩在 SQLite 内追加到 JSON 数组末尾，超出上限时去掉最旧的一条（$[#] 需 SQLite 3.31+）
+    appended = func.json_insert(StudentStats.recent_scores, "$[#]", func.json(func.json_extract(ex.recent_scores, "$[0]")))
+    db.session.execute(stmt.on_conflict_do_update(index_elements=[StudentStats.student_id], set_={
+        "exam_count": StudentStats.exam_count + ex.exam_count,
+        "score_sum": StudentStats.score_sum + ex.score_sum,
+        "best_score": func.max(func.coalesce(StudentStats.best_score, ex.best_score), ex.best_score),
+        "worst_score": func.min(func.coalesce(StudentStats.worst_score, ex.worst_score), ex.worst_score),
+        "recent_scores": case(
+            (func.json_array_length(StudentStats.recent_scores) >= RECENT_SCORES_LIMIT, func.json_remove(appended, "$[0]")),
+            else_=appended,
+        ),
+        "last_submit_time": func.max(func.coalesce(StudentStats.last_submit_time, ex.last_submit_time), ex.last_submit_time),
+    }))
+
+    wrong = [r for r in answer_rows or () if not r["is_correct"]]
+    if wrong:
+        w_stmt = insert(StudentWrongQuestion)
+        wx = w_stmt.excluded
+        db.session.execute(
+            w_stmt.on_conflict_do_update(
+                index_elements=[StudentWrongQuestion.student_id, StudentWrongQuestion.question_id],
+                set_={
+                    "wrong_count": StudentWrongQuestion.wrong_count + wx.wrong_count,
+                    "last_exam_id": wx.last_exam_id,
+                    "last_attempt_id": wx.last_attempt_id,
+                    "last_answer": wx.last_answer,
+                    "last_wrong_time": wx.last_wrong_time,
+                },
+            ),
+            [{"student_id": student_id, "question_id": r["question_id"], "wrong_count": 1,
+              "last_exam_id": exam_id, "last_attempt_id": attempt_id,
+              "last_answer": r["student_answer"], "last_wrong_time": submit_time} for r in wrong],
+        )
+
+def exam_stats_row(stats):
+    """ExamStats -> 接口字段（含由平方和推出的标准差）"""
+    n = stats.attempt_count if stats else 0
+    if not n:
+        return {"attempts": 0, "avg_score": 0.0, "min_score": 0.0, "max_score": 0.0, "std_score": 0.0}
+    avg = stats.score_sum / n
+    var = max(stats.score_sq_sum / n - avg * avg, 0.0)
+    return {
+        "attempts": int(n),
+        "avg_score": float(avg),
+        "min_score": float(stats.min_score or 0),
+        "max_score": float(stats.max_score or 0),
+        "std_score": float(var ** 0.5),
+    }
+
+def rebuild_exam_stats():
+    """从 exam_attempts / student_answers 整体重算两张统计表（修复用）"""
+    db.session.query(QuestionStats).delete(synchronize_session=False)
+    db.session.query(ExamStats).delete(synchronize_session=False)
+
+    score = ExamAttempt.final_score
+    exam_cols = [
+        ExamAttempt.exam_id,
+        func.count(ExamAttempt.id),
+        func.coalesce(func.sum(score), 0),
+        func.coalesce(func.sum(score * score), 0),
+        func.min(score),
+        func.max(score),
+    ] + [func.sum(case((score.between(lo, hi), 1), else_=0)) for lo, hi in SCORE_RANGES]
+    db.session.execute(
+        insert(ExamStats).from_select(
+            ["exam_id", "attempt_count", "score_sum", "score_sq_sum", "min_score", "max_score", *BUCKET_COLUMNS],
+            db.session.query(*exam_cols).group_by(ExamAttempt.exam_id),
+        )
+    )
+
+    q_cols = [
+        ExamAttempt.exam_id,
+        StudentAnswer.question_id,
+        func.sum(case((StudentAnswer.is_correct == True, 1), else_=0)),  # noqa: E712
+        func.count(StudentAnswer.id),
+    ]
+    db.session.execute(
+        insert(QuestionStats).from_select(
+            ["exam_id", "question_id", "correct_count", "total_count"],
+            db.session.query(*q_cols)
+            .join(ExamAttempt, ExamAttempt.id == StudentAnswer.attempt_id)
+            .group_by(ExamAttempt.exam_id, StudentAnswer.question_id),
+        )
+    )
+    db.session.commit()
+
+# 最近 N 次成绩：按提交时间取最后 N 条再正序拼成 JSON 数组（走 (student_id, exam_id) 索引）
+_RECENT_SCORES_SQL = text("""
+    UPDATE student_stats SET recent_scores = (
+        SELECT json_group_array(json(entry)) FROM (
+            SELECT entry FROM (
+                SELECT json_array(exam_id, final_score, strftime('%Y-%m-%dT%H:%M:%S', submit_time)) AS entry,
+                       submit_time, id
+                FROM exam_attempts WHERE student_id = student_stats.student_id
+                ORDER BY submit_time DESC, id DESC LIMIT :limit
+            ) ORDER BY submit_time, id
+        )
+    )
+""")
+
+def rebuild_wrong_questions(question_ids=None):
+    """重算错题索引；question_ids 非空时只重算这些题目（题目合并后调用），不提交"""
+    sa, a = StudentAnswer, ExamAttempt
+    # SQLite 中与 max() 同查的裸列取自 max 所在的那一行，即每组最近一次答错的提交
+    query = (
+        select(a.student_id, sa.question_id, func.count(sa.id), a.exam_id, func.max(a.id),
+               sa.student_answer, a.submit_time)
+        .join(a, a.id == sa.attempt_id)
+        .where(sa.is_correct == False)  # noqa: E712
+        .group_by(a.student_id, sa.question_id)
+    )
+    columns = ["student_id", "question_id", "wrong_count", "last_exam_id", "last_attempt_id",
+               "last_answer", "last_wrong_time"]
+    if question_ids is None:
+        db.session.execute(delete(StudentWrongQuestion))
+        db.session.execute(insert(StudentWrongQuestion).from_select(columns, query))
+        return
+    question_ids = list(question_ids)
+    for i in range(0, len(question_ids), REBUILD_CHUNK):
+        chunk = question_ids[i:i + REBUILD_CHUNK]
+        db.session.execute(delete(StudentWrongQuestion).where(StudentWrongQuestion.question_id.in_(chunk)))
+        db.session.execute(insert(StudentWrongQuestion).from_select(columns, query.where(sa.question_id.in_(chunk))))
+
+def rebuild_student_stats():
+    """从 exam_attempts / student_answers 整体重算学生成绩汇总与错题索引（修复用）"""
+    db.session.query(StudentStats).delete(synchronize_session=False)
+    score = ExamAttempt.final_score
+    db.session.execute(
+        insert(StudentStats).from_select(
+            ["student_id", "exam_count", "score_sum", "best_score", "worst_score", "recent_scores", "last_submit_time"],
+            db.session.query(
+                ExamAttempt.student_id,
+                func.count(ExamAttempt.id),
+                func.coalesce(func.sum(score), 0),
+                func.max(score),
+                func.min(score),
+                func.json_array(),
+                func.max(ExamAttempt.submit_time),
+            ).group_by(ExamAttempt.student_id),
+        )
+    )
+    db.session.execute(_RECENT_SCORES_SQL, {"limit": RECENT_SCORES_LIMIT})
+    rebuild_wrong_questions()
+    db.session.commit()
+
+def ensure_exam_stats():
+    """启动时调用：旧库升级后统计表为空但已有提交记录，则自动重算一次"""
+    if db.session.query(ExamAttempt.id).first() is None:
+        return
+    if db.session.query(ExamStats.exam_id).first() is None:
+        rebuild_exam_stats()
+    if db.session.query(StudentStats.student_id).first() is None:
+        rebuild_student_stats()
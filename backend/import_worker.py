@@ -0,0 +1,84 @@
+# backend/import_worker.py
+# 后台导入：上传接口只保存文件并登记 import_jobs（已登记即持久化），立即返回任务号；
+# 本进程的后台线程领取任务、按块导入。进程重启后，心跳（updated_at）超时的任务会被重新领取并续传。
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update, or_, and_
+
+from models import db, ImportJob
+from question_importer import run_import_job
+
+POLL_INTERVAL = 1.0                    # 无任务时的轮询间隔（秒）
+# running 状态超过该时间没有心跳视为执行进程已退出；执行中每 HEARTBEAT_INTERVAL 秒刷新一次心跳
+STALE_TIMEOUT = timedelta(minutes=2)
+
+_workers = []
+_stop = threading.Event()
+_wakeup = threading.Event()
+
+def notify_import_workers():
+    """新任务入库后唤醒本进程的后台线程，省去一次轮询等待"""
+    _wakeup.set()
+
+def _claim_job():
+    """原子地领取一个待执行（或执行进程已失联）的任务，返回 (任务 id, 领取令牌)"""
+    token = uuid.uuid4().hex
+    now = datetime.utcnow()
+    candidate = (
+        select(ImportJob.id)
+        .where(or_(
+            ImportJob.status == "pending",
+            and_(ImportJob.status == "running", ImportJob.updated_at < now - STALE_TIMEOUT),
+        ))
+        .order_by(ImportJob.id)
+        .limit(1)
+    )
+    db.session.execute(
+        update(ImportJob)
+        .where(ImportJob.id.in_(candidate))
+        .values(status="running", claimed_by=token, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return db.session.query(ImportJob.id).filter_by(claimed_by=token).scalar(), token
+
+def run_next_job():
+    """领取并执行一个任务，返回任务 id；没有任务时返回 None"""
+    job_id, token = _claim_job()
+    if job_id is not None:
+        run_import_job(job_id, token)
+    return job_id
+
+def _worker_loop(app):
+    while not _stop.is_set():
+        with app.app_context():
+            try:
+                job_id = run_next_job()
+            except Exception as e:
+                db.session.rollback()
+                app.logger.warning("import job failed: %s", e)
+                job_id = None
+            finally:
+                db.session.remove()
+        if job_id is None:
+            _wakeup.wait(POLL_INTERVAL)
+            _wakeup.clear()
+
+def start_import_workers(app, workers=1):
+    """启动后台导入线程（daemon），重复调用不会重复启动"""
+    if _workers:
+        return
+    _stop.clear()
+    for i in range(max(1, int(workers))):
+        t = threading.Thread(target=_worker_loop, args=(app,), name=f"import-worker-{i}", daemon=True)
+        t.start()
+        _workers.append(t)
+
+def stop_import_workers(timeout=5):
+    _stop.set()
+    _wakeup.set()
+    for t in _workers:
+        t.join(timeout)
+    _workers.clear()
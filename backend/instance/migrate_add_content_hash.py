@@ -0,0 +1,39 @@
+# migrate_add_content_hash.py
+# 增加 questions.content_hash 列及 (creator_id, content_hash) 索引（导入判重用）；指纹由应用启动时补算，
+# 历史重复题目用 dedupe_questions.py 合并。需在升级后首次启动应用之前执行。
+# 用法：python migrate_add_content_hash.py [数据库路径]
+import sqlite3, os, sys
+
+DB_PATH = os.path.join(os.path.dirname(__file__), "exam_system.db") # ← 改成绝对路径
+
+def column_exists(conn, table, column):
+    cur = conn.execute(f"PRAGMA table_info({table});")
+    return any(row[1] == column for row in cur.fetchall())
+
+def main():
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    if not os.path.exists(db_path):
+        print(f"[ERROR] DB not found: {db_path}")
+        return
+    conn = sqlite3.connect(db_path)
+    try:
+        cur = conn.cursor()
+        if not column_exists(conn, "questions", "content_hash"):
+            cur.execute("ALTER TABLE questions ADD COLUMN content_hash VARCHAR(40);")
+            print("[OK] questions.content_hash added")
+        else:
+            print("[SKIP] questions.content_hash already exists")
+        # 判重按出题人进行；早期版本建的单列索引由复合索引取代
+        cur.execute("CREATE INDEX IF NOT EXISTS ix_questions_creator_hash ON questions (creator_id, content_hash);")
+        print("[OK] ix_questions_creator_hash ready")
+        cur.execute("DROP INDEX IF EXISTS ix_questions_content_hash;")
+        conn.commit()
+        print("[DONE] migration completed")
+    except Exception as e:
+        conn.rollback()
+        print("[ERROR]", e)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# migrate_add_exam_variants.py
+# “一人一卷”：增加 exam_questions.variant_no 列（旧数据为 0，即所有学生共用）及 (exam_id, variant_no) 索引；
+# exam_paper_assignments 表由应用启动时 db.create_all() 创建。需在升级后首次启动应用之前执行。
+# 用法：python migrate_add_exam_variants.py [数据库路径]
+import sqlite3, os, sys
+
+DB_PATH = os.path.join(os.path.dirname(__file__), "exam_system.db") # ← 改成绝对路径
+
+def column_exists(conn, table, column):
+    cur = conn.execute(f"PRAGMA table_info({table});")
+    return any(row[1] == column for row in cur.fetchall())
+
+def main():
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    if not os.path.exists(db_path):
+        print(f"[ERROR] DB not found: {db_path}")
+        return
+    conn = sqlite3.connect(db_path)
+    try:
+        cur = conn.cursor()
+        if not column_exists(conn, "exam_questions", "variant_no"):
+            cur.execute("ALTER TABLE exam_questions ADD COLUMN variant_no INTEGER NOT NULL DEFAULT 0;")
+            print("[OK] exam_questions.variant_no added")
+        else:
+            print("[SKIP] exam_questions.variant_no already exists")
+        cur.execute("CREATE INDEX IF NOT EXISTS ix_exam_questions_exam_variant ON exam_questions (exam_id, variant_no);")
+        print("[OK] ix_exam_questions_exam_variant ready")
+        conn.commit()
+        print("[DONE] migration completed")
+    except Exception as e:
+        conn.rollback()
+        print("[ERROR]", e)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# migrate_add_indexes.py
+# 为热点查询列补建索引（与 models.py 中声明的一致），并用 EXPLAIN QUERY PLAN 校验
+# 用法：python migrate_add_indexes.py [数据库路径]
+import sqlite3, os, sys
+
+DB_PATH = os.path.join(os.path.dirname(__file__), "exam_system.db") # ← 改成绝对路径
+
+# (索引名, 表, 列, 是否唯一)
+INDEXES = [
+    ("ix_exam_questions_exam_id", "exam_questions", "exam_id", False),
+    ("ix_student_answers_attempt_id", "student_answers", "attempt_id", False),
+    ("ix_exam_attempts_exam_id", "exam_attempts", "exam_id", False),
+    ("uq_exam_attempts_student_exam", "exam_attempts", "student_id, exam_id", True),
+    ("ix_questions_creator_type_category", "questions", "creator_id, question_type, category_id", False),
+    ("ix_categories_name_lower", "categories", "lower(name)", False),
+    ("ix_exam_attempts_exam_submit_key", "exam_attempts", "exam_id, coalesce(submit_time, '')", False),
+    ("ix_exam_attempts_exam_score", "exam_attempts", "exam_id, final_score", False),
+    ("ix_exam_attempts_exam_switch_key", "exam_attempts", "exam_id, coalesce(switch_count, 0)", False),
+]
+
+# 被上面表达式索引取代的旧索引（提交明细改按 coalesce 后的值排序，旧索引不再被使用）
+SUPERSEDED_INDEXES = ["ix_exam_attempts_exam_submit", "ix_exam_attempts_exam_switch"]
+
+# 热点查询 -> 期望命中的索引
+HOT_QUERIES = [
+    ("SELECT * FROM exam_questions WHERE exam_id = 1", "ix_exam_questions_exam_id"),
+    ("SELECT * FROM student_answers WHERE attempt_id = 1", "ix_student_answers_attempt_id"),
+    ("SELECT * FROM exam_attempts WHERE exam_id = 1", "ix_exam_attempts_exam_id"),
+    ("SELECT id FROM exam_attempts WHERE student_id = 1 AND exam_id = 1", "uq_exam_attempts_student_exam"),
+    ("SELECT id FROM questions WHERE creator_id = 1 AND question_type = 'single' AND category_id = 1",
+     "ix_questions_creator_type_category"),
+    ("SELECT id FROM categories WHERE lower(name) = 'python'", "ix_categories_name_lower"),
+    ("SELECT id FROM exam_attempts WHERE exam_id = 1 AND (coalesce(submit_time, ''), id) < ('2024-01-01', 100) "
+     "ORDER BY coalesce(submit_time, '') DESC, id DESC LIMIT 50", "ix_exam_attempts_exam_submit_key"),
+    ("SELECT id FROM exam_attempts WHERE exam_id = 1 ORDER BY final_score DESC, id DESC LIMIT 50",
+     "ix_exam_attempts_exam_score"),
+    ("SELECT id FROM exam_attempts WHERE exam_id = 1 ORDER BY coalesce(switch_count, 0) DESC, id DESC LIMIT 50",
+     "ix_exam_attempts_exam_switch_key"),
+]
+
+def index_exists(conn, name):
+    cur = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='index' AND name=?;",
+        (name,)
+    )
+    return cur.fetchone() is not None
+
+def table_exists(conn, table):
+    cur = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name=?;",
+        (table,)
+    )
+    return cur.fetchone() is not None
+
+def duplicate_attempts(conn):
+    cur = conn.execute("""
+        SELECT student_id, exam_id, COUNT(*) FROM exam_attempts
+        GROUP BY student_id, exam_id HAVING COUNT(*) > 1;
+    """)
+    return cur.fetchall()
+
+def check_query_plans(conn):
+    """逐条 EXPLAIN QUERY PLAN，确认不再全表扫描"""
+    ok = True
+    for sql, index_name in HOT_QUERIES:
+        plan = " | ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall())
+        if index_name in plan:
+            print(f"[OK] {index_name}: {plan}")
+        else:
+            ok = False
+            print(f"[WARN] {sql}\n       -> {plan}")
+    return ok
+
+def main():
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    if not os.path.exists(db_path):
+        print(f"[ERROR] DB not found: {db_path}")
+        return
+    conn = sqlite3.connect(db_path)
+    try:
+        cur = conn.cursor()
+        for name, table, columns, unique in INDEXES:
+            if not table_exists(conn, table):
+                print(f"[SKIP] table {table} not found")
+                continue
+            if index_exists(conn, name):
+                print(f"[SKIP] {name} already exists")
+                continue
+            if unique:
+                dups = duplicate_attempts(conn)
+                if dups:
+                    print(f"[WARN] {name} not created: {len(dups)} duplicate (student_id, exam_id) pairs, e.g. {dups[:5]}")
+                    continue
+            cur.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table} ({columns});")
+            print(f"[OK] {name} created")
+        for name in SUPERSEDED_INDEXES:
+            if index_exists(conn, name):
+                cur.execute(f"DROP INDEX {name};")
+                print(f"[OK] {name} dropped (superseded)")
+        conn.commit()
+        check_query_plans(conn)
+        print("[DONE] migration completed")
+    except Exception as e:
+        conn.rollback()
+        print("[ERROR]", e)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
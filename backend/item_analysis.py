@@ -0,0 +1,298 @@
+# backend/item_analysis.py
+# 题目分析（经典测量理论）：难度 p 值、点二列相关区分度（题目-其余总分）、高低分组区分度 D、
+# 选项选择率（干扰项分析）以及整卷 KR-20 信度。
+# 交卷时把每份作答压成一个定长二进制块（attempt_responses），分析时按考试读取这些块、
+# 由 NumPy 直接还原成作答矩阵与选项掩码，不再逐行扫描 student_answers；之后全部向量化计算。
+# 结果按考试缓存，以提交数/总分和为版本。
+from array import array
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from sqlalchemy import select, exists, type_coerce, Text
+from sqlalchemy.dialects.sqlite import insert
+
+from models import db, Question, ExamStats, ExamAttempt, StudentAnswer, AttemptResponse
+
+GROUP_FRACTION = 0.27         # 高/低分组各取总分前/后 27%
+ITEM_CACHE_SIZE = 64
+BACKFILL_CHUNK = 500
+
+_cache = OrderedDict()        # exam_id -> (版本, 结果)
+_cache_lock = threading.Lock()
+
+def _version(exam_id):
+    st = db.session.get(ExamStats, exam_id)
+    return (int(st.attempt_count), float(st.score_sum)) if st else (0, 0.0)
+
+def invalidate_item_analysis(exam_id=None):
+    """题目合并等改写了历史作答时调用；exam_id 为空时清空全部"""
+    with _cache_lock:
+        if exam_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(exam_id, None)
+
+def _answer_tokens(q_type, data):
+    """一条作答（已解析的 JSON）-> 选中的选项（与判分时的归一化一致）"""
+    from exam_manager import _normalize_answer
+    if data is None:
+        data = []
+    if not isinstance(data, list):
+        data = [data]
+    if q_type == "true_false":
+        v = _normalize_answer(data[0]) if len(data) == 1 else _normalize_answer(data)
+        return ("TRUE",) if v is True else ("FALSE",) if v is False else ()
+    return tuple(s for s in (str(x).strip().upper() for x in data if x is not None) if s)
+
+def _key_tokens(q_type, correct_answer):
+    from exam_manager import _compile_correct
+    key = _compile_correct(q_type, correct_answer)
+    if q_type == "true_false":
+        return ("TRUE",) if key is True else ("FALSE",) if key is False else ()
+    return tuple(key)
+
+def _option_list(q_type, options):
+    from exam_manager import _normalize_options
+    if q_type == "true_false":
+        return [("TRUE", "正确"), ("FALSE", "错误")]
+    return list(_normalize_options(options).items())
+
+# ---------- 作答压缩块 ----------
+# 选项 -> 位：判断题 正确/错误 占第 0/1 位，选择题字母 A-Z 占第 0-25 位；其它写法不计入掩码
+
+def _token_bit(q_type, tok):
+    if q_type == "true_false":
+        return {"TRUE": 0, "FALSE": 1}.get(tok)
+    return ord(tok) - 65 if len(tok) == 1 and "A" <= tok <= "Z" else None
+
+def _bit_token(q_type, bit):
+    if q_type == "true_false":
+        return ("TRUE", "FALSE")[bit] if bit < 2 else None
+    return chr(65 + bit) if bit < 26 else None
+
+def _choice_mask(q_type, data):
+    mask = 0
+    for tok in _answer_tokens(q_type, data):
+        bit = _token_bit(q_type, tok)
+        if bit is not None:
+            mask |= 1 << bit
+    return mask
+
+def pack_responses(answer_key, rows):
+    """grade_answers 产出的答题记录 -> attempt_responses.codes（交卷时与答题记录同事务写入）"""
+    buf = array("i")
+    for r in rows:
+        q_type = (answer_key.get(r["question_id"]) or {}).get("type", "")
+        buf.append(r["question_id"] << 1 | bool(r["is_correct"]))
+        buf.append(_choice_mask(q_type, r["student_answer"]))
+    return buf.tobytes()
+
+def _parse_raw(raw):
+    """旧数据中可能有未按 JSON 存的作答，原样当作一个选项"""
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+def _pack_attempts(attempts):
+    """[(提交 id, 考试 id), ...] -> 从 student_answers 重建压缩块并写入当前事务（不提交）"""
+    exam_of = dict(attempts)
+    masks = {}
+    for i in range(0, len(attempts), BACKFILL_CHUNK):
+        chunk = [aid for aid, _ in attempts[i:i + BACKFILL_CHUNK]]
+        packs = {aid: array("i") for aid in chunk}
+        # 作答取 JSON 原文，不同写法只有少数几种，按 (题型, 原文) 缓存掩码
+        rows = db.session.execute(
+            select(StudentAnswer.attempt_id, StudentAnswer.question_id, StudentAnswer.is_correct,
+                   type_coerce(StudentAnswer.student_answer, Text), Question.question_type)
+            .outerjoin(Question, Question.id == StudentAnswer.question_id)
+            .where(StudentAnswer.attempt_id.in_(chunk))
+            .order_by(StudentAnswer.attempt_id, StudentAnswer.id)
+        )
+        for aid, qid, ok, raw, q_type in rows:
+            mask = masks.get((q_type, raw))
+            if mask is None:
+                mask = masks[(q_type, raw)] = _choice_mask(q_type or "", _parse_raw(raw))
+            packs[aid].append(qid << 1 | bool(ok))
+            packs[aid].append(mask)
+        db.session.execute(
+            insert(AttemptResponse).on_conflict_do_nothing(index_elements=[AttemptResponse.attempt_id]),
+            [{"attempt_id": aid, "exam_id": exam_of[aid], "codes": buf.tobytes()} for aid, buf in packs.items()],
+        )
+
+def _missing_responses():
+    return select(ExamAttempt.id, ExamAttempt.exam_id).where(
+        ~exists().where(AttemptResponse.attempt_id == ExamAttempt.id))
+
+def backfill_responses(chunk_size=5000):
+    """为缺少压缩块的提交（功能上线前的历史数据）从 student_answers 补写，按块提交，返回份数"""
+    total = 0
+    while True:
+        attempts = [tuple(r) for r in db.session.execute(
+            _missing_responses().order_by(ExamAttempt.id).limit(chunk_size))]
+        if not attempts:
+            break
+        _pack_attempts(attempts)
+        db.session.commit()
+        total += len(attempts)
+    return total
+
+def ensure_attempt_responses():
+    """启动时调用：旧库升级或绕过交卷接口写入的提交补写压缩块（题目分析接口只读，不再现场补写）"""
+    if db.session.execute(_missing_responses().limit(1)).first() is not None:
+        backfill_responses()
+
+def repack_responses(question_ids):
+    """题目合并改写了 student_answers 的题目 id：重建涉及这些题目的压缩块（同一事务，不提交）"""
+    question_ids = list(question_ids)
+    attempts = set()
+    for i in range(0, len(question_ids), BACKFILL_CHUNK):
+        attempts.update(tuple(r) for r in db.session.execute(
+            select(ExamAttempt.id, ExamAttempt.exam_id)
+            .where(ExamAttempt.id.in_(select(StudentAnswer.attempt_id)
+                                      .where(StudentAnswer.question_id.in_(question_ids[i:i + BACKFILL_CHUNK]))))))
+    attempts = sorted(attempts)
+    for i in range(0, len(attempts), BACKFILL_CHUNK):
+        db.session.execute(AttemptResponse.__table__.delete().where(
+            AttemptResponse.attempt_id.in_([aid for aid, _ in attempts[i:i + BACKFILL_CHUNK]])))
+    _pack_attempts(attempts)
+
+def load_responses(exam_id):
+    """
+    返回 (提交 id 数组, 题目 id 数组, 行号数组, 列号数组, 是否答对数组, 选项掩码数组)；
+    行对应提交，列对应题目，均按 id 升序。每份提交读一个压缩块，读取量与作答条数无关。
+    只读：压缩块由交卷写入，历史数据在启动时（ensure_attempt_responses）或 rebuild_stats.py 中补写
+    """
+    blobs = [(aid, codes) for aid, codes in db.session.execute(
+        select(AttemptResponse.attempt_id, AttemptResponse.codes)
+        .where(AttemptResponse.exam_id == exam_id)
+        .order_by(AttemptResponse.attempt_id)
+    ) if codes]
+    if not blobs:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, empty, np.zeros(0, dtype=bool), empty
+    attempt_ids = np.fromiter((aid for aid, _ in blobs), dtype=np.int64, count=len(blobs))
+    lengths = np.fromiter((len(c) // 8 for _, c in blobs), dtype=np.int64, count=len(blobs))
+    data = np.frombuffer(b"".join(c for _, c in blobs), dtype=np.int32).reshape(-1, 2).astype(np.int64)
+    rows = np.repeat(np.arange(len(blobs)), lengths)
+    question_ids, cols = np.unique(data[:, 0] >> 1, return_inverse=True)
+    correct = (data[:, 0] & 1).astype(bool)
+    return attempt_ids, question_ids, rows, cols, correct, data[:, 1]
+
+def _compute(exam_id):
+    attempt_ids, question_ids, rows, cols, correct, masks = load_responses(exam_id)
+    n, k = len(attempt_ids), len(question_ids)
+    if not n or not k:
+        return {"attempts": n, "kr20": None, "items": []}
+
+    # 学生 × 题目 作答矩阵：X 为对错，M 为是否作答（多版本试卷时学生只答自己那份）
+    X = np.zeros((n, k), dtype=np.float64)
+    M = np.zeros((n, k), dtype=bool)
+    X[rows, cols] = correct
+    M[rows, cols] = True
+
+    answered = M.sum(axis=0).astype(np.float64)
+    right = X.sum(axis=0)
+    p = np.divide(right, answered, out=np.zeros(k), where=answered > 0)
+
+    # 点二列相关（题目 vs 其余题目总分，避免题目自身抬高相关）：全部由矩阵乘法得到
+    total = X.sum(axis=1)
+    Mf = M.astype(np.float64)
+    sum_r = Mf.T @ total - right                          # Σ rest
+    sum_r2 = Mf.T @ (total * total) - 2 * (X.T @ total) + right   # Σ rest²（X 为 0/1）
+    sum_xr = X.T @ total - right                          # Σ x·rest
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_r = sum_r / answered
+        cov = sum_xr / answered - p * mean_r
+        var_r = sum_r2 / answered - mean_r * mean_r
+        r_pb = cov / np.sqrt(p * (1 - p) * var_r)
+    r_pb = np.where(np.isfinite(r_pb), r_pb, np.nan)
+
+    # 高/低分组（按答对题数）与区分度 D = p高 - p低；group：0 中间 / 1 高分组 / 2 低分组
+    g = max(1, int(round(n * GROUP_FRACTION)))
+    order = np.argsort(total, kind="stable")
+    group = np.zeros(n, dtype=np.int64)
+    group[order[-g:]] = 1
+    group[order[:g]] = 2
+    upper, lower = group == 1, group == 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p_upper = X[upper].sum(axis=0) / M[upper].sum(axis=0)
+        p_lower = X[lower].sum(axis=0) / M[lower].sum(axis=0)
+    upper_n = M[upper].sum(axis=0)
+    lower_n = M[lower].sum(axis=0)
+
+    # KR-20：只在人人作答全部题目（单一试卷）时有意义
+    kr20 = None
+    if k > 1 and M.all():
+        var_total = total.var()
+        if var_total > 0:
+            kr20 = float(k / (k - 1) * (1 - (p * (1 - p)).sum() / var_total))
+
+    # 干扰项：每个出现过的选项位一次 bincount，同时得到 (题目, 分组) 的选择人数
+    cell = cols * 3 + group[rows]
+    present = int(np.bitwise_or.reduce(masks)) if len(masks) else 0
+    picks = {
+        bit: np.bincount(cell[(masks >> bit) & 1 == 1], minlength=k * 3).reshape(k, 3)
+        for bit in range(32) if present >> bit & 1
+    }
+    omitted = np.bincount(cols[masks == 0], minlength=k)
+
+    meta = {
+        r.id: r for r in db.session.query(Question.id, Question.question_type, Question.options, Question.correct_answer)
+        .filter(Question.id.in_(question_ids.tolist()))
+    }
+    items = []
+    for j, qid in enumerate(question_ids.tolist()):
+        m = meta.get(qid)
+        q_type = m.question_type if m else ""
+        key = _key_tokens(q_type, m.correct_answer) if m else ()
+        labels = dict(_option_list(q_type, m.options)) if m else {}
+        # 选项 -> (人数, 高分组人数, 低分组人数)：先列题目自带的选项，再补上作答中出现的其它字母
+        tally = {opt: (0, 0, 0) for opt in labels}
+        for bit, counts in picks.items():
+            tok = _bit_token(q_type, bit)
+            c = counts[j]
+            if tok is not None and (tok in tally or c.any()):
+                tally[tok] = (int(c.sum()), int(c[1]), int(c[2]))
+        n_j, nu, nl = answered[j], upper_n[j], lower_n[j]
+        options = []
+        for opt, (c, cu, cl) in tally.items():
+            options.append({
+                "option": opt,
+                "text": labels.get(opt),
+                "is_key": opt in key,
+                "count": c,
+                "rate": round(c / n_j, 4) if n_j else 0.0,
+                "upper_rate": round(cu / nu, 4) if nu else 0.0,
+                "lower_rate": round(cl / nl, 4) if nl else 0.0,
+            })
+        items.append({
+            "question_id": qid,
+            "question_type": q_type,
+            "answered": int(n_j),
+            "correct": int(right[j]),
+            "p_value": round(float(p[j]), 4),
+            "point_biserial": None if np.isnan(r_pb[j]) else round(float(r_pb[j]), 4),
+            "discrimination": None if not (nu and nl) else round(float(p_upper[j] - p_lower[j]), 4),
+            "omitted": int(omitted[j]),
+            "options": options,
+        })
+    return {"attempts": int(n), "kr20": None if kr20 is None else round(kr20, 4), "items": items}
+
+def analyze_exam_items(exam_id):
+    """返回整场考试的题目分析；提交数与总分和不变时直接命中缓存"""
+    version = _version(exam_id)
+    cached = _cache.get(exam_id)
+    if cached and cached[0] == version:
+        return cached[1]
+    result = _compute(exam_id)
+    with _cache_lock:
+        _cache[exam_id] = (version, result)
+        _cache.move_to_end(exam_id)
+        while len(_cache) > ITEM_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
@@ -3,7 +3,7 @@
 在线考试系统部署入口文件
 """
 
-from app import app
+from app import app, start_background_workers
 
 if __name__ == '__main__':
     # 确保数据库表已创建
@@ -20,5 +20,6 @@ if __name__ == '__main__':
         except Exception as e:
             print(f"示例数据创建失败: {e}")
     
-    # 启动应用
+    # 启动应用（交卷队列 / 导入任务的后台线程只在这里启动，不在 import app 时启动）
+    start_background_workers(app)
     app.run(host='0.0.0.0', port=5000, debug=False)
@@ -1 +1,286 @@
-<UPDATED MODELS CONTENT PLACEHOLDER>
\ No newline at end of file
+# backend/models.py
+# 数据模型（与 exam_system.db 现有表结构保持一致）
+from datetime import datetime
+import enum
+
+from flask_sqlalchemy import SQLAlchemy
+from werkzeug.security import generate_password_hash, check_password_hash
+
+db = SQLAlchemy()
+
+
+class UserRole(enum.Enum):
+    TEACHER = "teacher"
+    STUDENT = "student"
+
+
+class ExamStatus(enum.Enum):
+    ACTIVE = "active"
+    INACTIVE = "inactive"
+
+
+class User(db.Model):
+    __tablename__ = "users"
+
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(50), unique=True, nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
+    role = db.Column(db.Enum(UserRole), nullable=False)
+    full_name = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+
+    def set_password(self, password):
+        self.password_hash = generate_password_hash(password)
+
+    def check_password(self, password):
+        return check_password_hash(self.password_hash, password)
+
+
+class Category(db.Model):
+    __tablename__ = "categories"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), unique=True, nullable=False)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+
+    __table_args__ = (
+        # 分类名大小写不敏感查找（category_resolver）
+        db.Index("ix_categories_name_lower", db.func.lower(name)),
+    )
+
+
+class Question(db.Model):
+    __tablename__ = "questions"
+
+    id = db.Column(db.Integer, primary_key=True)
+    creator_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey("categories.id"))
+    question_text = db.Column(db.Text, nullable=False)
+    question_type = db.Column(db.String(20), nullable=False)  # single / multiple / true_false
+    options = db.Column(db.JSON)
+    correct_answer = db.Column(db.JSON, nullable=False)
+    content_hash = db.Column(db.String(40))  # 内容指纹（题干+题型+选项+答案），导入时在出题人题库内判重
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    # 最后修改时间（ORM 与 Core UPDATE 均自动刷新），各进程据此发现题库变化
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    category = db.relationship("Category")
+
+    __table_args__ = (
+        # 随机组卷：按 (出题人, 题型, 分类) 取候选题
+        db.Index("ix_questions_creator_type_category", "creator_id", "question_type", "category_id"),
+        # 随机组卷索引的版本校验：某教师题库的最后修改时间
+        db.Index("ix_questions_creator_updated", "creator_id", "updated_at"),
+        # 导入判重 / 合并重复题：按出题人查指纹
+        db.Index("ix_questions_creator_hash", "creator_id", "content_hash"),
+    )
+
+
+class Exam(db.Model):
+    __tablename__ = "exams"
+
+    id = db.Column(db.Integer, primary_key=True)
+    creator_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    title = db.Column(db.String(255), nullable=False)
+    start_time = db.Column(db.DateTime)
+    end_time = db.Column(db.DateTime)
+    duration_minutes = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.Enum(ExamStatus), nullable=False, default=ExamStatus.INACTIVE)
+    is_randomized = db.Column(db.Boolean, default=False)
+    switch_limit = db.Column(db.Integer, default=0)
+    # 生成的试卷份数（0 为不分卷）：学生按它散列到版本，改卷删空某份的独有题也不改变，已分到的版本保持不变
+    variant_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    # 最后修改时间：考试本身、试卷组成或卷中题目变化时刷新（见 exam_manager.touch_exams），
+    # 各进程缓存的试卷与答案表据此校验
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    questions = db.relationship("ExamQuestion", backref="exam", lazy=True, cascade="all, delete-orphan")
+    attempts = db.relationship("ExamAttempt", backref="exam", lazy=True)
+
+
+class ExamQuestion(db.Model):
+    __tablename__ = "exam_questions"
+
+    id = db.Column(db.Integer, primary_key=True)
+    exam_id = db.Column(db.Integer, db.ForeignKey("exams.id"), nullable=False, index=True)
+    question_id = db.Column(db.Integer, db.ForeignKey("questions.id"), nullable=False)
+    score = db.Column(db.Integer, nullable=False, default=5)
+    # 试卷版本：0 为所有学生共有的题目；1..N 为“一人一卷”时各版本独有的题目
+    variant_no = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    question = db.relationship("Question")
+
+    __table_args__ = (
+        db.Index("ix_exam_questions_exam_variant", "exam_id", "variant_no"),
+    )
+
+
+class ExamPaperAssignment(db.Model):
+    """按名单分卷：学生 -> 试卷版本（不在名单中的学生按学号散列到某个版本）"""
+    __tablename__ = "exam_paper_assignments"
+
+    exam_id = db.Column(db.Integer, db.ForeignKey("exams.id"), primary_key=True)
+    student_id = db.Column(db.String(64), primary_key=True)   # 与登录身份一致（学号/工号）
+    variant_no = db.Column(db.Integer, nullable=False)
+
+
+class ExamAttempt(db.Model):
+    __tablename__ = "exam_attempts"
+
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    exam_id = db.Column(db.Integer, db.ForeignKey("exams.id"), nullable=False, index=True)
+    start_time = db.Column(db.DateTime, server_default=db.func.now())
+    submit_time = db.Column(db.DateTime, default=datetime.utcnow)
+    final_score = db.Column(db.Float, nullable=False, default=0)
+    switch_count = db.Column(db.Integer, default=0)
+
+    answers = db.relationship("StudentAnswer", backref="attempt", lazy=True)
+
+    __table_args__ = (
+        # 每个学生每场考试只能提交一次（同时服务于重复提交检查）
+        db.Index("uq_exam_attempts_student_exam", "student_id", "exam_id", unique=True),
+        # 学生个人成绩页：按 (submit_time, id) 倒序分页读取某学生的提交
+        db.Index("ix_exam_attempts_student_time", "student_id", "submit_time", "id"),
+        # 提交明细按 (列, id) keyset 分页排序；rowid 隐含在索引末尾。
+        # 可空列按 coalesce 后的值排序（NULL 与行值比较结果为 NULL，会漏行），表达式须与 analytics_api.SUBMISSION_SORTS 一致
+        db.Index("ix_exam_attempts_exam_submit_key", "exam_id", db.func.coalesce(submit_time, db.literal_column("''"))),
+        db.Index("ix_exam_attempts_exam_score", "exam_id", "final_score"),
+        db.Index("ix_exam_attempts_exam_switch_key", "exam_id", db.func.coalesce(switch_count, db.literal_column("0"))),
+    )
+
+
+class StudentAnswer(db.Model):
+    __tablename__ = "student_answers"
+
+    id = db.Column(db.Integer, primary_key=True)
+    attempt_id = db.Column(db.Integer, db.ForeignKey("exam_attempts.id"), nullable=False, index=True)
+    question_id = db.Column(db.Integer, db.ForeignKey("questions.id"), nullable=False)
+    student_answer = db.Column(db.JSON)
+    is_correct = db.Column(db.Boolean, nullable=False, default=False)
+
+
+class AttemptResponse(db.Model):
+    """每份提交的作答压缩块（交卷时写入，见 item_analysis.pack_responses），题目分析按考试整块读取"""
+    __tablename__ = "attempt_responses"
+
+    attempt_id = db.Column(db.Integer, db.ForeignKey("exam_attempts.id"), primary_key=True)
+    exam_id = db.Column(db.Integer, db.ForeignKey("exams.id"), nullable=False, index=True)
+    # 每题两个 int32：题目 id << 1 | 是否答对、所选选项位掩码（A=1, B=2, ...；判断题 正确=1, 错误=2）
+    codes = db.Column(db.LargeBinary, nullable=False)
+
+
+class SubmissionQueue(db.Model):
+    """异步交卷队列：接口只落库原始答案并立即返回，后台线程批量判分"""
+    __tablename__ = "submission_queue"
+
+    id = db.Column(db.Integer, primary_key=True)
+    exam_id = db.Column(db.Integer, db.ForeignKey("exams.id"), nullable=False)
+    student_id = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.JSON, nullable=False)              # {'answers':..., 'switchCount':...}
+    status = db.Column(db.String(16), nullable=False, default="pending")  # pending / processing / done / failed
+    score = db.Column(db.Float)
+    message = db.Column(db.String(255))
+    claimed_by = db.Column(db.String(32))
+    claimed_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime)
+
+
+class AuthSession(db.Model):
+    """共享会话表：多个 worker 进程通过它识别同一 token"""
+    __tablename__ = "auth_sessions"
+
+    token = db.Column(db.String(64), primary_key=True)
+    payload = db.Column(db.JSON, nullable=False)    # {'role','id','name'}
+    expire_at = db.Column(db.Float, nullable=False, index=True)  # Unix 时间戳
+
+
+class ImportJob(db.Model):
+    """题库导入任务：后台线程按块提交并记录进度，进程重启或失败后从最后提交的块续传"""
+    __tablename__ = "import_jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    creator_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    file_path = db.Column(db.String(500), nullable=False)
+    file_format = db.Column(db.String(8), nullable=False)      # xlsx / csv
+    chunk_size = db.Column(db.Integer, nullable=False, default=1000)
+    dedup_mode = db.Column(db.String(8), nullable=False, default="skip")  # skip / update / insert
+    status = db.Column(db.String(16), nullable=False, default="pending")  # pending / running / done / failed（可续传）/ invalid（文件有误）
+    rows_done = db.Column(db.Integer, nullable=False, default=0)         # 已提交的数据行数（续传起点）
+    imported_count = db.Column(db.Integer, nullable=False, default=0)
+    duplicate_count = db.Column(db.Integer, nullable=False, default=0)   # 跳过的重复题（已有题目或文件内重复）
+    updated_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")  # update 模式下覆盖的已有题目
+    error_count = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(db.JSON)                                          # 前若干条行级错误
+    message = db.Column(db.String(255))
+    claimed_by = db.Column(db.String(32))                                # 执行中的后台线程令牌
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)         # 每提交一块刷新，兼作心跳
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index("ix_import_jobs_status", "status", "updated_at"),
+    )
+
+
+class ExamStats(db.Model):
+    """按考试增量维护的成绩统计（交卷时同一事务内更新，可用 rebuild_stats.py 重算）"""
+    __tablename__ = "exam_stats"
+
+    exam_id = db.Column(db.Integer, db.ForeignKey("exams.id"), primary_key=True)
+    attempt_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    score_sq_sum = db.Column(db.Float, nullable=False, default=0)
+    min_score = db.Column(db.Float)
+    max_score = db.Column(db.Float)
+    # 分数段人数：0-59 / 60-69 / 70-79 / 80-89 / 90-100
+    bucket_0 = db.Column(db.Integer, nullable=False, default=0)
+    bucket_1 = db.Column(db.Integer, nullable=False, default=0)
+    bucket_2 = db.Column(db.Integer, nullable=False, default=0)
+    bucket_3 = db.Column(db.Integer, nullable=False, default=0)
+    bucket_4 = db.Column(db.Integer, nullable=False, default=0)
+
+
+class QuestionStats(db.Model):
+    """按 (考试, 题目) 维护的作答/答对计数"""
+    __tablename__ = "question_stats"
+
+    exam_id = db.Column(db.Integer, db.ForeignKey("exams.id"), primary_key=True)
+    question_id = db.Column(db.Integer, db.ForeignKey("questions.id"), primary_key=True)
+    correct_count = db.Column(db.Integer, nullable=False, default=0)
+    total_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class StudentStats(db.Model):
+    """按学生增量维护的成绩汇总（交卷时同一事务内更新），个人成绩页只读这一行"""
+    __tablename__ = "student_stats"
+
+    student_id = db.Column(db.String(64), primary_key=True)   # 与登录身份一致（学号/工号）
+    exam_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    best_score = db.Column(db.Float)
+    worst_score = db.Column(db.Float)
+    # 最近 RECENT_SCORES_LIMIT 次成绩 [[exam_id, score, 提交时间], ...]，旧到新
+    recent_scores = db.Column(db.JSON, nullable=False, default=list)
+    last_submit_time = db.Column(db.DateTime)
+
+
+class StudentWrongQuestion(db.Model):
+    """错题索引：(学生, 题目) 一行，记录答错次数与最近一次答错的作答"""
+    __tablename__ = "student_wrong_questions"
+
+    student_id = db.Column(db.String(64), primary_key=True)
+    question_id = db.Column(db.Integer, db.ForeignKey("questions.id"), primary_key=True)
+    wrong_count = db.Column(db.Integer, nullable=False, default=0)
+    last_exam_id = db.Column(db.Integer, db.ForeignKey("exams.id"))
+    last_attempt_id = db.Column(db.Integer)
+    last_answer = db.Column(db.JSON)
+    last_wrong_time = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # “我的错题”按最近答错时间倒序分页
+        db.Index("ix_student_wrong_questions_student_time", "student_id", "last_wrong_time", "question_id"),
+    )
@@ -1,12 +1,23 @@
 # backend/question_api.py
-from flask import Blueprint, jsonify, request, send_file
-from sqlalchemy import func
+from flask import Blueprint, jsonify, request, send_file, current_app
 from io import BytesIO
+from datetime import datetime
 import tempfile
 import os
+import uuid
 
-from models import db, Question, Category
-from question_importer import import_from_excel, export_template
+from models import db, Question, Category, ImportJob
+from auth import get_identity
+from question_importer import (
+    import_from_excel, export_template, STREAM_FORMATS,
+    create_import_job, import_job_status,
+)
+from import_worker import notify_import_workers
+from exam_manager import invalidate_exam_caches_for_question, invalidate_question_id_index, touch_exams
+from analytics_api import invalidate_question_projection
+from question_search import index_questions, remove_from_index, search_questions
+from question_dedup import DEDUP_MODES, question_hash
+from category_resolver import find_category
 
 qbank_bp = Blueprint("qbank_api", __name__)
 
@@ -22,8 +33,7 @@ def create_category():
     name = (data.get("name") or "").strip()
     if not name:
         return jsonify({"success": False, "message": "分类名不能为空"}), 400
-    existed = Category.query.filter(func.lower(Category.name) == name.lower()).first()
-    if existed:
+    if find_category(name) is not None:
         return jsonify({"success": False, "message": "分类已存在"}), 409
     c = Category(name=name)
     db.session.add(c)
@@ -31,25 +41,113 @@ def create_category():
     return jsonify({"success": True, "id": c.id})
 
 # ---------- Questions ----------
+QUESTION_FIELDS = {
+    "id": Question.id,
+    "creator_id": Question.creator_id,
+    "category_id": Question.category_id,
+    "category_name": Category.name,
+    "question_text": Question.question_text,
+    "question_type": Question.question_type,
+    "options": Question.options,
+    "correct_answer": Question.correct_answer,
+    "created_at": Question.created_at,
+}
+# fields=summary：列表页不需要选项与答案
+SUMMARY_FIELDS = [f for f in QUESTION_FIELDS if f not in ("options", "correct_answer")]
+MAX_PAGE_SIZE = 500
+
+def _parse_fields(raw):
+    if not raw:
+        return list(QUESTION_FIELDS)
+    if raw == "summary":
+        return SUMMARY_FIELDS
+    fields = [f.strip() for f in raw.split(",") if f.strip() in QUESTION_FIELDS]
+    return ["id"] + [f for f in fields if f != "id"]
+
+def _parse_dt(raw):
+    return datetime.fromisoformat(raw) if raw else None
+
 @qbank_bp.get("/questions")
 def list_questions():
-    # 返回题库，附带分类名
-    rows = db.session.query(Question, Category).outerjoin(Category, Question.category_id == Category.id)\
-        .order_by(Question.id.asc()).all()
+    """
+    题库列表（附带分类名）。可选参数：
+      limit / cursor   —— 按 id 的 keyset 分页（cursor 为上一页 next_cursor）；不传 limit 返回全部
+      type / category_id / creator_id / created_from / created_to —— 服务端过滤
+      fields           —— summary 或逗号分隔的字段列表
+    响应带 ETag，未变化时返回 304。
+    """
+    args = request.args
+    try:
+        fields = _parse_fields(args.get("fields"))
+        limit = min(max(int(args["limit"]), 1), MAX_PAGE_SIZE) if args.get("limit") else None
+        cursor = int(args.get("cursor") or 0)
+        created_from, created_to = _parse_dt(args.get("created_from")), _parse_dt(args.get("created_to"))
+        category_id = int(args["category_id"]) if args.get("category_id") else None
+        creator_id = int(args["creator_id"]) if args.get("creator_id") else None
+    except ValueError:
+        return jsonify({"success": False, "message": "参数格式错误"}), 400
+
+    query = db.session.query(*[QUESTION_FIELDS[f].label(f) for f in fields])
+    if "category_name" in fields:
+        query = query.outerjoin(Category, Question.category_id == Category.id)
+    if args.get("type"):
+        query = query.filter(Question.question_type == args["type"])
+    if category_id is not None:
+        query = query.filter(Question.category_id == category_id)
+    if creator_id is not None:
+        query = query.filter(Question.creator_id == creator_id)
+    if created_from:
+        query = query.filter(Question.created_at >= created_from)
+    if created_to:
+        query = query.filter(Question.created_at <= created_to)
+    if cursor:
+        query = query.filter(Question.id > cursor)
+    query = query.order_by(Question.id.asc())
+
+    rows = query.limit(limit + 1).all() if limit else query.all()
+    has_more = bool(limit) and len(rows) > limit
+    rows = rows[:limit] if limit else rows
+
     out = []
-    for q, c in rows:
-        out.append({
-            "id": q.id,
-            "creator_id": q.creator_id,
-            "category_id": q.category_id,
-            "category_name": getattr(c, "name", None),
-            "question_text": q.question_text,
-            "question_type": q.question_type,
-            "options": q.options,
-            "correct_answer": q.correct_answer,
-            "created_at": getattr(q, "created_at", None).isoformat() if getattr(q, "created_at", None) else None
-        })
-    return jsonify({"success": True, "questions": out})
+    for r in rows:
+        item = r._asdict()
+        if "created_at" in item:
+            item["created_at"] = item["created_at"].isoformat() if item["created_at"] else None
+        out.append(item)
+
+    resp = jsonify({
+        "success": True,
+        "questions": out,
+        "next_cursor": out[-1]["id"] if has_more else None,
+        "has_more": has_more,
+    })
+    resp.add_etag()
+    return resp.make_conditional(request)
+
+@qbank_bp.get("/questions/search")
+def search_questions_api():
+    """全文检索题干与选项：?q=关键词&limit=20&offset=0，按相关度排序"""
+    kw = (request.args.get("q") or "").strip()
+    try:
+        limit = min(max(int(request.args.get("limit", 20)), 1), MAX_PAGE_SIZE)
+        offset = max(int(request.args.get("offset", 0)), 0)
+    except ValueError:
+        return jsonify({"success": False, "message": "参数格式错误"}), 400
+    if not kw:
+        return jsonify({"success": True, "total": 0, "questions": []})
+
+    total, ids = search_questions(kw, limit, offset)
+    rows = db.session.query(*[QUESTION_FIELDS[f].label(f) for f in SUMMARY_FIELDS])\
+        .outerjoin(Category, Question.category_id == Category.id)\
+        .filter(Question.id.in_(ids)).all() if ids else []
+    by_id = {r.id: r._asdict() for r in rows}
+    out = []
+    for qid in ids:
+        item = by_id.get(qid)
+        if item:
+            item["created_at"] = item["created_at"].isoformat() if item["created_at"] else None
+            out.append(item)
+    return jsonify({"success": True, "total": total, "questions": out})
 
 @qbank_bp.post("/questions")
 def create_question():
@@ -64,8 +162,12 @@ def create_question():
     )
     if not q.question_text:
         return jsonify({"success": False, "message": "题干不能为空"}), 400
+    q.content_hash = question_hash(q)
     db.session.add(q)
+    db.session.flush()
+    index_questions([q])
     db.session.commit()
+    invalidate_question_id_index(q.creator_id)
     return jsonify({"success": True, "id": q.id})
 
 @qbank_bp.put("/questions/<int:qid>")
@@ -84,7 +186,12 @@ def update_question(qid: int):
         q.options = data.get("options")
     if "correct_answer" in data:
         q.correct_answer = data.get("correct_answer")
+    q.content_hash = question_hash(q)
+    index_questions([q])
+    touch_exams(question_ids=[qid])
     db.session.commit()
+    invalidate_exam_caches_for_question(qid)
+    invalidate_question_projection(qid)
     return jsonify({"success": True})
 
 @qbank_bp.delete("/questions/<int:qid>")
@@ -93,7 +200,11 @@ def delete_question(qid: int):
     if not q:
         return jsonify({"success": False, "message": "题目不存在"}), 404
     db.session.delete(q)
+    remove_from_index([qid])
+    touch_exams(question_ids=[qid])
     db.session.commit()
+    invalidate_exam_caches_for_question(qid)
+    invalidate_question_projection(qid)
     return jsonify({"success": True})
 
 # ---------- Excel 导入 / 模板 ----------
@@ -105,13 +216,24 @@ def upload_questions_excel():
     if not f.filename:
         return jsonify({"success": False, "message": "未选择文件"}), 400
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(f.filename)[1] or ".xlsx") as tmp:
+    # 从登录态取 creator_id；未登录时记到默认教师账号（questions.creator_id 不可为空）
+    me = get_identity(request)
+    creator_id = me["id"] if me and me.get("role") == "teacher" else 1
+
+    # 判重方式：skip 跳过重复题（默认）/ update 已有题目按表格更新分类 / insert 不判重
+    dedup = request.form.get("dedup") or "skip"
+    if dedup not in DEDUP_MODES:
+        return jsonify({"success": False, "message": f"dedup 可选：{' / '.join(DEDUP_MODES)}"}), 400
+
+    ext = os.path.splitext(f.filename)[1].lower() or ".xlsx"
+    if ext == ".csv" or current_app.config.get("IMPORT_MODE", "background") != "batch":
+        return _enqueue_import(f, ext, creator_id, dedup)
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
         f.save(tmp.name)
         tmp_path = tmp.name
     try:
-        # 这里可从登录态取 creator_id；没有则置 None
-        creator_id = None
-        result = import_from_excel(tmp_path, creator_id)
+        result = import_from_excel(tmp_path, creator_id, dedup)
         code = 200 if result.get("success") else 400
         return jsonify(result), code
     finally:
@@ -120,6 +242,39 @@ def upload_questions_excel():
         except Exception:
             pass
 
+def _enqueue_import(f, ext, creator_id, dedup):
+    """后台导入：文件保存到 IMPORT_DIR 并登记任务，立即返回任务号（任务完成后删除文件）"""
+    if ext not in STREAM_FORMATS:
+        return jsonify({"success": False, "message": "仅支持 .xlsx / .xls / .csv 文件"}), 400
+    import_dir = current_app.config.get("IMPORT_DIR") or tempfile.gettempdir()
+    os.makedirs(import_dir, exist_ok=True)
+    path = os.path.join(import_dir, f"{uuid.uuid4().hex}{ext}")
+    f.save(path)
+    job = create_import_job(path, creator_id, current_app.config.get("IMPORT_CHUNK_SIZE"), dedup)
+    notify_import_workers()
+    return jsonify({"success": True, "queued": True, "job_id": job.id, "message": "已开始后台导入"}), 202
+
+@qbank_bp.get("/questions/import/<int:job_id>")
+def get_import_job(job_id: int):
+    """导入进度：已处理行数、导入/跳过数量及原因、吞吐（行/秒）"""
+    job = db.session.get(ImportJob, job_id)
+    if not job:
+        return jsonify({"success": False, "message": "导入任务不存在"}), 404
+    return jsonify({"success": True, **import_job_status(job)})
+
+@qbank_bp.post("/questions/import/<int:job_id>/resume")
+def resume_import_job(job_id: int):
+    """失败的任务重新排队，从最后提交的块继续"""
+    job = db.session.get(ImportJob, job_id)
+    if not job:
+        return jsonify({"success": False, "message": "导入任务不存在"}), 404
+    if job.status != "failed":
+        return jsonify({**import_job_status(job), "success": False, "message": "仅中途失败的导入任务可以续传"}), 400
+    job.status = "pending"
+    db.session.commit()
+    notify_import_workers()
+    return jsonify({"success": True, "queued": True, "job_id": job.id, "message": "已重新排队"}), 202
+
 @qbank_bp.get("/questions/template")
 def download_template():
     # 生成一个内存文件返回
@@ -0,0 +1,144 @@
+# backend/question_dedup.py
+# 题目内容指纹：题干 + 题型 + 选项 + 正确答案归一化后取 SHA-1，存于 questions.content_hash（带索引）。
+# 判重只在同一出题人的题库内进行（各教师题库相互独立，随机组卷也按出题人取题）：
+# 导入时按块一次 IN 查询判重；merge_duplicate_questions() 合并历史重复题并迁移试卷/作答引用。
+import hashlib
+import json
+import unicodedata
+from collections import defaultdict
+
+from sqlalchemy import bindparam, delete, func, update
+
+from models import db, Question, ExamQuestion, StudentAnswer, QuestionStats
+from exam_manager import (
+    _normalize_options, _compile_correct, invalidate_exam_cache, invalidate_question_id_index, touch_exams,
+)
+from question_search import remove_from_index
+from exam_stats import rebuild_wrong_questions
+from item_analysis import repack_responses
+
+DEDUP_MODES = ("skip", "update", "insert")   # 跳过重复 / 按表格覆盖已有题目 / 照常插入
+LOOKUP_CHUNK = 500
+
+def _norm_text(s):
+    """全半角统一（NFKC）并压缩空白"""
+    return " ".join(unicodedata.normalize("NFKC", "" if s is None else str(s)).split())
+
+def content_hash(question_text, question_type, options, correct_answer):
+    opts = {k: _norm_text(v) for k, v in _normalize_options(options).items()}
+    payload = [
+        _norm_text(question_text),
+        question_type,
+        sorted((k, v) for k, v in opts.items() if v),
+        _compile_correct(question_type, correct_answer),
+    ]
+    return hashlib.sha1(json.dumps(payload, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def question_hash(q):
+    return content_hash(q.question_text, q.question_type, q.options, q.correct_answer)
+
+def find_existing_hashes(creator_id, hashes):
+    """批量查该出题人已有的指纹：返回 {content_hash: 最早的题目 id}（走 (creator_id, content_hash) 索引）"""
+    hashes = list(hashes)
+    found = {}
+    for i in range(0, len(hashes), LOOKUP_CHUNK):
+        rows = db.session.query(Question.content_hash, func.min(Question.id))\
+            .filter(Question.creator_id == creator_id, Question.content_hash.in_(hashes[i:i + LOOKUP_CHUNK]))\
+            .group_by(Question.content_hash).all()
+        found.update(rows)
+    return found
+
+def backfill_content_hashes(chunk_size=2000):
+    """为 content_hash 为空的题目补算指纹，返回补算条数"""
+    total = 0
+    while True:
+        rows = db.session.query(Question.id, Question.question_text, Question.question_type,
+                                Question.options, Question.correct_answer)\
+            .filter(Question.content_hash.is_(None)).order_by(Question.id).limit(chunk_size).all()
+        if not rows:
+            break
+        db.session.execute(
+            update(Question.__table__).where(Question.id == bindparam("qid")).values(content_hash=bindparam("h")),
+            [{"qid": r.id, "h": content_hash(r.question_text, r.question_type, r.options, r.correct_answer)}
+             for r in rows],
+        )
+        db.session.commit()
+        total += len(rows)
+    return total
+
+def ensure_content_hashes():
+    """启动时调用：旧数据或绕过接口写入的题目补算指纹"""
+    if db.session.query(Question.id).filter(Question.content_hash.is_(None)).first() is not None:
+        backfill_content_hashes()
+
+def merge_duplicate_questions(dry_run=False):
+    """
+    合并同一出题人名下指纹相同的题目：保留 id 最小的一道，试卷题目、作答记录、题目统计改指向保留题后删除其余。
+    若同一场考试同时包含（或统计过）两道重复题，合并后试卷会出现重复题目、统计主键冲突，这类题目跳过不合并。
+    """
+    backfill_content_hashes()
+    dup_keys = db.session.query(Question.creator_id, Question.content_hash)\
+        .filter(Question.content_hash.isnot(None))\
+        .group_by(Question.creator_id, Question.content_hash).having(func.count(Question.id) > 1).all()
+    by_creator = defaultdict(list)
+    for creator_id, h in dup_keys:
+        by_creator[creator_id].append(h)
+    groups = defaultdict(list)   # (出题人, 指纹) -> [题目 id, ...]
+    for creator_id, hashes in by_creator.items():
+        for i in range(0, len(hashes), LOOKUP_CHUNK):
+            for qid, h in db.session.query(Question.id, Question.content_hash)\
+                    .filter(Question.creator_id == creator_id, Question.content_hash.in_(hashes[i:i + LOOKUP_CHUNK]))\
+                    .order_by(Question.id):
+                groups[(creator_id, h)].append(qid)
+
+    all_ids = [qid for ids in groups.values() for qid in ids]
+    exams_of = defaultdict(set)
+    for i in range(0, len(all_ids), LOOKUP_CHUNK):
+        for exam_id, qid in db.session.query(ExamQuestion.exam_id, ExamQuestion.question_id)\
+                .filter(ExamQuestion.question_id.in_(all_ids[i:i + LOOKUP_CHUNK])):
+            exams_of[qid].add(exam_id)
+        # 题目统计以 (考试, 题目) 为主键：试卷已改题但统计仍在的考试同样会冲突
+        for exam_id, qid in db.session.query(QuestionStats.exam_id, QuestionStats.question_id)\
+                .filter(QuestionStats.question_id.in_(all_ids[i:i + LOOKUP_CHUNK])):
+            exams_of[qid].add(exam_id)
+
+    mapping, skipped = [], []
+    for ids in groups.values():
+        keep, merged_exams = ids[0], set(exams_of[ids[0]])
+        for dup in ids[1:]:
+            if exams_of[dup] & merged_exams:
+                skipped.append(dup)
+                continue
+            merged_exams |= exams_of[dup]
+            mapping.append({"dup_id": dup, "keep_id": keep})
+
+    report = {"groups": len(groups), "merged": len(mapping), "skipped": skipped}
+    if dry_run or not mapping:
+        return report
+
+    for model in (ExamQuestion, StudentAnswer, QuestionStats):
+        table = model.__table__
+        db.session.execute(
+            update(table).where(table.c.question_id == bindparam("dup_id")).values(question_id=bindparam("keep_id")),
+            mapping,
+        )
+    dup_ids = [m["dup_id"] for m in mapping]
+    # 试卷引用已改指向保留题，按保留题刷新相关考试
+    touch_exams(question_ids=sorted({m["keep_id"] for m in mapping}))
+    # 错题索引以 (学生, 题目) 为主键，同一学生两道重复题都答错过时不能直接改 id，按合并后的作答重算
+    rebuild_wrong_questions(sorted({m["keep_id"] for m in mapping} | set(dup_ids)))
+    # 题目分析的作答压缩块里记着旧题目 id，按合并后的作答重建
+    repack_responses(sorted({m["keep_id"] for m in mapping}))
+    for i in range(0, len(dup_ids), LOOKUP_CHUNK):
+        db.session.execute(delete(Question.__table__).where(Question.id.in_(dup_ids[i:i + LOOKUP_CHUNK])))
+    remove_from_index(dup_ids)
+    db.session.commit()
+
+    # 本进程内的试卷/答案/明细缓存可能引用了被删除的题目 id（其它进程需重启）
+    from analytics_api import invalidate_question_projection
+    from item_analysis import invalidate_item_analysis
+    invalidate_exam_cache()
+    invalidate_question_id_index()
+    invalidate_question_projection()
+    invalidate_item_analysis()
+    return report
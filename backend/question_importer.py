@@ -1,6 +1,18 @@
+import os
+import threading
+import uuid
+from datetime import datetime
+from itertools import islice
+
 import pandas as pd
-from models import db, Question, Category
-from sqlalchemy.orm import load_only
+from openpyxl import load_workbook
+from models import db, Question, ImportJob
+from category_resolver import resolve_categories
+from sqlalchemy import insert, update
+from db_profile import with_lock_retry
+from question_search import index_question_rows
+from question_dedup import DEDUP_MODES, content_hash, find_existing_hashes
+from exam_manager import invalidate_question_id_index, invalidate_exam_caches_for_question, touch_exams
 
 # 中文模板列
 CN_COLUMNS = [
@@ -72,90 +84,451 @@ def export_template(path: str):
     df = pd.concat([df, pd.DataFrame([row1, row2, row3])], ignore_index=True)
     df.to_excel(path, index=False)
 
-def _cn(df, key):
-    """取兼容列名：优先中文，其次英文别名"""
-    if key in df.columns:
-        return df[key]
-    # key 为中文优先；若传入英文（如 question_text），转成中文列名
-    cn = COLUMN_ALIASES.get(key, key)
-    if cn in df.columns:
-        return df[cn]
-    # 反向匹配：如果传中文，检查是否有英文老列
+REQUIRED_COLUMNS = ("题干", "题型", "正确答案")
+OPTION_LETTERS = "ABCDEF"
+TRUE_VALUES = {"true", "t", "1", "yes", "y", "是", "对", "正确"}
+MAX_REPORTED_ERRORS = 20
+
+class ImportFileError(ValueError):
+    """文件本身有误（缺必要列、存在无效行），修正文件前重试或续传都不会成功"""
+    def __init__(self, message, errors=(), error_count=0):
+        super().__init__(message)
+        self.errors = list(errors)
+        self.error_count = error_count or len(self.errors)
+
+def _resolve_columns(df):
+    """一次性解析列名：中文模板优先，其次英文别名；返回 {中文列名: df 中的实际列名}"""
+    cols = {}
+    for zh in CN_COLUMNS + [f"选项{x}" for x in OPTION_LETTERS]:
+        if zh in df.columns:
+            cols[zh] = zh
     for en, zh in COLUMN_ALIASES.items():
-        if zh == key and en in df.columns:
-            return df[en]
-    return pd.Series([""] * len(df))
+        if zh not in cols and en in df.columns:
+            cols[zh] = en
+    return cols
+
+def _text(df, col):
+    """整列转为去空白的字符串；缺列时返回空串列"""
+    if col is None:
+        return pd.Series("", index=df.index, dtype=object)
+    return df[col].astype(str).str.strip()
+
+def _split_multi_answer(tokens):
+    """多选答案：无分隔符的连写字母（如 "AC"）拆成单个字母，重复字母只保留一次；其它写法原样交给校验"""
+    if len(tokens) == 1 and tokens[0].isascii() and tokens[0].isalpha():
+        tokens = list(tokens[0])
+    return list(dict.fromkeys(tokens))
+
+def _prepare_frame(df, first_row=2):
+    """
+    列式整理一批行，返回 (记录列表, 行级错误列表)。
+    记录为 dict：question_text / question_type / category / options / correct_answer；
+    first_row 为 df 首行在表格中的行号（第 1 行是表头）。
+    """
+    cols = _resolve_columns(df)
+    missing = [c for c in REQUIRED_COLUMNS if c not in cols]
+    if missing:
+        raise ImportFileError(f"Excel缺少必要列：{' / '.join(missing)}")
+
+    qtext = _text(df, cols["题干"])
+    qtype_raw = _text(df, cols["题型"])
+    raw_ans = _text(df, cols["正确答案"])
+    cat_name = _text(df, cols.get("分类"))
+    row_no = pd.Series(range(first_row, first_row + len(df)), index=df.index)
+
+    # 题干/题型/答案任一为空视为空行，直接跳过
+    keep = (qtext != "") & (qtype_raw != "") & (raw_ans != "")
+    qtype = qtype_raw.map(TYPE_MAP_IN)
+
+    # 选项：每个字母一列，present 记录每行实际填写了哪些选项字母
+    letters = [x for x in OPTION_LETTERS if f"选项{x}" in cols]
+    opt_frame = pd.DataFrame({x: _text(df, cols[f"选项{x}"]) for x in letters}, index=df.index)
+    present = pd.Series("", index=df.index, dtype=object)
+    for x in letters:
+        present = present + opt_frame[x].ne("").map({True: x, False: ""})
+
+    # 答案：多选拆成字母列表，单选取大写，判断题转布尔
+    ans_upper = raw_ans.str.upper()
+    multi_ans = ans_upper.str.findall(r"[^,，\s]+").map(_split_multi_answer)
+    tf_ans = raw_ans.str.lower().isin(TRUE_VALUES)
+
+    errors = []
+    def reject(mask, message):
+        nonlocal keep
+        bad = keep & mask
+        errors.extend({"row": int(r), "message": message(i)} for r, i in zip(row_no[bad], df.index[bad]))
+        keep = keep & ~bad
 
-def _norm_bool(v):
-    s = str(v).strip().lower()
-    return s in {"true", "t", "1", "yes", "y", "是", "对", "正确"}
+    reject(qtype.isna(), lambda i: f"题型无效：{qtype_raw[i]}（可填：单选题/多选题/判断题）")
+    is_single = qtype == "single"
+    is_multi = qtype == "multiple"
+    reject((is_single | is_multi) & (present == ""), lambda i: "选择题缺少选项")
+    pairs = list(zip(ans_upper.tolist(), multi_ans.tolist(), present.tolist()))
+    single_ok = pd.Series([len(a) == 1 and a in p for a, _, p in pairs], index=df.index, dtype=bool)
+    reject(is_single & ~single_ok, lambda i: f"单选题答案无效：{raw_ans[i]}（应为已填写选项中的一个字母）")
+    multi_ok = pd.Series([bool(xs) and all(len(x) == 1 and x in set(p) for x in xs) for _, xs, p in pairs],
+                         index=df.index, dtype=bool)
+    reject(is_multi & ~multi_ok, lambda i: f"多选题答案无效：{raw_ans[i]}（应为已填写选项的字母，如 A,C 或 AC）")
 
-def import_from_excel(file_path, creator_id):
-    """从Excel文件批量导入题目（支持中文模板/自动创建分类）"""
+    errors.sort(key=lambda e: e["row"])
+    if not keep.any():
+        return [], errors
+
+    idx = df.index[keep]
+    option_dicts = [
+        {x: v for x, v in zip(letters, vals) if v} or None
+        for vals in opt_frame.loc[idx].itertuples(index=False, name=None)
+    ] if letters else [None] * len(idx)
+    answers = [
+        [bool(tf)] if t == "true_false" else (list(m) if t == "multiple" else [a])
+        for t, a, m, tf in zip(qtype[idx].tolist(), ans_upper[idx].tolist(), multi_ans[idx].tolist(), tf_ans[idx].tolist())
+    ]
+    records = [
+        {"question_text": t, "question_type": qt, "category": c,
+         "options": o, "correct_answer": a}
+        for t, qt, c, o, a in zip(qtext[idx].tolist(), qtype[idx].tolist(), cat_name[idx].tolist(), option_dicts, answers)
+    ]
+    return records, errors
+
+def _dedup_records(records, dedup, creator_id, seen=None):
+    """
+    在该出题人的题库内按内容指纹判重（每块一次 IN 查询），返回 (待插入记录, 跳过条数, 更新的题目 id 列表)。
+    skip：跳过已有及文件内重复的题目；
+    update：已有题目按表格覆盖题干/选项/答案的写法及分类（指纹相同，只是全半角、空白等写法不同），文件内重复仍跳过；
+    insert：不判重。
+    seen 为本次导入已处理过的指纹（流式导入跨块共用），命中即视为文件内重复。
+    """
+    for r in records:
+        r["content_hash"] = content_hash(r["question_text"], r["question_type"], r["options"], r["correct_answer"])
+    if dedup == "insert":
+        return records, 0, []
+
+    seen = set() if seen is None else seen
+    existing = find_existing_hashes(creator_id, {r["content_hash"] for r in records} - seen)
+    fresh, matched, skipped = [], [], 0
+    for r in records:
+        h = r["content_hash"]
+        if h in seen:
+            skipped += 1
+            continue
+        seen.add(h)
+        if h in existing:
+            matched.append(r)
+        else:
+            fresh.append(r)
+    if dedup != "update":
+        return fresh, skipped + len(matched), []
+    return fresh, skipped, _update_existing(matched, existing)
+
+def _update_existing(records, existing):
+    """update 模式：按表格覆盖已有题目并刷新检索索引，返回被更新的题目 id（不提交）"""
+    if not records:
+        return []
+    cat_map = resolve_categories(r["category"] for r in records if r["category"])
+    rows = [{
+        "id": existing[r["content_hash"]],
+        "question_text": r["question_text"],
+        "options": r["options"],
+        "correct_answer": r["correct_answer"],
+    } for r in records]
+    db.session.execute(update(Question), rows)
+    # 分类列为空的行保留原分类
+    with_cat = [{"id": existing[r["content_hash"]], "category_id": cat_map[r["category"]]}
+                for r in records if r["category"]]
+    if with_cat:
+        db.session.execute(update(Question), with_cat)
+    index_question_rows(rows)
+    touch_exams(question_ids=[row["id"] for row in rows])
+    return [row["id"] for row in rows]
+
+def _insert_records(records, creator_id, dedup="skip", seen=None):
+    """判重后批量插入并写入检索索引，返回 (插入条数, 跳过的重复条数, 更新的题目 id 列表)（不提交）"""
+    if not records:
+        return 0, 0, []
+    records, duplicates, updated = _dedup_records(records, dedup, creator_id, seen)
+    if not records:
+        return 0, duplicates, updated
+    cat_map = resolve_categories(r["category"] for r in records)
+    rows = [{
+        "creator_id": creator_id,
+        "category_id": cat_map.get(r["category"]),
+        "question_text": r["question_text"],
+        "question_type": r["question_type"],
+        "options": r["options"],
+        "correct_answer": r["correct_answer"],
+        "content_hash": r["content_hash"],
+    } for r in records]
+    ids = db.session.scalars(
+        insert(Question).returning(Question.id, sort_by_parameter_order=True), rows
+    ).all()
+    for row, qid in zip(rows, ids):
+        row["id"] = qid
+    index_question_rows(rows)
+    return len(rows), duplicates, updated
+
+def _after_import_commit(creator_id, updated_ids):
+    """提交后失效本进程缓存：被更新的题目可能属于其它教师、已在试卷中"""
+    invalidate_question_id_index(creator_id)
+    if updated_ids:
+        from analytics_api import invalidate_question_projection
+        for qid in updated_ids:
+            invalidate_exam_caches_for_question(qid)
+            invalidate_question_projection(qid)
+
+def _summary(imported, duplicates, dedup, updated=0):
+    msg = f"成功导入 {imported} 道题目。"
+    if updated:
+        msg += f"已按表格更新已有题目 {updated} 道。"
+    if duplicates:
+        msg += f"跳过重复题目 {duplicates} 道。"
+    return msg
+
+def _format_errors(errors):
+    shown = "；".join(f"第{e['row']}行：{e['message']}" for e in errors[:5])
+    more = f" 等共 {len(errors)} 处" if len(errors) > 5 else ""
+    return f"导入失败，数据有误：{shown}{more}"
+
+def _import_df(df, creator_id, dedup="skip"):
+    """导入的完整写事务（锁冲突时由 with_lock_retry 整体重试）"""
+    records, errors = _prepare_frame(df)
+    if errors:
+        # 有错误时整批不写入，一次性返回全部行级错误
+        return {"success": False, "message": _format_errors(errors), "errors": errors[:MAX_REPORTED_ERRORS]}
+    count, duplicates, updated = _insert_records(records, creator_id, dedup)
+    db.session.commit()
+    _after_import_commit(creator_id, updated)
+    return {"success": True, "message": _summary(count, duplicates, dedup, len(updated)),
+            "imported": count, "duplicates": duplicates, "updated": len(updated)}
+
+def import_from_excel(file_path, creator_id, dedup="skip"):
+    """从Excel文件批量导入题目（支持中文模板/自动创建分类；dedup 见 DEDUP_MODES）"""
     try:
         df = pd.read_excel(file_path).fillna("")
-
-        required_any = (_cn(df, "题干"), _cn(df, "题型"), _cn(df, "正确答案"))
-        if any(series.empty for series in required_any):
-            raise ValueError("Excel缺少必要列：题干 / 题型 / 正确答案")
-
-        # 预取分类
-        existing_cats = {c.name: c.id for c in db.session.query(Category).options(load_only(Category.id, Category.name)).all()}
-
-        questions_to_add = []
-        for idx in range(len(df)):
-            qtext = str(_cn(df, "题干").iloc[idx]).strip()
-            qtype_raw = str(_cn(df, "题型").iloc[idx]).strip()
-            raw_ans  = str(_cn(df, "正确答案").iloc[idx]).strip()
-            cat_name = str(_cn(df, "分类").iloc[idx]).strip()
-
-            if not qtext or not qtype_raw or not raw_ans:
-                continue
-
-            qtype = TYPE_MAP_IN.get(qtype_raw, "").strip()
-            if qtype not in {"single", "multiple", "true_false"}:
-                raise ValueError(f"第{idx+2}行题型无效：{qtype_raw}（可填：单选题/多选题/判断题）")
-
-            # 分类
-            category_id = None
-            if cat_name:
-                if cat_name not in existing_cats:
-                    new_cat = Category(name=cat_name)
-                    db.session.add(new_cat)
-                    db.session.flush()
-                    existing_cats[cat_name] = new_cat.id
-                category_id = existing_cats[cat_name]
-
-            # 选项
-            options = {}
-            for key in ["选项A","选项B","选项C","选项D","选项E","选项F"]:
-                if key in df.columns:
-                    letter = key[-1].upper()  # A/B/C...
-                    val = str(df[key].iloc[idx]).strip()
-                    if val:
-                        options[letter] = val
-
-            # 答案
-            if qtype == "multiple":
-                correct = [x.strip().upper() for x in raw_ans.replace("，", ",").split(",") if x.strip()]
-            elif qtype == "true_false":
-                correct = [_norm_bool(raw_ans)]
-            else:
-                correct = [raw_ans.strip().upper()]
-
-            questions_to_add.append(Question(
-                creator_id=creator_id,
-                category_id=category_id,
-                question_text=qtext,
-                question_type=qtype,
-                options=options if options else None,
-                correct_answer=correct
-            ))
-
-        if questions_to_add:
-            db.session.add_all(questions_to_add)
-            db.session.commit()
-        return {"success": True, "message": f"成功导入 {len(questions_to_add)} 道题目。"}
+        return with_lock_retry(_import_df, df, creator_id, dedup)
     except Exception as e:
         db.session.rollback()
         return {"success": False, "message": f"导入失败: {str(e)}"}
+
+# ---------- 流式分块导入（大文件） ----------
+
+STREAM_CHUNK_SIZE = 1000
+HEARTBEAT_INTERVAL = 30    # 秒；执行中的任务按此间隔刷新 updated_at（须远小于 import_worker.STALE_TIMEOUT）
+
+class ImportJobLost(Exception):
+    """任务已被其它进程重新领取（本进程心跳中断过久），当前执行者应放弃"""
+STREAM_FORMATS = {".xlsx": "xlsx", ".xlsm": "xlsx", ".csv": "csv", ".xls": "xls"}
+
+def _rows_to_frame(header, rows):
+    width = len(header)
+    data = [["" if v is None else v for v in (tuple(r[:width]) + ("",) * (width - len(r)))] for r in rows]
+    return pd.DataFrame(data, columns=header, dtype=object)
+
+def _iter_xlsx_chunks(path, chunk_size, skip_rows=0):
+    """openpyxl 只读模式逐行读取，按块产出 DataFrame（内存中只保留当前块）"""
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = ["" if h is None else str(h).strip() for h in header]
+        rows = islice(rows, skip_rows, None)
+        while True:
+            block = list(islice(rows, chunk_size))
+            if not block:
+                break
+            yield _rows_to_frame(header, block)
+    finally:
+        wb.close()
+
+def _iter_csv_chunks(path, chunk_size, skip_rows=0):
+    """CSV（UTF-8，可带 BOM）按块读取，跳过已提交的数据行"""
+    with pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8-sig",
+                     chunksize=chunk_size, skiprows=range(1, skip_rows + 1)) as reader:
+        yield from reader
+
+def _iter_xls_chunks(path, chunk_size, skip_rows=0):
+    """旧版 .xls 无法流式读取，整表读入后按块切分（仅为兼容）"""
+    df = pd.read_excel(path).fillna("")
+    for start in range(skip_rows, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+CHUNK_READERS = {"xlsx": _iter_xlsx_chunks, "csv": _iter_csv_chunks, "xls": _iter_xls_chunks}
+
+def create_import_job(file_path, creator_id, chunk_size=None, dedup="skip"):
+    """登记一个流式导入任务（文件需保留到任务完成，以便续传）"""
+    fmt = STREAM_FORMATS.get(os.path.splitext(file_path)[1].lower())
+    if not fmt:
+        raise ValueError("仅支持 .xlsx / .xls / .csv 文件")
+    if dedup not in DEDUP_MODES:
+        raise ValueError(f"未知的判重方式：{dedup}（可选：{' / '.join(DEDUP_MODES)}）")
+    job = ImportJob(creator_id=creator_id, file_path=file_path, file_format=fmt,
+                    chunk_size=chunk_size or STREAM_CHUNK_SIZE, dedup_mode=dedup)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+def import_job_status(job):
+    elapsed = None
+    if job.started_at:
+        elapsed = ((job.finished_at or job.updated_at or job.started_at) - job.started_at).total_seconds()
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "rows_done": job.rows_done,
+        "imported": job.imported_count,
+        "duplicates": job.duplicate_count,
+        "updated": job.updated_count or 0,
+        "dedup_mode": job.dedup_mode,
+        "error_count": job.error_count,
+        "errors": job.errors or [],
+        "elapsed": round(elapsed, 2) if elapsed is not None else None,
+        "rows_per_sec": round(job.rows_done / elapsed, 1) if elapsed else None,
+        "message": job.message,
+    }
+
+def _claim_check(job_id, token):
+    """在当前写事务开头确认任务仍归本执行者所有；条件更新同时拿到写锁，提交前其它进程无法抢走"""
+    claimed = db.session.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job_id, ImportJob.claimed_by == token)
+        .values(updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        raise ImportJobLost(job_id)
+
+def _heartbeat(engine, job_id, token, stop):
+    """独立线程：按固定间隔刷新心跳，慢块或 .xls 整表读入期间也不会被判为失联"""
+    while not stop.wait(HEARTBEAT_INTERVAL):
+        try:
+            with engine.begin() as conn:
+                alive = conn.execute(
+                    update(ImportJob.__table__)
+                    .where(ImportJob.id == job_id, ImportJob.claimed_by == token, ImportJob.status == "running")
+                    .values(updated_at=datetime.utcnow())
+                ).rowcount
+        except Exception:
+            continue   # 库被锁等临时错误，下个周期再试
+        if not alive:
+            return
+
+def _validate_file(job):
+    """
+    正式写入前整个文件校验一遍，与请求内导入一致：有任何无效行则整个文件不导入，一次性报告全部错误。
+    多读一遍文件，换来不会出现只导入了一部分的结果。
+    """
+    errors, total, first_row = [], 0, 2
+    for df in CHUNK_READERS[job.file_format](job.file_path, job.chunk_size):
+        _, chunk_errors = _prepare_frame(df, first_row)
+        total += len(chunk_errors)
+        errors.extend(chunk_errors[:max(MAX_REPORTED_ERRORS - len(errors), 0)])
+        first_row += len(df)
+    if total:
+        raise ImportFileError(f"数据有误，共 {total} 处，未导入任何题目", errors, total)
+
+def _import_chunk_tx(job_id, token, df, first_row, seen):
+    """一块数据的写事务：插入题目并推进任务进度，二者同时提交；seen 为本次执行已处理过的指纹"""
+    # 先在事务外整理（耗时部分不占写锁，心跳线程照常写入），再核对归属并写入
+    records, errors = _prepare_frame(df, first_row)
+    if errors:
+        # 文件已整体校验过，仍出错说明文件在导入期间被改动
+        raise ImportFileError(f"数据有误，共 {len(errors)} 处", errors)
+    _claim_check(job_id, token)
+    job = db.session.get(ImportJob, job_id)
+    # 锁冲突整块重试时不能带着上次尝试记下的指纹
+    chunk_seen = set(seen)
+    imported, duplicates, updated = _insert_records(records, job.creator_id, job.dedup_mode, chunk_seen)
+    job.imported_count += imported
+    job.duplicate_count += duplicates
+    job.updated_count = (job.updated_count or 0) + len(updated)
+    job.rows_done += len(df)
+    job.updated_at = datetime.utcnow()
+    db.session.commit()
+    seen |= chunk_seen
+    _after_import_commit(job.creator_id, updated)
+
+def _finish_tx(job_id, token, status, message, error=None):
+    _claim_check(job_id, token)
+    job = db.session.get(ImportJob, job_id)
+    job.status = status
+    job.message = message[:255]
+    if error is not None:
+        job.error_count = error.error_count
+        job.errors = error.errors[:MAX_REPORTED_ERRORS]
+    job.updated_at = datetime.utcnow()
+    if status == "done":
+        job.finished_at = job.updated_at
+    db.session.commit()
+    return job
+
+def run_import_job(job_id, token=None):
+    """
+    执行或续传导入任务：首次执行先整体校验文件，之后从 rows_done 之后的行开始，每块独立提交。
+    文件有误（缺必要列、存在无效行）时任务标记为 invalid，不写入任何题目，也不能续传。
+    token 为领取任务时写入的 claimed_by（直接调用时新领一个）；执行期间后台线程维持心跳，
+    每次提交前核对归属，任务被其它进程接手后本次执行即放弃。
+    """
+    job = db.session.get(ImportJob, job_id)
+    if job is None:
+        return None
+    if job.status == "done":
+        return import_job_status(job)
+    if token is None:
+        token = uuid.uuid4().hex
+        job.claimed_by = token
+    elif job.claimed_by != token:
+        return import_job_status(job)
+    job.status = "running"
+    job.message = None
+    job.started_at = job.started_at or datetime.utcnow()
+    job.updated_at = datetime.utcnow()
+    db.session.commit()
+
+    stop = threading.Event()
+    beat = threading.Thread(target=_heartbeat, args=(db.engine, job_id, token, stop),
+                            name=f"import-heartbeat-{job_id}", daemon=True)
+    beat.start()
+    try:
+        try:
+            if job.rows_done == 0:
+                _validate_file(job)
+            chunks = CHUNK_READERS[job.file_format](job.file_path, job.chunk_size, job.rows_done)
+            seen = set()
+            for df in chunks:
+                with_lock_retry(_import_chunk_tx, job_id, token, df, job.rows_done + 2, seen)
+        except ImportJobLost:
+            db.session.rollback()
+            return import_job_status(db.session.get(ImportJob, job_id))
+        except ImportFileError as e:
+            db.session.rollback()
+            try:
+                job = with_lock_retry(_finish_tx, job_id, token, "invalid", f"导入失败: {e}", e)
+            except ImportJobLost:
+                db.session.rollback()
+                return import_job_status(db.session.get(ImportJob, job_id))
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(ImportJob, job_id)
+            try:
+                job = with_lock_retry(_finish_tx, job_id, token, "failed",
+                                      f"导入失败（已导入 {job.imported_count} 道，可续传）: {e}")
+            except ImportJobLost:
+                db.session.rollback()
+            return import_job_status(job)
+        else:
+            job = db.session.get(ImportJob, job_id)
+            try:
+                job = with_lock_retry(_finish_tx, job_id, token, "done",
+                                      _summary(job.imported_count, job.duplicate_count, job.dedup_mode,
+                                               job.updated_count or 0))
+            except ImportJobLost:
+                db.session.rollback()
+                return import_job_status(db.session.get(ImportJob, job_id))
+    finally:
+        stop.set()
+    try:
+        os.remove(job.file_path)
+    except OSError:
+        pass
+    return import_job_status(job)
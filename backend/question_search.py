@@ -0,0 +1,111 @@
+# backend/question_search.py
+# 题库全文检索：SQLite FTS5 虚表 question_fts（rowid = questions.id）
+# FTS5 自带分词器不认识中文，入库前先在 Python 侧切词：
+#   连续的中日韩字符 -> 字符二元组（bigram），单字则保留单字；英文/数字 -> 小写单词
+#   入库时另外为每个汉字写一个单字词元，单字查询（如“网”）也能命中词中间的字
+# 查询串按同样规则切词后做 AND 匹配，按 bm25 排序。
+import re
+
+from sqlalchemy import text
+
+from models import db, Question
+
+_CJK = r"㐀-䶿一-鿿豈-﫿぀-ヿ가-힯"
+_TOKEN_RE = re.compile(rf"[{_CJK}]+|[0-9A-Za-z_]+")
+_CJK_RE = re.compile(rf"[{_CJK}]")
+
+# 索引词元规则变化时加一，启动时发现旧版本索引即整体重建。
+# 版本记在本模块自己的 question_fts_meta 表（key -> value），不占用整库共用的 PRAGMA user_version
+SEARCH_INDEX_VERSION = 2
+_VERSION_KEY = "index_version"
+
+def tokenize(s, unigrams=False):
+    """中文按二元组切分，英文数字按单词切分；unigrams=True 时（建索引用）多字词另加每个单字"""
+    tokens = []
+    for run in _TOKEN_RE.findall(s or ""):
+        if _CJK_RE.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+                if unigrams:
+                    tokens.extend(run)
+        else:
+            tokens.append(run.lower())
+    return tokens
+
+def _document(question_text, options):
+    # 延迟导入，避免与 exam_manager 的循环依赖
+    from exam_manager import _normalize_options
+    parts = [question_text or ""]
+    parts.extend(str(v) for v in _normalize_options(options).values() if v is not None)
+    return " ".join(tokenize(" ".join(parts), unigrams=True))
+
+def ensure_search_index():
+    """启动时调用：建 FTS5 虚表；旧库首次升级或索引版本过旧时整体建索引"""
+    db.session.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS question_fts USING fts5(tokens, tokenize='unicode61')"
+    ))
+    db.session.execute(text(
+        "CREATE TABLE IF NOT EXISTS question_fts_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+    ))
+    empty = db.session.execute(text("SELECT rowid FROM question_fts LIMIT 1")).first() is None
+    version = db.session.execute(
+        text("SELECT value FROM question_fts_meta WHERE key = :key"), {"key": _VERSION_KEY}).scalar()
+    stale = (version or 0) < SEARCH_INDEX_VERSION
+    db.session.commit()
+    if (empty or stale) and db.session.query(Question.id).first() is not None:
+        rebuild_search_index()
+    if stale:
+        db.session.execute(text("INSERT OR REPLACE INTO question_fts_meta (key, value) VALUES (:key, :value)"),
+                           {"key": _VERSION_KEY, "value": SEARCH_INDEX_VERSION})
+        db.session.commit()
+
+def index_questions(questions):
+    """在当前事务中写入/刷新索引；questions 为已 flush（有 id）的 Question 对象"""
+    index_question_rows([
+        {"id": q.id, "question_text": q.question_text, "options": q.options} for q in questions if q.id
+    ])
+
+def index_question_rows(rows):
+    """同 index_questions，rows 为含 id / question_text / options 的 dict（批量导入用）"""
+    docs = [{"id": r["id"], "tokens": _document(r["question_text"], r["options"])} for r in rows]
+    if docs:
+        # 同 rowid 的旧条目直接覆盖（包括题目被绕过接口删除后 id 复用的情况）
+        db.session.execute(text("INSERT OR REPLACE INTO question_fts(rowid, tokens) VALUES (:id, :tokens)"), docs)
+
+def remove_from_index(question_ids):
+    if question_ids:
+        db.session.execute(text("DELETE FROM question_fts WHERE rowid = :id"), [{"id": i} for i in question_ids])
+
+def rebuild_search_index(chunk_size=2000):
+    """从 questions 表整体重建索引"""
+    db.session.execute(text("DELETE FROM question_fts"))
+    last_id = 0
+    while True:
+        rows = db.session.query(Question.id, Question.question_text, Question.options)\
+            .filter(Question.id > last_id).order_by(Question.id).limit(chunk_size).all()
+        if not rows:
+            break
+        db.session.execute(
+            text("INSERT INTO question_fts(rowid, tokens) VALUES (:id, :tokens)"),
+            [{"id": r.id, "tokens": _document(r.question_text, r.options)} for r in rows],
+        )
+        last_id = rows[-1].id
+    db.session.commit()
+
+def search_questions(query, limit=20, offset=0):
+    """返回 (命中总数, [question_id, ...])，按相关度排序"""
+    tokens = tokenize(query)
+    if not tokens:
+        return 0, []
+    # 每个词元作为短语加引号，防止被当作 FTS 语法
+    match = " ".join('"' + t.replace('"', '""') + '"' for t in dict.fromkeys(tokens))
+    total = db.session.execute(
+        text("SELECT count(*) FROM question_fts WHERE question_fts MATCH :m"), {"m": match}
+    ).scalar() or 0
+    ids = [r[0] for r in db.session.execute(
+        text("SELECT rowid FROM question_fts WHERE question_fts MATCH :m ORDER BY bm25(question_fts) LIMIT :limit OFFSET :offset"),
+        {"m": match, "limit": limit, "offset": offset},
+    )]
+    return total, ids
@@ -0,0 +1,15 @@
+# backend/rebuild_stats.py
+# 从 exam_attempts / student_answers 重算 exam_stats、question_stats、student_stats、student_wrong_questions
+# （统计表损坏或历史数据导入后执行）；同时为缺少作答压缩块的提交补写 attempt_responses（题目分析用）
+from app import app
+from models import db, ExamStats, QuestionStats, StudentStats, StudentWrongQuestion
+from exam_stats import rebuild_exam_stats, rebuild_student_stats
+from item_analysis import backfill_responses
+
+with app.app_context():
+    rebuild_exam_stats()
+    rebuild_student_stats()
+    packed = backfill_responses()
+    print(f"Stats rebuilt: {ExamStats.query.count()} exams, {QuestionStats.query.count()} question rows, "
+          f"{StudentStats.query.count()} students, {StudentWrongQuestion.query.count()} wrong-question rows, "
+          f"{packed} attempt response blocks backfilled.")
@@ -0,0 +1,114 @@
+# backend/result_export.py
+# 成绩导出：提交明细 / 答题矩阵（学生 × 题目 对错），CSV 分块流式输出，XLSX 用 openpyxl write-only 模式。
+# 读取走 yield_per 分批游标，内存占用与提交数无关（只与每批行数、题目数有关）。
+import csv
+import io
+import itertools
+import os
+import tempfile
+from datetime import datetime
+
+from sqlalchemy import select, union
+
+from models import db, ExamAttempt, ExamQuestion, StudentAnswer, QuestionStats
+
+EXPORT_FORMATS = ("csv", "xlsx")
+EXPORT_BATCH_ROWS = 1000      # 每批从游标读取的行数
+CSV_FLUSH_ROWS = 500          # 每累计多少行输出一个 CSV 块
+FILE_CHUNK_BYTES = 64 * 1024  # XLSX 临时文件按块回传
+
+SUBMISSION_HEADER = ["提交ID", "学号/工号", "得分", "提交时间", "切屏次数"]
+
+# 以这些字符开头的文本会被 Excel / WPS 当作公式执行（学号等字段由用户填写），导出时前置单引号
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+def _safe_cell(v):
+    return "'" + v if isinstance(v, str) and v.startswith(FORMULA_PREFIXES) else v
+
+def _safe_row(row):
+    return [_safe_cell(v) for v in row]
+
+def _fmt_time(t):
+    return t.isoformat(sep=" ", timespec="seconds") if isinstance(t, datetime) else ""
+
+def iter_submission_rows(exam_id):
+    """逐行产出提交明细（按提交 id 顺序）"""
+    stmt = (
+        select(ExamAttempt.id, ExamAttempt.student_id, ExamAttempt.final_score,
+               ExamAttempt.submit_time, ExamAttempt.switch_count)
+        .where(ExamAttempt.exam_id == exam_id)
+        .order_by(ExamAttempt.id)
+        .execution_options(yield_per=EXPORT_BATCH_ROWS)
+    )
+    for aid, sid, score, submit_time, switch_count in db.session.execute(stmt):
+        yield [aid, sid, float(score or 0), _fmt_time(submit_time), int(switch_count or 0)]
+
+def exam_question_ids(exam_id):
+    """答题矩阵的列：试卷中的题目（含各版本）以及试卷编辑前已被作答过的题目"""
+    stmt = union(
+        select(ExamQuestion.question_id).where(ExamQuestion.exam_id == exam_id),
+        select(QuestionStats.question_id).where(QuestionStats.exam_id == exam_id),
+    )
+    return sorted(qid for (qid,) in db.session.execute(stmt))
+
+def iter_answer_matrix_rows(exam_id, question_ids):
+    """
+    逐个提交产出一行：[提交ID, 学号/工号, 得分, 各题 1/0]；未作答（其它版本的题目）留空。
+    一条按提交 id 排序的 JOIN 查询，按提交分组，不会把整场考试的答题记录读入内存。
+    """
+    col = {qid: i for i, qid in enumerate(question_ids)}
+    stmt = (
+        select(ExamAttempt.id, ExamAttempt.student_id, ExamAttempt.final_score,
+               StudentAnswer.question_id, StudentAnswer.is_correct)
+        .join(StudentAnswer, StudentAnswer.attempt_id == ExamAttempt.id, isouter=True)
+        .where(ExamAttempt.exam_id == exam_id)
+        .order_by(ExamAttempt.id)
+        .execution_options(yield_per=EXPORT_BATCH_ROWS)
+    )
+    rows = db.session.execute(stmt)
+    for (aid, sid, score), group in itertools.groupby(rows, key=lambda r: (r[0], r[1], r[2])):
+        cells = [""] * len(question_ids)
+        for _, _, _, qid, is_correct in group:
+            i = col.get(qid)
+            if i is not None:
+                cells[i] = 1 if is_correct else 0
+        yield [aid, sid, float(score or 0), *cells]
+
+def answer_matrix_header(question_ids):
+    return ["提交ID", "学号/工号", "得分", *[f"Q{qid}" for qid in question_ids]]
+
+def stream_csv(header, rows):
+    """按块产出 UTF-8（带 BOM，Excel 直接打开不乱码）的 CSV 文本"""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    buf.write("\ufeff")
+    writer.writerow(_safe_row(header))
+    for i, row in enumerate(rows, 1):
+        writer.writerow(_safe_row(row))
+        if i % CSV_FLUSH_ROWS == 0:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+def stream_xlsx(header, rows, sheet_title="Sheet1"):
+    """write-only 工作簿逐行写入临时文件，保存后按块回传并删除临时文件"""
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_title)
+    ws.append(_safe_row(header))
+    for row in rows:
+        ws.append(_safe_row(row))
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        wb.save(path)
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(FILE_CHUNK_BYTES)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
@@ -0,0 +1,109 @@
+# backend/session_store.py
+# 可插拔的登录会话存储：
+#   memory —— 进程内 dict + 过期小顶堆，查找 O(1)，清理按过期顺序出堆（均摊 O(1)）
+#   sqlite —— 共享的 auth_sessions 表（主键查找 + expire_at 索引），多个 gunicorn worker 共用
+import heapq
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import select, delete, insert
+
+from models import db, AuthSession
+
+
+class MemorySessionStore:
+    SHARED = False   # 仅本进程可见
+
+    def __init__(self):
+        self._data = {}     # token -> payload（含 expire: datetime）
+        self._heap = []     # (expire_ts, token)
+        self._lock = threading.Lock()
+
+    def put(self, token, payload):
+        with self._lock:
+            self._data[token] = payload
+            heapq.heappush(self._heap, (payload["expire"].timestamp(), token))
+
+    def get(self, token):
+        return self._data.get(token)
+
+    def delete(self, token):
+        with self._lock:
+            self._data.pop(token, None)  # 堆里的旧条目出堆时再丢弃
+
+    def cleanup(self):
+        now = datetime.utcnow().timestamp()
+        heap = self._heap
+        if not heap or heap[0][0] >= now:
+            return
+        with self._lock:
+            while heap and heap[0][0] < now:
+                ts, token = heapq.heappop(heap)
+                info = self._data.get(token)
+                if info and info["expire"].timestamp() <= ts:
+                    self._data.pop(token, None)
+
+    def tokens_with_prefix(self, prefix):
+        now = datetime.utcnow()
+        return [t for t, info in list(self._data.items()) if t.startswith(prefix) and info["expire"] >= now]
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SqliteSessionStore:
+    """会话落在数据库表中；清理为定期的一条按索引范围删除"""
+
+    SHARED = True
+    CLEANUP_INTERVAL = 60  # 秒
+
+    def __init__(self):
+        self._next_cleanup = 0.0
+
+    def put(self, token, payload):
+        data = {k: v for k, v in payload.items() if k != "expire"}
+        with db.engine.begin() as conn:
+            conn.execute(insert(AuthSession).values(
+                token=token, payload=data, expire_at=payload["expire"].timestamp()))
+
+    def get(self, token):
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                select(AuthSession.payload, AuthSession.expire_at).where(AuthSession.token == token)
+            ).first()
+        if not row:
+            return None
+        return {**row.payload, "expire": datetime.fromtimestamp(row.expire_at)}
+
+    def delete(self, token):
+        with db.engine.begin() as conn:
+            conn.execute(delete(AuthSession).where(AuthSession.token == token))
+
+    def tokens_with_prefix(self, prefix):
+        """未过期且以 prefix 开头的 token：主键范围扫描"""
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        with db.engine.connect() as conn:
+            return conn.execute(select(AuthSession.token).where(
+                AuthSession.token >= prefix, AuthSession.token < upper,
+                AuthSession.expire_at >= datetime.utcnow().timestamp(),
+            )).scalars().all()
+
+    def cleanup(self):
+        now = time.time()
+        if now < self._next_cleanup:
+            return
+        self._next_cleanup = now + self.CLEANUP_INTERVAL
+        with db.engine.begin() as conn:
+            conn.execute(delete(AuthSession).where(AuthSession.expire_at < datetime.utcnow().timestamp()))
+
+
+SESSION_BACKENDS = {
+    "memory": MemorySessionStore,
+    "sqlite": SqliteSessionStore,
+}
+
+def create_session_store(name):
+    if name not in SESSION_BACKENDS:
+        raise ValueError(f"未知的会话存储：{name}（可选：{', '.join(SESSION_BACKENDS)}）")
+    return SESSION_BACKENDS[name]()
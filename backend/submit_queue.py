@@ -0,0 +1,114 @@
+# backend/submit_queue.py
+# 异步交卷：接口只做校验 + 入队（submission_queue 表，已提交即持久化），
+# 后台线程按批领取、在同一事务内判分落库，前端通过票据轮询得分。
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update, or_, and_
+
+from models import db, SubmissionQueue
+from exam_manager import submit_and_grade_batch
+
+BATCH_SIZE = 50
+POLL_INTERVAL = 0.5                     # 队列为空时的轮询间隔（秒）
+CLAIM_TIMEOUT = timedelta(minutes=5)    # 领取后超过该时间未完成（进程崩溃）则重新领取
+
+_workers = []
+_stop = threading.Event()
+
+def enqueue_submission(exam_id, student_id, answers_data):
+    """写入队列并立即返回票据号"""
+    item = SubmissionQueue(exam_id=exam_id, student_id=student_id, payload=answers_data)
+    db.session.add(item)
+    db.session.commit()
+    return item.id
+
+def has_pending_submission(exam_id, student_id):
+    return db.session.query(SubmissionQueue.id).filter(
+        SubmissionQueue.exam_id == exam_id,
+        SubmissionQueue.student_id == student_id,
+        SubmissionQueue.status.in_(("pending", "processing")),
+    ).first() is not None
+
+def get_submission_status(ticket_id):
+    item = SubmissionQueue.query.get(ticket_id)
+    if not item:
+        return None
+    return {
+        "ticket": item.id,
+        "exam_id": item.exam_id,
+        "student_id": item.student_id,
+        "status": item.status,
+        "score": item.score,
+        "message": item.message,
+    }
+
+def _claim_batch(batch_size):
+    """原子地领取一批待处理记录（多进程/多线程安全）"""
+    token = uuid.uuid4().hex
+    now = datetime.utcnow()
+    candidates = (
+        select(SubmissionQueue.id)
+        .where(or_(
+            SubmissionQueue.status == "pending",
+            and_(SubmissionQueue.status == "processing", SubmissionQueue.claimed_at < now - CLAIM_TIMEOUT),
+        ))
+        .order_by(SubmissionQueue.id)
+        .limit(batch_size)
+    )
+    db.session.execute(
+        update(SubmissionQueue)
+        .where(SubmissionQueue.id.in_(candidates))
+        .values(status="processing", claimed_by=token, claimed_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return SubmissionQueue.query.filter_by(claimed_by=token).order_by(SubmissionQueue.id).all()
+
+def drain_once(batch_size=BATCH_SIZE):
+    """处理一批，返回处理条数；判分结果与队列状态在同一事务内提交"""
+    items = _claim_batch(batch_size)
+    if not items:
+        return 0
+    results = submit_and_grade_batch(
+        [(it.exam_id, it.student_id, it.payload or {}) for it in items], commit=False
+    )
+    now = datetime.utcnow()
+    for it, res in zip(items, results):
+        it.status = "done" if res.get("success") else "failed"
+        it.score = res.get("score")
+        it.message = (res.get("message") or "")[:255]
+        it.processed_at = now
+    db.session.commit()
+    return len(items)
+
+def _worker_loop(app):
+    while not _stop.is_set():
+        with app.app_context():
+            try:
+                n = drain_once()
+            except Exception as e:
+                db.session.rollback()
+                app.logger.warning("submit queue batch failed: %s", e)
+                n = 0
+            finally:
+                db.session.remove()
+        if n == 0:
+            _stop.wait(POLL_INTERVAL)
+
+def start_submit_workers(app, workers=1):
+    """启动后台判分线程（daemon），重复调用不会重复启动"""
+    if _workers:
+        return
+    _stop.clear()
+    for i in range(max(1, int(workers))):
+        t = threading.Thread(target=_worker_loop, args=(app,), name=f"submit-worker-{i}", daemon=True)
+        t.start()
+        _workers.append(t)
+
+def stop_submit_workers(timeout=5):
+    _stop.set()
+    for t in _workers:
+        t.join(timeout)
+    _workers.clear()
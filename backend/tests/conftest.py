@@ -0,0 +1,38 @@
+# 测试共用：临时 SQLite 库上的最小应用（两名教师账号，建好检索索引）
+import os
+import sys
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import db, User, UserRole
+from question_search import ensure_search_index
+from exam_manager import invalidate_exam_cache, invalidate_question_id_index
+from analytics_queries import invalidate_analytics_cache
+
+
+def clear_process_caches():
+    # 进程内缓存按 id 存放，各用例的临时库 id 会重复
+    invalidate_exam_cache()
+    invalidate_question_id_index()
+    invalidate_analytics_cache()
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'test.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        for name in ("teacher", "teacher2"):
+            user = User(username=name, role=UserRole.TEACHER)
+            user.set_password("123456")
+            db.session.add(user)
+        db.session.commit()
+        ensure_search_index()
+    clear_process_caches()
+    yield app
+    clear_process_caches()
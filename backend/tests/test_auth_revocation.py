@@ -0,0 +1,68 @@
+# 签名 token + 共享会话存储：吊销检查读进程内集合（定期刷新），不在每个请求上查库
+import pytest
+from sqlalchemy import event
+
+import auth
+from models import db
+
+
+@pytest.fixture
+def client(app):
+    app.config.update(TOKEN_MODE="signed", SESSION_BACKEND="sqlite", SECRET_KEY="test-secret")
+    app.register_blueprint(auth.auth_bp, url_prefix="/api")
+    auth._revoked.clear()
+    yield app.test_client()
+    auth._revoked.clear()
+
+
+def login(client, employee_no):
+    resp = client.post("/api/auth/student/login", json={"name": "张三", "employee_no": employee_no})
+    return {"X-Token": resp.get_json()["token"]}
+
+
+def logged_in(client, headers):
+    return client.get("/api/auth/me", headers=headers).get_json()["logged_in"]
+
+
+def session_queries(app, fn):
+    statements = []
+    def before(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", before)
+    try:
+        result = fn()
+    finally:
+        with app.app_context():
+            event.remove(db.engine, "before_cursor_execute", before)
+    return result, [s for s in statements if "auth_sessions" in s]
+
+
+def test_revocation_check_skips_db(app, client):
+    headers = login(client, "e1")
+    assert logged_in(client, headers)
+    ok, queries = session_queries(app, lambda: logged_in(client, headers))
+    assert ok
+    assert queries == []
+
+
+def test_logout_elsewhere_applies_after_refresh(app, client):
+    headers = login(client, "e1")
+    assert logged_in(client, headers)
+    # 另一个 worker 登出：只写共享存储，本进程的吊销集合尚未刷新
+    with app.test_request_context(headers=headers):
+        info = auth._verify_signed_token(headers["X-Token"])
+        auth._sessions().put(auth.REVOKED_PREFIX + info["jti"], {"revoked": True, "expire": info["expire"]})
+    assert logged_in(client, headers)
+    # 刷新间隔到期后生效
+    auth._revoked["sqlite"] = (0, auth._revoked["sqlite"][1])
+    assert not logged_in(client, headers)
+
+
+def test_local_logout_is_immediate(client):
+    headers = login(client, "e1")
+    other = login(client, "e2")
+    assert logged_in(client, headers)
+    client.post("/api/auth/logout", headers=headers)
+    assert not logged_in(client, headers)
+    assert logged_in(client, other)
@@ -0,0 +1,74 @@
+# 多 worker：别的进程关闭考试、改卷、改题后，本进程缓存的试卷与答案表不能继续使用
+import pytest
+from sqlalchemy import text
+
+import exam_manager as em
+from models import db, Question, Exam, ExamQuestion, ExamStatus
+
+
+@pytest.fixture
+def exam_id(app):
+    with app.app_context():
+        db.session.add_all([
+            Question(creator_id=1, question_text=f"题{i}", question_type="single",
+                     options={"A": "对", "B": "错"}, correct_answer=["A"]) for i in range(3)
+        ])
+        exam = Exam(creator_id=1, title="期中", duration_minutes=30, status=ExamStatus.ACTIVE)
+        db.session.add(exam)
+        db.session.flush()
+        db.session.add_all([ExamQuestion(exam_id=exam.id, question_id=qid, score=5) for qid in (1, 2)])
+        db.session.commit()
+        return exam.id
+
+
+def other_worker(fn, *args):
+    """在“另一个进程”里执行改动：本进程的缓存保持改动前的样子"""
+    papers, keys = dict(em._PAPERS), dict(em._ANSWER_KEYS)
+    fn(*args)
+    em._PAPERS.update(papers)
+    em._ANSWER_KEYS.update(keys)
+
+
+def paper_ids(exam_id):
+    return sorted(q["id"] for q in em.get_exam_for_student(exam_id, "s1")["exam"]["questions"])
+
+
+def test_closed_elsewhere(app, exam_id):
+    with app.app_context():
+        assert em.get_exam_for_student(exam_id, "s1")["success"]
+        db.session.execute(text("UPDATE exams SET status = 'INACTIVE' WHERE id = :id"), {"id": exam_id})
+        db.session.commit()
+        assert em.get_exam_for_student(exam_id, "s1") == {"success": False, "message": "考试未开放"}
+
+
+def test_paper_edited_elsewhere(app, exam_id):
+    with app.app_context():
+        assert paper_ids(exam_id) == [1, 2]
+        other_worker(em.update_exam_questions, exam_id, {"add": [3]})
+        assert paper_ids(exam_id) == [1, 2, 3]
+
+
+def test_question_edited_elsewhere(app, exam_id):
+    with app.app_context():
+        em.get_exam_for_student(exam_id, "s1")
+
+        def edit():
+            db.session.get(Question, 1).question_text = "改过的题干"
+            em.touch_exams(question_ids=[1])
+            db.session.commit()
+        other_worker(edit)
+        texts = {q["id"]: q["question_text"] for q in em.get_exam_for_student(exam_id, "s1")["exam"]["questions"]}
+        assert texts[1] == "改过的题干"
+
+
+def test_answer_edited_elsewhere(app, exam_id):
+    with app.app_context():
+        em.build_answer_key(exam_id)
+
+        def edit():
+            db.session.get(Question, 1).correct_answer = ["B"]
+            em.touch_exams(question_ids=[1])
+            db.session.commit()
+        other_worker(edit)
+        result = em.submit_and_grade_exam(exam_id, "s1", {"answers": {"1": "B", "2": "A"}})
+        assert result["score"] == 10
@@ -0,0 +1,51 @@
+# 导入判重按出题人进行：两位教师各自导入同一行题目，互不影响
+import pandas as pd
+
+from models import db, Question
+from question_importer import import_from_excel
+from question_dedup import merge_duplicate_questions
+from exam_manager import sample_questions
+
+ROW = {"题干": "TCP 属于哪一层？", "题型": "单选题", "分类": "网络",
+       "选项A": "传输层", "选项B": "网络层", "正确答案": "A"}
+
+
+def write_xlsx(path, rows):
+    pd.DataFrame(rows).to_excel(path, index=False)
+    return str(path)
+
+
+def test_two_teachers_import_same_row(app, tmp_path):
+    path = write_xlsx(tmp_path / "q.xlsx", [ROW])
+    with app.app_context():
+        first = import_from_excel(path, 1)
+        second = import_from_excel(path, 2)
+        assert (first["imported"], first["duplicates"]) == (1, 0)
+        assert (second["imported"], second["duplicates"]) == (1, 0)
+        # 同一教师重复导入仍按重复跳过
+        again = import_from_excel(path, 2)
+        assert (again["imported"], again["duplicates"]) == (0, 1)
+
+        picked = sample_questions(2, {"single": {"total": 1}})
+        assert [db.session.get(Question, qid).creator_id for qid in picked["single"]] == [2]
+
+
+def test_update_mode_only_touches_own_questions(app, tmp_path):
+    with app.app_context():
+        import_from_excel(write_xlsx(tmp_path / "a.xlsx", [ROW]), 1)
+        edited = {**ROW, "题干": " TCP 属于哪一层？ ", "分类": "协议"}
+        result = import_from_excel(write_xlsx(tmp_path / "b.xlsx", [edited]), 2, dedup="update")
+        assert (result["imported"], result["updated"]) == (1, 0)
+        mine = Question.query.filter_by(creator_id=1).one()
+        assert mine.category.name == "网络"
+
+
+def test_merge_keeps_other_teachers_copies(app, tmp_path):
+    path = write_xlsx(tmp_path / "q.xlsx", [ROW])
+    with app.app_context():
+        import_from_excel(path, 1)
+        import_from_excel(path, 2)
+        import_from_excel(path, 2, dedup="insert")
+        report = merge_duplicate_questions()
+        assert (report["groups"], report["merged"]) == (1, 1)
+        assert sorted(c for (c,) in db.session.query(Question.creator_id)) == [1, 2]
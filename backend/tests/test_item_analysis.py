@@ -0,0 +1,45 @@
+# 题目分析接口只读：缺少压缩块的历史提交由启动补写，题目合并在同一事务内重建压缩块
+import pytest
+
+from models import db, Question, Exam, ExamQuestion, ExamStatus, AttemptResponse
+from exam_manager import submit_and_grade_exam
+from item_analysis import analyze_exam_items, ensure_attempt_responses, invalidate_item_analysis
+from question_dedup import merge_duplicate_questions
+
+
+@pytest.fixture
+def exams(app):
+    """两场考试各含一道内容相同的题（同一出题人），各有两份提交"""
+    with app.app_context():
+        for i in (1, 2):
+            db.session.add(Question(creator_id=1, question_text="1+1=?", question_type="single",
+                                    options={"A": "1", "B": "2"}, correct_answer=["B"]))
+            exam = Exam(creator_id=1, title=f"考试{i}", duration_minutes=30, status=ExamStatus.ACTIVE)
+            db.session.add(exam)
+            db.session.flush()
+            db.session.add(ExamQuestion(exam_id=exam.id, question_id=i, score=10))
+        db.session.commit()
+        for exam_id in (1, 2):
+            for student_id, answer in (("s1", "B"), ("s2", "A")):
+                assert submit_and_grade_exam(exam_id, student_id, {"answers": {str(exam_id): answer}})["success"]
+        return app
+
+
+def test_analysis_is_read_only(exams):
+    with exams.app_context():
+        db.session.query(AttemptResponse).filter_by(attempt_id=1).delete()
+        db.session.commit()
+        assert analyze_exam_items(1)["attempts"] == 1
+        assert db.session.query(AttemptResponse).count() == 3
+
+        ensure_attempt_responses()
+        invalidate_item_analysis()
+        assert db.session.query(AttemptResponse).count() == 4
+        assert analyze_exam_items(1)["items"][0]["p_value"] == 0.5
+
+
+def test_merge_repacks_responses(exams):
+    with exams.app_context():
+        assert merge_duplicate_questions()["merged"] == 1
+        items = analyze_exam_items(2)["items"]
+        assert [(it["question_id"], it["answered"], it["correct"]) for it in items] == [(1, 2, 1)]
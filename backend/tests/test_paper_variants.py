@@ -0,0 +1,50 @@
+# 分卷：份数在生成时记在考试上，改卷删空某份的独有题后其余学生不换卷；取卷与交卷按同一登录身份
+import pytest
+
+import exam_manager as em
+from models import db, Question, Exam, ExamQuestion, ExamStatus
+
+STUDENTS = [f"s{i}" for i in range(40)]
+
+
+@pytest.fixture
+def exam_id(app):
+    """共有题 1 道 + 3 份试卷各 1 道独有题"""
+    with app.app_context():
+        db.session.add_all([
+            Question(creator_id=1, question_text=f"题{i}", question_type="single",
+                     options={"A": "对", "B": "错"}, correct_answer=["A"]) for i in range(4)
+        ])
+        exam = Exam(creator_id=1, title="分卷", duration_minutes=30, status=ExamStatus.ACTIVE, variant_count=3)
+        db.session.add(exam)
+        db.session.flush()
+        db.session.add_all([ExamQuestion(exam_id=exam.id, question_id=qid, score=5, variant_no=v)
+                            for qid, v in ((1, 0), (2, 1), (3, 2), (4, 3))])
+        db.session.commit()
+        return exam.id
+
+
+def papers(exam_id):
+    return {sid: sorted(q["id"] for q in em.get_exam_for_student(exam_id, sid)["exam"]["questions"])
+            for sid in STUDENTS}
+
+
+def test_removing_last_variant_keeps_assignments(app, exam_id):
+    with app.app_context():
+        before = papers(exam_id)
+        assert {tuple(p) for p in before.values()} == {(1, 2), (1, 3), (1, 4)}
+        assert em.update_exam_questions(exam_id, {"remove": [4]})["success"]
+        after = papers(exam_id)
+        for sid in STUDENTS:
+            assert after[sid] == ([1] if before[sid] == [1, 4] else before[sid])
+            # 判分与取卷一致
+            assert sorted(em.get_answer_key(exam_id, sid)) == after[sid]
+
+
+def test_paper_requires_login(app, exam_id):
+    from exam_api import exam_bp
+    app.register_blueprint(exam_bp, url_prefix="/api")
+    client = app.test_client()
+    assert client.get(f"/api/exam/{exam_id}").status_code == 401
+    resp = client.post(f"/api/exam/{exam_id}/submit", json={"employee_no": "s1", "answers": []})
+    assert resp.status_code == 401
@@ -0,0 +1,34 @@
+# 检索索引版本记在 question_fts_meta 中，不改动整库的 PRAGMA user_version；版本过旧时启动即重建
+from sqlalchemy import text
+
+from models import db, Question
+from question_search import ensure_search_index, index_questions, search_questions, SEARCH_INDEX_VERSION
+
+
+def meta_version():
+    return db.session.execute(text("SELECT value FROM question_fts_meta WHERE key = 'index_version'")).scalar()
+
+
+def test_version_kept_in_meta_table(app):
+    with app.app_context():
+        assert meta_version() == SEARCH_INDEX_VERSION
+        assert db.session.execute(text("PRAGMA user_version")).scalar() == 0
+
+
+def test_stale_version_rebuilds(app):
+    with app.app_context():
+        indexed = Question(creator_id=1, question_text="传输层", question_type="single",
+                           options={"A": "TCP", "B": "UDP"}, correct_answer=["A"])
+        db.session.add(indexed)
+        db.session.flush()
+        index_questions([indexed])
+        # 绕过接口写入的题目不在索引中（索引非空，只有版本过旧才会重建）
+        db.session.add(Question(creator_id=1, question_text="网络协议", question_type="single",
+                                options={"A": "TCP", "B": "UDP"}, correct_answer=["A"]))
+        db.session.commit()
+        assert search_questions("协议") == (0, [])
+        db.session.execute(text("UPDATE question_fts_meta SET value = 1"))
+        db.session.commit()
+        ensure_search_index()
+        assert meta_version() == SEARCH_INDEX_VERSION
+        assert search_questions("协议") == (1, [2])
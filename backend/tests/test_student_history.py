@@ -0,0 +1,40 @@
+# 学生个人成绩页：提交记录按 (submit_time, id) 倒序分页，概况与趋势只读学生汇总行
+from models import db, Question, Exam, ExamQuestion, ExamStatus
+from exam_manager import submit_and_grade_exam
+import analytics_queries as aq
+
+
+def seed(app, n):
+    with app.app_context():
+        db.session.add(Question(creator_id=1, question_text="1+1=?", question_type="single",
+                                options={"A": "1", "B": "2"}, correct_answer=["B"]))
+        for i in range(n):
+            exam = Exam(creator_id=1, title=f"考试{i}", duration_minutes=30, status=ExamStatus.ACTIVE)
+            db.session.add(exam)
+            db.session.flush()
+            db.session.add(ExamQuestion(exam_id=exam.id, question_id=1, score=10))
+        db.session.commit()
+        for exam_id in range(1, n + 1):
+            assert submit_and_grade_exam(exam_id, "emp1", {"answers": {"1": "B"}})["success"]
+
+
+def test_history_pages(app):
+    seed(app, 3)
+    with app.app_context():
+        first = aq.student_history("emp1", limit=2)
+        assert first["summary"]["total_exams"] == 3
+        assert len(first["trend"]) == 3
+        assert [r["exam_id"] for r in first["history"]] == [3, 2]
+        assert [r["exam_id"] for r in aq.student_history("emp1", limit=2, offset=2)["history"]] == [1]
+        assert aq.student_history("emp1", offset=5)["history"] == []
+
+
+def test_history_walks_student_index(app):
+    with app.app_context():
+        compiled = aq._STUDENT_ATTEMPTS.compile(dialect=db.engine.dialect)
+        params = compiled.construct_params({"student_id": "emp1", "limit": 20, "offset": 0})
+        rows = db.session.connection().exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + str(compiled), tuple(params[k] for k in compiled.positiontup))
+        plan = " ".join(r[-1] for r in rows)
+        assert "ix_exam_attempts_student_time" in plan
+        assert "TEMP B-TREE" not in plan
@@ -0,0 +1,55 @@
+# 教师总览：冷启动固定 2 条查询（与考试数、提交数无关），TTL 内重复轮询不再访问数据库
+import pytest
+from sqlalchemy import event
+
+from models import db, Question, Exam, ExamQuestion, ExamStatus
+from exam_manager import submit_and_grade_exam
+import analytics_queries as aq
+
+
+@pytest.fixture
+def overview_app(app):
+    with app.app_context():
+        q = Question(creator_id=1, question_text="1+1=?", question_type="single",
+                     options={"A": "1", "B": "2"}, correct_answer=["B"])
+        db.session.add(q)
+        db.session.flush()
+        for i in range(5):
+            exam = Exam(creator_id=1, title=f"考试{i}", duration_minutes=30, status=ExamStatus.ACTIVE)
+            db.session.add(exam)
+            db.session.flush()
+            db.session.add(ExamQuestion(exam_id=exam.id, question_id=q.id, score=100))
+        db.session.commit()
+        for exam_id in range(1, 6):
+            for student_id in range(100, 100 + exam_id):
+                answer = "B" if student_id % 2 else "A"
+                assert submit_and_grade_exam(exam_id, student_id, {"answers": {str(q.id): answer}})["success"]
+        aq.invalidate_analytics_cache()
+        yield app
+
+
+def count_queries(fn):
+    statements = []
+    def before(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(db.engine, "before_cursor_execute", before)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before)
+    return result, statements
+
+
+def test_overview_query_count(overview_app):
+    with overview_app.app_context():
+        data, cold = count_queries(aq.teacher_overview)
+        assert len(cold) == 2, cold
+        again, warm = count_queries(aq.teacher_overview)
+        assert warm == []
+        assert again is data
+
+    assert data["total_exams"] == 5
+    assert data["total_attempts"] == 15
+    assert data["total_participants"] == 5
+    assert data["max_score"] == 100
+    assert sum(b["count"] for b in data["score_buckets"]) == 15
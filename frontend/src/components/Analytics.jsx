@@ -11,6 +11,10 @@ export default function Analytics() {
   const [detailExam, setDetailExam] = useState(null)
   const [subs, setSubs] = useState([])
   const [subsLoading, setSubsLoading] = useState(false)
+  const [subsTotal, setSubsTotal] = useState(0)
+  const [subsCursor, setSubsCursor] = useState(null)
+  // 服务端排序/筛选：sort=submit_time|score|switch_count
+  const [subsQuery, setSubsQuery] = useState({ sort:'submit_time', order:'desc', min_score:'', max_score:'', over_limit:false })
 
   const [ansOpen, setAnsOpen] = useState(false)
   const [ansLoading, setAnsLoading] = useState(false)
@@ -27,15 +31,37 @@ export default function Analytics() {
     })()
   }, [])
 
+  // 按游标分页加载提交明细；cursor 为空时从第一页开始
+  const loadSubs = async (exam, query, cursor = null) => {
+    setSubsLoading(true)
+    const params = new URLSearchParams({ sort: query.sort, order: query.order, limit: '50' })
+    if (query.min_score !== '') params.set('min_score', query.min_score)
+    if (query.max_score !== '') params.set('max_score', query.max_score)
+    if (query.over_limit) params.set('over_limit', '1')
+    if (cursor) params.set('cursor', cursor)
+    const res = await fetch(`${API_BASE}/analytics/exam/${exam.id}/submissions?${params}`)
+    const d = await res.json()
+    if (d.success) {
+      setSubs(prev => cursor ? [...prev, ...(d.submissions || [])] : (d.submissions || []))
+      setSubsTotal(d.total ?? 0)
+      setSubsCursor(d.next_cursor || null)
+    }
+    setSubsLoading(false)
+  }
+
   const openDetail = async (exam) => {
     setDetailExam(exam)
     setDetailOpen(true)
     setSubs([])
-    setSubsLoading(true)
-    const res = await fetch(`${API_BASE}/analytics/exam/${exam.id}/submissions`)
-    const d = await res.json()
-    if (d.success) setSubs(d.submissions || [])
-    setSubsLoading(false)
+    setSubsCursor(null)
+    await loadSubs(exam, subsQuery)
+  }
+
+  const changeSubsQuery = (patch) => {
+    const q = { ...subsQuery, ...patch }
+    setSubsQuery(q)
+    setSubs([])
+    loadSubs(detailExam, q)
   }
 
   const openAnswers = async (attemptId) => {
@@ -114,7 +140,28 @@ export default function Analytics() {
         <div style={backdropStyle}>
           <div style={modalStyle} className="card">
             <div className="h2">提交明细 · {detailExam?.title}</div>
-            {subsLoading ? <div className="center">加载中...</div> : (
+            <div className="row mt8" style={{gap:8, alignItems:'center', flexWrap:'wrap'}}>
+              <select className="input" value={subsQuery.sort} onChange={e=>changeSubsQuery({ sort: e.target.value })}>
+                <option value="submit_time">按提交时间</option>
+                <option value="score">按得分</option>
+                <option value="switch_count">按切屏次数</option>
+              </select>
+              <select className="input" value={subsQuery.order} onChange={e=>changeSubsQuery({ order: e.target.value })}>
+                <option value="desc">降序</option>
+                <option value="asc">升序</option>
+              </select>
+              <input className="input" style={{width:90}} placeholder="最低分" value={subsQuery.min_score}
+                     onChange={e=>setSubsQuery(q=>({ ...q, min_score: e.target.value }))}
+                     onBlur={()=>changeSubsQuery({})} />
+              <input className="input" style={{width:90}} placeholder="最高分" value={subsQuery.max_score}
+                     onChange={e=>setSubsQuery(q=>({ ...q, max_score: e.target.value }))}
+                     onBlur={()=>changeSubsQuery({})} />
+              <label className="row option">
+                <input type="checkbox" checked={subsQuery.over_limit} onChange={e=>changeSubsQuery({ over_limit: e.target.checked })} /> 切屏超限
+              </label>
+              <span className="muted">共 {subsTotal} 条</span>
+            </div>
+            {subsLoading && subs.length === 0 ? <div className="center">加载中...</div> : (
               subs.length === 0 ? <div className="muted mt8">暂无提交</div> : (
                 <div className="mt12" style={{maxHeight:480, overflow:'auto'}}>
                   <table className="table">
@@ -143,6 +190,14 @@ export default function Analytics() {
                       ))}
                     </tbody>
                   </table>
+                  {subsCursor && (
+                    <div className="row mt8" style={{justifyContent:'center'}}>
+                      <button className="btn small outline" disabled={subsLoading}
+                              onClick={()=>loadSubs(detailExam, subsQuery, subsCursor)}>
+                        {subsLoading ? '加载中...' : `加载更多（已显示 ${subs.length} / ${subsTotal}）`}
+                      </button>
+                    </div>
+                  )}
                 </div>
               )
             )}
@@ -96,6 +96,19 @@ export default function ExamTaking() {
 
   const setAns = (qid, v) => setAnswers(a => ({ ...a, [qid]: v }))
 
+  // 轮询异步交卷结果（最多约 30 秒）
+  const waitForScore = async (ticket) => {
+    for (let i = 0; i < 30; i++) {
+      await new Promise(r => setTimeout(r, 1000))
+      try {
+        const res = await authFetch(`${API_BASE}/exam/submission/${ticket}`)
+        const d = await res.json()
+        if (d.success && (d.status === 'done' || d.status === 'failed')) return d
+      } catch { /* 网络抖动，继续轮询 */ }
+    }
+    return null
+  }
+
   const submit = async () => {
     const payload = {
       answers: Object.entries(answers).map(([qid, v]) => ({ question_id: Number(qid), answer: v })),
@@ -111,6 +124,15 @@ export default function ExamTaking() {
       })
       const data = await res.json()
       if (!data.success) { alert(data.message || '提交失败'); return }
+      // 异步交卷：后端已入队，轮询判分结果
+      if (data.queued) {
+        const result = await waitForScore(data.ticket)
+        if (!result) { alert('答卷已提交，正在判分，请稍后在成绩中查看'); nav('/student/dashboard'); return }
+        if (result.status === 'failed') { alert(result.message || '提交失败'); return }
+        alert(`提交成功，得分：${result.score}`)
+        nav('/student/dashboard')
+        return
+      }
       alert(`提交成功，得分：${data.score}`)
       nav('/student/dashboard')
     } catch {
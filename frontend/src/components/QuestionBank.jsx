@@ -2,6 +2,8 @@
 import { useEffect, useMemo, useState } from 'react'
 import { API_BASE } from '@/lib/apiBase'
 
+const PAGE_SIZE = 200
+
 const emptyForm = {
   id: null,
   question_text: '',
@@ -31,20 +33,38 @@ export default function QuestionBank() {
   // Excel 导入
   const [excelFile, setExcelFile] = useState(null)
   const [impMsg, setImpMsg] = useState('')
+  const [dedupMode, setDedupMode] = useState('skip') // skip 跳过重复 / update 更新分类 / insert 不判重
+
+  // 服务端按题型/分类过滤 + 按 id 游标分页
+  const [nextCursor, setNextCursor] = useState(null)
+  const pageUrl = (cursor) => {
+    const p = new URLSearchParams({ limit: String(PAGE_SIZE) })
+    if (typeFilter) p.set('type', typeFilter)
+    if (catFilter) p.set('category_id', catFilter)
+    if (cursor) p.set('cursor', String(cursor))
+    return `${API_BASE}/questions?${p}`
+  }
 
   const load = async () => {
     setLoading(true)
     try {
       const [qs, cs] = await Promise.all([
-        fetch(`${API_BASE}/questions`).then(r=>r.json()),
+        fetch(pageUrl()).then(r=>r.json()),
         fetch(`${API_BASE}/categories`).then(r=>r.json()),
       ])
-      if (qs.success) setList(qs.questions || [])
+      if (qs.success) { setList(qs.questions || []); setNextCursor(qs.next_cursor || null) }
       if (cs.success) setCategories(cs.categories || [])
     } finally { setLoading(false) }
   }
 
-  useEffect(()=>{ load() }, [])
+  const loadMore = async () => {
+    if (!nextCursor) return
+    const qs = await fetch(pageUrl(nextCursor)).then(r=>r.json())
+    if (qs.success) { setList(l => [...l, ...(qs.questions || [])]); setNextCursor(qs.next_cursor || null) }
+  }
+
+  // eslint-disable-next-line react-hooks/exhaustive-deps
+  useEffect(()=>{ load() }, [typeFilter, catFilter])
 
   const filtered = useMemo(()=>{
     return (list||[]).filter(it=>{
@@ -183,14 +203,42 @@ export default function QuestionBank() {
   }
 
   // —— Excel 导入 —— //
+  // 后台导入：按任务号轮询进度，直到完成或失败
+  const importProgress = (j) => {
+    const speed = j.rows_per_sec ? `，${j.rows_per_sec} 行/秒` : ''
+    return `正在导入…已处理 ${j.rows_done} 行，导入 ${j.imported} 道，更新 ${j.updated || 0} 道，重复 ${j.duplicates || 0} 道${speed}`
+  }
+  const importErrors = (j) => (j.errors || []).slice(0, 5).map(e => `第${e.row}行：${e.message}`).join('；')
+  const pollImport = async (jobId) => {
+    for (;;) {
+      await new Promise(r => setTimeout(r, 1000))
+      let j
+      try { j = await fetch(`${API_BASE}/questions/import/${jobId}`).then(r=>r.json()) } catch { continue }
+      if (!j.success) { setImpMsg(j.message || '导入任务不存在'); return }
+      if (j.status === 'done' || j.status === 'failed' || j.status === 'invalid') {
+        const errs = importErrors(j)
+        setImpMsg((j.message || (j.status === 'done' ? '导入成功' : '导入失败')) + (errs ? `（${errs}）` : ''))
+        if (j.imported) await load()
+        return
+      }
+      setImpMsg(importProgress(j))
+    }
+  }
+
   const uploadExcel = async () => {
     if (!excelFile) { setImpMsg('请先选择Excel文件'); return }
     setImpMsg('正在导入…')
     const fd = new FormData()
     fd.append('file', excelFile)
+    fd.append('dedup', dedupMode)
     try {
       const res = await fetch(`${API_BASE}/questions/upload`, { method:'POST', body: fd })
       const data = await res.json()
+      if (data.success && data.queued) {
+        setExcelFile(null)
+        await pollImport(data.job_id)
+        return
+      }
       setImpMsg(data.message || (data.success?'导入成功':'导入失败'))
       if (data.success) { setExcelFile(null); await load() }
     } catch {
@@ -230,13 +278,18 @@ export default function QuestionBank() {
         <div className="mt16 card subtle">
           <div className="h2">Excel 导入题库</div>
           <div className="row mt8" style={{flexWrap:'wrap', gap:12}}>
-            <input type="file" accept=".xls,.xlsx" onChange={e=>setExcelFile(e.target.files?.[0]||null)} />
+            <input type="file" accept=".xls,.xlsx,.csv" onChange={e=>setExcelFile(e.target.files?.[0]||null)} />
+            <select className="input" style={{maxWidth:200}} value={dedupMode} onChange={e=>setDedupMode(e.target.value)}>
+              <option value="skip">重复题目：跳过</option>
+              <option value="update">重复题目：更新分类</option>
+              <option value="insert">重复题目：仍然导入</option>
+            </select>
             <button className="btn outline" onClick={uploadExcel}>上传导入</button>
             <button className="btn outline" onClick={downloadTemplate}>下载中文模板</button>
             {impMsg && <span className="muted">{impMsg}</span>}
           </div>
           <div className="mt8 muted" style={{fontSize:13}}>
-            模板列：题干、题型（单选题/多选题/判断题）、分类、选项A~选项D、正确答案。<br/>
+            模板列：题干、题型（单选题/多选题/判断题）、分类、选项A~选项D、正确答案；也可上传同样列名的 CSV（UTF-8）。<br/>
             示例：单选题填 <code>A</code>；多选题填 <code>A,C</code>；判断题填 <code>对/错</code> 或 <code>True/False</code>。
           </div>
         </div>
@@ -264,6 +317,9 @@ export default function QuestionBank() {
               </table>
             )
           )}
+          {!loading && nextCursor && (
+            <div className="center mt12"><button className="btn small outline" onClick={loadMore}>加载更多</button></div>
+          )}
         </div>
       </div>
 